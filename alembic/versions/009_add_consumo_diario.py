@@ -0,0 +1,73 @@
+"""add consumo_diario rollup table
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def table_exists(table_name):
+    """Verifica se uma tabela já existe no banco de dados."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = :table_name)"
+        ),
+        {"table_name": table_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """Cria o rollup diário de consumo e popula com o histórico ainda existente."""
+    if table_exists('consumo_diario'):
+        return
+
+    op.create_table(
+        'consumo_diario',
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('alimento_id', sa.Integer(), nullable=False),
+        sa.Column('dia', sa.Date(), nullable=False),
+        sa.Column('entradas', sa.Float(), nullable=False, server_default=sa.text('0')),
+        sa.Column('saidas', sa.Float(), nullable=False, server_default=sa.text('0')),
+        sa.Column('ajustes', sa.Float(), nullable=False, server_default=sa.text('0')),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['alimento_id'], ['alimentos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('tenant_id', 'alimento_id', 'dia')
+    )
+
+    # Consultas de analytics filtram por tenant + intervalo de dias
+    op.create_index('ix_consumo_diario_tenant_dia', 'consumo_diario', ['tenant_id', 'dia'], unique=False)
+
+    # Backfill a partir das movimentações ainda retidas (últimos 90 dias)
+    op.execute(
+        """
+        INSERT INTO consumo_diario (tenant_id, alimento_id, dia, entradas, saidas, ajustes)
+        SELECT
+            tenant_id,
+            alimento_id,
+            created_at::date,
+            COALESCE(SUM(quantidade) FILTER (WHERE tipo = 'entrada'), 0),
+            COALESCE(SUM(quantidade) FILTER (WHERE tipo IN ('saida', 'uso')), 0),
+            COALESCE(SUM(COALESCE(quantidade_nova, 0) - COALESCE(quantidade_anterior, 0))
+                     FILTER (WHERE tipo = 'ajuste'), 0)
+        FROM movimentacoes_estoque
+        GROUP BY tenant_id, alimento_id, created_at::date
+        """
+    )
+
+
+def downgrade():
+    """Remove o rollup de consumo."""
+    op.drop_index('ix_consumo_diario_tenant_dia', table_name='consumo_diario')
+    op.drop_table('consumo_diario')
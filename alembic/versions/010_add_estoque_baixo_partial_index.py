@@ -0,0 +1,52 @@
+"""add partial index for low-stock query
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def index_exists(index_name):
+    """Verifica se um índice já existe no banco de dados."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = :index_name)"
+        ),
+        {"index_name": index_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """Índice parcial só com os produtos abaixo do mínimo, ordenado pela falta.
+
+    O predicado precisa ser idêntico ao filtro de /alimentos/estoque-baixo para
+    o planner usar o índice; o tamanho do índice acompanha o número de alertas,
+    não o tamanho do catálogo.
+    """
+    if not index_exists('ix_alimentos_estoque_baixo'):
+        op.execute(
+            """
+            CREATE INDEX ix_alimentos_estoque_baixo
+            ON alimentos (tenant_id, (quantidade_minima - quantidade_estoque) DESC)
+            WHERE ativo = true
+              AND quantidade_minima > 0
+              AND quantidade_estoque <= quantidade_minima
+            """
+        )
+
+
+def downgrade():
+    """Remove o índice parcial de estoque baixo."""
+    op.drop_index('ix_alimentos_estoque_baixo', table_name='alimentos')
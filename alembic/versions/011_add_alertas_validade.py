@@ -0,0 +1,66 @@
+"""add alertas_validade expiry calendar
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def table_exists(table_name):
+    """Verifica se uma tabela já existe no banco de dados."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = :table_name)"
+        ),
+        {"table_name": table_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """Cria o calendário de vencimento (populado pelo job diário na inicialização)."""
+    if table_exists('alertas_validade'):
+        return
+
+    op.create_table(
+        'alertas_validade',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('alimento_id', sa.Integer(), nullable=False),
+        sa.Column('origem', sa.String(length=20), nullable=False),
+        sa.Column('origem_id', sa.Integer(), nullable=False),
+        sa.Column('lote_numero', sa.String(length=50), nullable=True),
+        sa.Column('unidade_medida', sa.String(length=20), nullable=True),
+        sa.Column('data_validade', sa.Date(), nullable=False),
+        sa.Column('quantidade_disponivel', sa.Float(), nullable=False),
+        sa.Column('atualizado_em', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['alimento_id'], ['alimentos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Leitura de /lotes/vencendo: faixa de validade por tenant
+    op.create_index('ix_alertas_validade_tenant_validade', 'alertas_validade', ['tenant_id', 'data_validade'], unique=False)
+    # Atualização incremental a partir da entrada/lote de origem
+    op.create_index('ix_alertas_validade_origem', 'alertas_validade', ['origem', 'origem_id'], unique=True)
+    # Limpeza quando o estoque de um produto é zerado
+    op.create_index('ix_alertas_validade_alimento', 'alertas_validade', ['alimento_id'], unique=False)
+
+
+def downgrade():
+    """Remove o calendário de vencimento."""
+    op.drop_index('ix_alertas_validade_alimento', table_name='alertas_validade')
+    op.drop_index('ix_alertas_validade_origem', table_name='alertas_validade')
+    op.drop_index('ix_alertas_validade_tenant_validade', table_name='alertas_validade')
+    op.drop_table('alertas_validade')
@@ -0,0 +1,69 @@
+"""add pg_trgm/unaccent search indexes on alimentos
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+# Coluna -> índice GIN trigram sobre immutable_unaccent(lower(coluna))
+INDICES = {
+    'nome': 'ix_alimentos_nome_trgm',
+    'categoria': 'ix_alimentos_categoria_trgm',
+    'fornecedor': 'ix_alimentos_fornecedor_trgm',
+}
+
+
+def index_exists(index_name):
+    """Verifica se um índice já existe no banco de dados."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = :index_name)"
+        ),
+        {"index_name": index_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """Busca de produtos por trigramas, sem diferenciar acentos.
+
+    `unaccent()` é STABLE e não pode ser usada em índice; o wrapper IMMUTABLE
+    fixa o dicionário. A expressão do índice precisa ser idêntica à usada na
+    busca de /alimentos (immutable_unaccent(lower(coluna))).
+    """
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION immutable_unaccent(text)
+        RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """
+    )
+
+    for coluna, indice in INDICES.items():
+        if not index_exists(indice):
+            op.execute(
+                f"CREATE INDEX {indice} ON alimentos "
+                f"USING gin (immutable_unaccent(lower({coluna})) gin_trgm_ops)"
+            )
+
+
+def downgrade():
+    """Remove os índices trigram e o wrapper (as extensões permanecem)."""
+    for indice in INDICES.values():
+        op.drop_index(indice, table_name='alimentos')
+    op.execute("DROP FUNCTION IF EXISTS immutable_unaccent(text)")
@@ -0,0 +1,51 @@
+"""add tenants.versao_dados for ETag revalidation
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def column_exists(table_name, column_name):
+    """Verifica se uma coluna já existe na tabela."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns 
+                WHERE table_name = :table_name AND column_name = :column_name
+            )
+            """
+        ),
+        {"table_name": table_name, "column_name": column_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """Versão monotônica dos dados de estoque de cada restaurante.
+
+    Incrementada na mesma transação de toda escrita em alimentos,
+    movimentações e lotes; é a base dos ETags das listagens.
+    """
+    if not column_exists('tenants', 'versao_dados'):
+        op.add_column(
+            'tenants',
+            sa.Column('versao_dados', sa.BigInteger(), nullable=False, server_default=sa.text('0'))
+        )
+
+
+def downgrade():
+    """Remove a versão dos dados."""
+    op.drop_column('tenants', 'versao_dados')
@@ -0,0 +1,51 @@
+"""add (tenant_id, updated_at) index on alimentos for delta sync
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def index_exists(index_name):
+    """Verifica se um índice já existe no banco de dados."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = :index_name)"
+        ),
+        {"index_name": index_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """updated_at passa a ser sempre preenchido e indexado por tenant.
+
+    Produtos nunca editados tinham updated_at nulo; o delta sync
+    (/alimentos/changes) filtra só por updated_at.
+    """
+    op.execute("UPDATE alimentos SET updated_at = COALESCE(created_at, now()) WHERE updated_at IS NULL")
+    op.alter_column('alimentos', 'updated_at', server_default=sa.text('now()'))
+
+    if not index_exists('ix_alimentos_tenant_updated_at'):
+        op.create_index(
+            'ix_alimentos_tenant_updated_at',
+            'alimentos',
+            ['tenant_id', 'updated_at']
+        )
+
+
+def downgrade():
+    """Remove o índice e o default de updated_at."""
+    op.drop_index('ix_alimentos_tenant_updated_at', table_name='alimentos')
+    op.alter_column('alimentos', 'updated_at', server_default=None)
@@ -0,0 +1,61 @@
+"""add partial indexes excluding soft-deleted alimentos
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+
+def index_exists(index_name):
+    """Verifica se um índice já existe no banco de dados."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = :index_name)"
+        ),
+        {"index_name": index_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """Índices parciais para o soft delete de alimentos.
+
+    Produtos excluídos ficam na tabela (ativo = false) até a purga em
+    background; as leituras do catálogo filtram `ativo = true` e usam um
+    índice que não contém essas linhas. A purga encontra os excluídos pelo
+    índice de deleted_at, que só contém os tombstones.
+    """
+    if not index_exists('ix_alimentos_tenant_ativos'):
+        op.execute(
+            """
+            CREATE INDEX ix_alimentos_tenant_ativos
+            ON alimentos (tenant_id, id)
+            WHERE ativo = true
+            """
+        )
+
+    if not index_exists('ix_alimentos_excluidos'):
+        op.execute(
+            """
+            CREATE INDEX ix_alimentos_excluidos
+            ON alimentos (deleted_at)
+            WHERE deleted_at IS NOT NULL
+            """
+        )
+
+
+def downgrade():
+    """Remove os índices parciais do soft delete."""
+    op.drop_index('ix_alimentos_excluidos', table_name='alimentos')
+    op.drop_index('ix_alimentos_tenant_ativos', table_name='alimentos')
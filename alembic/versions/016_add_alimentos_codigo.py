@@ -0,0 +1,80 @@
+"""add alimentos.codigo and import lookup indexes
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '016'
+down_revision = '015'
+branch_labels = None
+depends_on = None
+
+
+def column_exists(table_name, column_name):
+    """Verifica se uma coluna já existe na tabela."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns 
+                WHERE table_name = :table_name AND column_name = :column_name
+            )
+            """
+        ),
+        {"table_name": table_name, "column_name": column_name}
+    )
+    return result.scalar()
+
+
+def index_exists(index_name):
+    """Verifica se um índice já existe no banco de dados."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = :index_name)"
+        ),
+        {"index_name": index_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """Código externo do produto e índices de casamento da importação.
+
+    A importação (POST /alimentos/import) identifica produtos existentes pelo
+    código externo ou, sem ele, pelo nome sem diferenciar maiúsculas.
+    """
+    if not column_exists('alimentos', 'codigo'):
+        op.add_column('alimentos', sa.Column('codigo', sa.String(length=64), nullable=True))
+
+    if not index_exists('ix_alimentos_tenant_codigo'):
+        op.execute(
+            """
+            CREATE INDEX ix_alimentos_tenant_codigo
+            ON alimentos (tenant_id, codigo)
+            WHERE ativo = true AND codigo IS NOT NULL
+            """
+        )
+
+    if not index_exists('ix_alimentos_tenant_nome_lower'):
+        op.execute(
+            """
+            CREATE INDEX ix_alimentos_tenant_nome_lower
+            ON alimentos (tenant_id, lower(nome))
+            WHERE ativo = true
+            """
+        )
+
+
+def downgrade():
+    """Remove o código externo e os índices da importação."""
+    op.drop_index('ix_alimentos_tenant_nome_lower', table_name='alimentos')
+    op.drop_index('ix_alimentos_tenant_codigo', table_name='alimentos')
+    op.drop_column('alimentos', 'codigo')
@@ -0,0 +1,106 @@
+"""print_jobs as asynchronous label print queue
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+
+def column_exists(table_name, column_name):
+    """Verifica se uma coluna já existe na tabela."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = :table_name AND column_name = :column_name
+            )
+            """
+        ),
+        {"table_name": table_name, "column_name": column_name}
+    )
+    return result.scalar()
+
+
+def index_exists(index_name):
+    """Verifica se um índice já existe no banco de dados."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = :index_name)"
+        ),
+        {"index_name": index_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """Colunas e índices da fila de impressão de etiquetas.
+
+    Um job agrupa as etiquetas de várias entradas (não mais um lote só).
+    Os workers reservam jobs com FOR UPDATE SKIP LOCKED pelo índice parcial
+    de jobs em aberto; a limpeza percorre o índice dos jobs finalizados.
+    """
+    op.alter_column('print_jobs', 'lote_id', existing_type=sa.Integer(), nullable=True)
+
+    if not column_exists('print_jobs', 'usuario_id'):
+        op.add_column('print_jobs', sa.Column('usuario_id', sa.Integer(), nullable=True))
+        op.create_foreign_key(
+            'fk_print_jobs_usuario_id', 'print_jobs', 'users',
+            ['usuario_id'], ['id'], ondelete='SET NULL'
+        )
+
+    if not column_exists('print_jobs', 'proxima_tentativa_em'):
+        op.add_column(
+            'print_jobs',
+            sa.Column('proxima_tentativa_em', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True)
+        )
+
+    if not column_exists('print_jobs', 'total_etiquetas'):
+        op.add_column('print_jobs', sa.Column('total_etiquetas', sa.Integer(), nullable=True))
+
+    if not column_exists('print_jobs', 'arquivo_chave'):
+        op.add_column('print_jobs', sa.Column('arquivo_chave', sa.String(length=64), nullable=True))
+
+    if not index_exists('ix_print_jobs_abertos'):
+        op.execute(
+            """
+            CREATE INDEX ix_print_jobs_abertos
+            ON print_jobs (proxima_tentativa_em, id)
+            WHERE status IN ('pending', 'printing')
+            """
+        )
+
+    if not index_exists('ix_print_jobs_finalizados'):
+        op.execute(
+            """
+            CREATE INDEX ix_print_jobs_finalizados
+            ON print_jobs (completed_at)
+            WHERE status IN ('completed', 'failed')
+            """
+        )
+
+
+def downgrade():
+    """Remove as colunas e índices da fila de impressão."""
+    op.drop_index('ix_print_jobs_finalizados', table_name='print_jobs')
+    op.drop_index('ix_print_jobs_abertos', table_name='print_jobs')
+    op.drop_column('print_jobs', 'arquivo_chave')
+    op.drop_column('print_jobs', 'total_etiquetas')
+    op.drop_column('print_jobs', 'proxima_tentativa_em')
+    op.drop_constraint('fk_print_jobs_usuario_id', 'print_jobs', type_='foreignkey')
+    op.drop_column('print_jobs', 'usuario_id')
+    # Jobs sem lote não cabem mais no esquema antigo
+    op.execute("DELETE FROM print_jobs WHERE lote_id IS NULL")
+    op.alter_column('print_jobs', 'lote_id', existing_type=sa.Integer(), nullable=False)
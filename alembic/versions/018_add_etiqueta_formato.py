@@ -0,0 +1,52 @@
+"""add label output format to tenants and print_jobs
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '018'
+down_revision = '017'
+branch_labels = None
+depends_on = None
+
+
+def column_exists(table_name, column_name):
+    """Verifica se uma coluna já existe na tabela."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = :table_name AND column_name = :column_name
+            )
+            """
+        ),
+        {"table_name": table_name, "column_name": column_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """Formato das etiquetas (pdf, zpl ou escpos).
+
+    No restaurante é o padrão (nulo mantém o PDF atual; `?formato=` na
+    requisição tem precedência); no job, o formato do arquivo gerado.
+    """
+    if not column_exists('tenants', 'etiqueta_formato'):
+        op.add_column('tenants', sa.Column('etiqueta_formato', sa.String(length=10), nullable=True))
+
+    if not column_exists('print_jobs', 'formato'):
+        op.add_column('print_jobs', sa.Column('formato', sa.String(length=10), nullable=True))
+
+
+def downgrade():
+    """Remove o formato das etiquetas."""
+    op.drop_column('print_jobs', 'formato')
+    op.drop_column('tenants', 'etiqueta_formato')
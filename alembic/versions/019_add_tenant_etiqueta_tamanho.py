@@ -0,0 +1,47 @@
+"""add tenants.etiqueta_tamanho
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '019'
+down_revision = '018'
+branch_labels = None
+depends_on = None
+
+
+def column_exists(table_name, column_name):
+    """Verifica se uma coluna já existe na tabela."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = :table_name AND column_name = :column_name
+            )
+            """
+        ),
+        {"table_name": table_name, "column_name": column_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """Tamanho das etiquetas do restaurante (80x60, 60x40 ou 50x30).
+
+    Nulo mantém a etiqueta atual de 80x60mm.
+    """
+    if not column_exists('tenants', 'etiqueta_tamanho'):
+        op.add_column('tenants', sa.Column('etiqueta_tamanho', sa.String(length=10), nullable=True))
+
+
+def downgrade():
+    """Remove o tamanho das etiquetas."""
+    op.drop_column('tenants', 'etiqueta_tamanho')
@@ -0,0 +1,52 @@
+"""add partial index for open entry lots (bulk label reprint)
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '020'
+down_revision = '019'
+branch_labels = None
+depends_on = None
+
+
+def index_exists(index_name):
+    """Verifica se um índice já existe no banco de dados."""
+    connection = op.get_bind()
+    result = connection.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = :index_name)"
+        ),
+        {"index_name": index_name}
+    )
+    return result.scalar()
+
+
+def upgrade():
+    """Índice parcial só com as entradas em aberto (com etiqueta e não usadas).
+
+    Serve GET /etiquetas/reimpressao por faixa de datas já na ordem de
+    impressão (created_at, id), sem ordenar; o predicado precisa ser idêntico
+    ao filtro do endpoint. Filtros por lote usam ix_movimentacoes_tenant_qrcode.
+    """
+    if not index_exists('ix_movimentacoes_entradas_abertas'):
+        op.execute(
+            """
+            CREATE INDEX ix_movimentacoes_entradas_abertas
+            ON movimentacoes_estoque (tenant_id, created_at, id)
+            WHERE tipo = 'entrada'
+              AND usado = false
+              AND qr_code_gerado IS NOT NULL
+            """
+        )
+
+
+def downgrade():
+    """Remove o índice parcial de entradas em aberto."""
+    op.drop_index('ix_movimentacoes_entradas_abertas', table_name='movimentacoes_estoque')
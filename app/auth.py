@@ -1,9 +1,10 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from app.config import settings
-from app.database import get_db
+from app.database import AsyncSessionLocal
 from app.models import User
 from app.schemas import TokenData
 
@@ -19,8 +20,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme)
 ) -> User:
     """Obtém usuário autenticado pelo token"""
     credentials_exception = HTTPException(
@@ -40,12 +40,18 @@ async def get_current_user(
     except HTTPException:
         raise credentials_exception
     
-    from sqlalchemy.orm import joinedload
-    
-    user = db.query(User).options(joinedload(User.tenants)).filter(
-        User.id == user_id, 
-        User.email == email
-    ).first()
+    # Sessão async própria e curta: roda em toda requisição autenticada sem
+    # bloquear o event loop, e a conexão volta ao pool antes do endpoint rodar
+    # (uma dependência com yield só seria fechada depois da resposta). Os
+    # tenants vêm carregados, pois o usuário é usado depois fora desta sessão.
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(User).options(selectinload(User.tenants)).where(
+                User.id == user_id,
+                User.email == email
+            )
+        )
+        user = result.scalar_one_or_none()
     
     if user is None or not user.ativo:
         raise credentials_exception
@@ -39,6 +39,20 @@ class Settings(BaseSettings):
     # ==================== REDIS ====================
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # ==================== MONITORAMENTO ====================
+    # Detector de travamentos do event loop (custo baixo, mas opcional)
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_THRESHOLD_MS: int = 100
+    
+    # ==================== ETIQUETAS ====================
+    # Cache dos PDFs de etiqueta: LRU em memória + armazenamento em disco
+    ETIQUETAS_CACHE_DIR: str = ""  # vazio = diretório temporário do sistema
+    ETIQUETAS_CACHE_MEMORIA_MB: int = 32
+    ETIQUETAS_CACHE_DISCO_MB: int = 512
+    # Processos dedicados à renderização (0 = renderiza na thread da requisição)
+    ETIQUETAS_PROCESSOS: int = 2
+    ETIQUETAS_FILA_MAX: int = 64
+    
     # ==================== DADOS ADICIONAIS ====================
     ENABLE_HTTPS_REDIRECT: bool = True
     HISTORY_RETENTION_DAYS: int = 90
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -22,6 +24,32 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _url_async(database_url: str) -> URL:
+    """Mesma DATABASE_URL com o driver asyncpg (sslmode vira o parâmetro ssl do asyncpg)"""
+    url = make_url(database_url).set(drivername="postgresql+asyncpg")
+    sslmode = url.query.get("sslmode")
+    if sslmode:
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    return url
+
+
+# Engine assíncrono (asyncpg) para endpoints `async def` de leitura: não bloqueia
+# o event loop. Pool menor, pois divide o limite de conexões do PG com o síncrono.
+async_engine = create_async_engine(
+    _url_async(settings.DATABASE_URL),
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    connect_args={
+        "timeout": 10,                                   # Timeout de conexão: 10s
+        "server_settings": {"statement_timeout": "30000"}  # Timeout de query: 30s
+    }
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -34,6 +62,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency para endpoints async - sessão do engine asyncpg"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def get_pool_status():
     """Retorna status do pool de conexões para monitoramento"""
     pool = engine.pool
@@ -44,3 +78,15 @@ def get_pool_status():
         "overflow": pool.overflow(),
         "max_overflow": engine.pool._max_overflow,
     }
+
+
+def get_async_pool_status():
+    """Status do pool do engine assíncrono"""
+    pool = async_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+    }
@@ -2,11 +2,11 @@ import asyncio
 import contextlib
 import logging
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
@@ -16,6 +16,13 @@ from app.config import settings
 from app.middleware import TenantMiddleware
 from app.rate_limit import limiter
 from app.services.history_cleanup import cleanup_history, RETENTION_DAYS
+from app.services.eventos import broker as eventos_broker
+from app.services.catalogo import metricas_catalogo
+from app.services.etiquetas import cache_etiquetas, pool_renderizacao
+from app.services.loop_monitor import monitor as loop_monitor, MonitorLoopMiddleware
+from app.services.alertas_validade import reconstruir_calendario
+from app.services.purga_alimentos import purgar_alimentos_excluidos, RETENCAO_DIAS as PURGA_RETENCAO_DIAS
+from app.services import fila_impressao
 
 # Configurar logging estruturado para produção
 logging.basicConfig(
@@ -28,10 +35,23 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 cleanup_logger = logging.getLogger("app.history_cleanup")
+alertas_logger = logging.getLogger("app.alertas_validade")
+purga_logger = logging.getLogger("app.purga_alimentos")
+impressao_logger = logging.getLogger("app.fila_impressao")
+
+# Horário (após a meia-noite) da reconstrução diária do calendário de validade
+ALERTAS_VALIDADE_HORA = 0
+ALERTAS_VALIDADE_MINUTO = 5
+
+# Intervalo entre execuções da purga de produtos excluídos
+PURGA_INTERVALO_SEGUNDOS = 6 * 60 * 60
+
+# Intervalo entre limpezas dos jobs de impressão finalizados
+LIMPEZA_IMPRESSAO_INTERVALO_SEGUNDOS = 60 * 60
 
 # Importar routers com error handling
 try:
-    from app.routers import auth, admin_clientes, admin_usuarios, tenant_alimentos, tenant_usuarios, admin_audit
+    from app.routers import auth, admin_clientes, admin_usuarios, tenant_alimentos, tenant_usuarios, admin_audit, tenant_export, tenant_import, tenant_analytics, tenant_eventos, tenant_impressao, admin_monitor
     print("✓ Routers importados com sucesso")
 except Exception as e:
     print(f"✗ Erro ao importar routers: {e}")
@@ -40,10 +60,17 @@ except Exception as e:
 app = FastAPI(
     title="Controle de Cozinha - Multi-Tenant",
     description="Sistema de controle de estoque para restaurantes (SaaS)",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 app.state.limiter = limiter
+
+# Monitor de travamentos do event loop: primeiro middleware = o mais interno,
+# na mesma task que executa dependencies e endpoints
+if settings.LOOP_MONITOR_ENABLED:
+    app.add_middleware(MonitorLoopMiddleware, monitor=loop_monitor)
+
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
 
@@ -116,6 +143,12 @@ app.include_router(admin_usuarios.router)
 app.include_router(tenant_alimentos.router)
 app.include_router(tenant_usuarios.router)
 app.include_router(admin_audit.router)
+app.include_router(tenant_export.router)
+app.include_router(tenant_import.router)
+app.include_router(tenant_analytics.router)
+app.include_router(tenant_eventos.router)
+app.include_router(tenant_impressao.router)
+app.include_router(admin_monitor.router)
 
 
 async def history_cleanup_worker():
@@ -168,11 +201,120 @@ async def history_cleanup_worker():
             await asyncio.sleep(sleep_time)
 
 
+def _segundos_ate_proxima_reconstrucao() -> float:
+    agora = datetime.now()
+    proxima = agora.replace(
+        hour=ALERTAS_VALIDADE_HORA, minute=ALERTAS_VALIDADE_MINUTO, second=0, microsecond=0
+    )
+    if proxima <= agora:
+        proxima += timedelta(days=1)
+    return (proxima - agora).total_seconds()
+
+
+async def alertas_validade_worker():
+    """Reconstrói o calendário de validade na inicialização e toda madrugada."""
+    alertas_logger.info("✅ Worker do calendário de validade iniciado")
+    
+    while True:
+        try:
+            # Fora do event loop: o job faz I/O síncrono no banco
+            total = await asyncio.to_thread(reconstruir_calendario)
+            if total < 0:
+                alertas_logger.info("Calendário de validade já em reconstrução por outro worker")
+            else:
+                alertas_logger.info("📅 Calendário de validade reconstruído: %s alertas", total)
+            
+        except asyncio.CancelledError:
+            alertas_logger.info("🛑 Worker do calendário de validade cancelado (shutdown)")
+            raise
+            
+        except Exception as e:
+            alertas_logger.error(
+                "❌ Erro ao reconstruir calendário de validade: %s", str(e), exc_info=True
+            )
+        
+        # Próxima execução logo após a meia-noite (as datas "virando" mudam o calendário)
+        await asyncio.sleep(_segundos_ate_proxima_reconstrucao())
+
+
+async def purga_alimentos_worker():
+    """Apaga fisicamente, em lotes, os produtos excluídos há mais que a retenção."""
+    purga_logger.info("✅ Worker de purga de produtos excluídos iniciado")
+    
+    while True:
+        try:
+            # Fora do event loop: o job faz I/O síncrono no banco
+            total = await asyncio.to_thread(purgar_alimentos_excluidos)
+            if total < 0:
+                purga_logger.info("Purga de produtos já em execução por outro worker")
+            elif total:
+                purga_logger.info(
+                    "🧹 Purga executada: %s produtos excluídos removidos (retenção: %s dias)",
+                    total, PURGA_RETENCAO_DIAS
+                )
+            
+        except asyncio.CancelledError:
+            purga_logger.info("🛑 Worker de purga cancelado (shutdown)")
+            raise
+            
+        except Exception as e:
+            purga_logger.error(
+                "❌ Erro na purga de produtos excluídos: %s", str(e), exc_info=True
+            )
+        
+        await asyncio.sleep(PURGA_INTERVALO_SEGUNDOS)
+
+
+async def fila_impressao_worker():
+    """Consome a fila de impressão: acorda a cada job novo (NOTIFY) ou no intervalo de polling."""
+    impressao_logger.info("✅ Worker da fila de impressão iniciado")
+    ultima_limpeza = None
+    
+    while True:
+        processados = 0
+        try:
+            # Limpa antes de consumir: o evento que chegar durante a rodada acorda a próxima
+            fila_impressao.novos_jobs.clear()
+            # Fora do event loop: reserva e finalização fazem I/O síncrono no banco
+            processados = await asyncio.to_thread(fila_impressao.processar_fila)
+            if processados:
+                impressao_logger.debug("🖨️ %s jobs de impressão processados", processados)
+            
+            agora = asyncio.get_running_loop().time()
+            if ultima_limpeza is None or agora - ultima_limpeza >= LIMPEZA_IMPRESSAO_INTERVALO_SEGUNDOS:
+                removidos = await asyncio.to_thread(fila_impressao.limpar_jobs_finalizados)
+                ultima_limpeza = agora
+                if removidos:
+                    impressao_logger.info(
+                        "🧹 %s jobs de impressão finalizados removidos (retenção: %s dias)",
+                        removidos, fila_impressao.RETENCAO_JOBS_DIAS
+                    )
+            
+        except asyncio.CancelledError:
+            impressao_logger.info("🛑 Worker da fila de impressão cancelado (shutdown)")
+            raise
+            
+        except Exception as e:
+            impressao_logger.error(
+                "❌ Erro no worker da fila de impressão: %s", str(e), exc_info=True
+            )
+        
+        # Lote cheio: pode haver mais jobs vencidos, segue sem esperar
+        if processados >= fila_impressao.JOBS_POR_LOTE:
+            continue
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(fila_impressao.novos_jobs.wait(), timeout=fila_impressao.POLL_SEGUNDOS)
+
+
 @app.on_event("startup")
 async def startup_event():
     """Inicializa tasks e recursos na inicialização"""
     logger.info("🚀 Iniciando aplicação...")
     
+    # Inicia antes de tudo para medir também os bloqueios da inicialização
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.iniciar()
+    
     # Verifica conexão com banco de dados
     from app.database import SessionLocal
     try:
@@ -186,6 +328,21 @@ async def startup_event():
     
     # Inicia worker de limpeza de histórico
     app.state.history_cleanup_task = asyncio.create_task(history_cleanup_worker())
+    
+    # Inicia worker do calendário de validade (/lotes/vencendo)
+    app.state.alertas_validade_task = asyncio.create_task(alertas_validade_worker())
+    
+    # Inicia worker de purga dos produtos excluídos (soft delete)
+    app.state.purga_alimentos_task = asyncio.create_task(purga_alimentos_worker())
+    
+    # Inicia pool de processos da renderização de etiquetas
+    pool_renderizacao.iniciar()
+    
+    # Inicia worker da fila de impressão (usa o pool de renderização)
+    app.state.fila_impressao_task = asyncio.create_task(fila_impressao_worker())
+    
+    # Inicia listener de eventos (LISTEN/NOTIFY -> SSE), um por worker
+    eventos_broker.iniciar()
     app.state.startup_time = datetime.utcnow()
     
     logger.info("✅ Aplicação inicializada com sucesso")
@@ -205,10 +362,41 @@ async def shutdown_event():
             await task
         logger.info("✅ Worker de limpeza finalizado")
     
+    # Cancela task do calendário de validade
+    task = getattr(app.state, "alertas_validade_task", None)
+    if task:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    
+    # Cancela task de purga
+    task = getattr(app.state, "purga_alimentos_task", None)
+    if task:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    
+    # Cancela worker da fila de impressão (antes do pool de renderização que ele usa)
+    task = getattr(app.state, "fila_impressao_task", None)
+    if task:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    
+    # Para listener de eventos
+    await eventos_broker.parar()
+    
+    # Para monitor do event loop
+    await loop_monitor.parar()
+    
+    # Finaliza pool de renderização de etiquetas (fora do event loop: aguarda os processos)
+    await asyncio.to_thread(pool_renderizacao.parar)
+    
     # Fecha pool de conexões
-    from app.database import engine
+    from app.database import engine, async_engine
     logger.info("🔌 Fechando pool de conexões do banco...")
     engine.dispose()
+    await async_engine.dispose()
     
     logger.info("✅ Shutdown completo")
 
@@ -225,7 +413,7 @@ def root():
 @app.get("/health")
 async def health_check():
     """Health check detalhado para monitoramento e load balancers"""
-    from app.database import SessionLocal, get_pool_status
+    from app.database import async_engine, get_pool_status, get_async_pool_status
     
     health_status = {
         "status": "healthy",
@@ -234,11 +422,10 @@ async def health_check():
         "checks": {}
     }
     
-    # Verifica banco de dados
+    # Verifica banco de dados (engine async: o health check não bloqueia o event loop)
     try:
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         health_status["checks"]["database"] = "ok"
     except Exception as e:
         health_status["status"] = "unhealthy"
@@ -254,6 +441,15 @@ async def health_check():
     except Exception as e:
         health_status["checks"]["connection_pool"] = f"error: {str(e)}"
     
+    try:
+        pool_status = get_async_pool_status()
+        health_status["checks"]["async_connection_pool"] = {
+            "status": "ok" if pool_status["checked_out"] < pool_status["size"] + pool_status["max_overflow"] else "warning",
+            **pool_status
+        }
+    except Exception as e:
+        health_status["checks"]["async_connection_pool"] = f"error: {str(e)}"
+    
     # Verifica worker de limpeza
     task = getattr(app.state, "history_cleanup_task", None)
     if task:
@@ -261,6 +457,49 @@ async def health_check():
     else:
         health_status["checks"]["cleanup_worker"] = "not_started"
     
+    # Verifica worker do calendário de validade
+    task = getattr(app.state, "alertas_validade_task", None)
+    if task:
+        health_status["checks"]["expiry_calendar_worker"] = "ok" if not task.done() else "stopped"
+    else:
+        health_status["checks"]["expiry_calendar_worker"] = "not_started"
+    
+    # Verifica worker de purga de produtos excluídos
+    task = getattr(app.state, "purga_alimentos_task", None)
+    if task:
+        health_status["checks"]["purge_worker"] = "ok" if not task.done() else "stopped"
+    else:
+        health_status["checks"]["purge_worker"] = "not_started"
+    
+    # Verifica worker da fila de impressão
+    task = getattr(app.state, "fila_impressao_task", None)
+    if task:
+        health_status["checks"]["print_queue_worker"] = "ok" if not task.done() else "stopped"
+    else:
+        health_status["checks"]["print_queue_worker"] = "not_started"
+    
+    # Verifica listener de eventos (SSE)
+    health_status["checks"]["event_listener"] = {
+        "status": "ok" if eventos_broker.ativo else "stopped",
+        "subscribers": eventos_broker.total_assinaturas,
+    }
+    
+    # Cache do catálogo de produtos
+    health_status["checks"]["catalog_cache"] = metricas_catalogo()
+    
+    # Cache das etiquetas em PDF
+    health_status["checks"]["label_cache"] = cache_etiquetas.metricas()
+    health_status["checks"]["label_render_pool"] = pool_renderizacao.metricas()
+    
+    # Monitor do event loop (opcional)
+    if settings.LOOP_MONITOR_ENABLED:
+        relatorio_loop = loop_monitor.relatorio(top=0)
+        health_status["checks"]["event_loop"] = {
+            "status": "ok" if loop_monitor.ativo else "stopped",
+            "lag_max_ms": relatorio_loop["lag_max_ms"],
+            "stalls": relatorio_loop["travamentos"],
+        }
+    
     # Uptime
     startup_time = getattr(app.state, "startup_time", None)
     if startup_time:
@@ -1,12 +1,12 @@
 from fastapi import Request, HTTPException, status
 from jose import JWTError, jwt
 from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 import logging
 import re
 
 from app.config import settings
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal
 from app.models import Tenant
 
 logger = logging.getLogger(__name__)
@@ -38,16 +38,17 @@ class TenantMiddleware(BaseHTTPMiddleware):
                 request.state.tenant_slug = tenant_slug
                 return await call_next(request)
             
-            # Busca o tenant no banco
-            db = SessionLocal()
+            # Busca o tenant no banco (sessão async: o middleware roda no event loop)
             try:
-                tenant = db.query(Tenant).filter(
-                    Tenant.slug == tenant_slug,
-                    Tenant.ativo == True
-                ).first()
+                async with AsyncSessionLocal() as db:
+                    tenant_id = (await db.execute(
+                        select(Tenant.id).where(
+                            Tenant.slug == tenant_slug,
+                            Tenant.ativo == True
+                        )
+                    )).scalar_one_or_none()
                 
-                if tenant:
-                    tenant_id = tenant.id
+                if tenant_id:
                     logger.debug(f"✅ Tenant identificado: {tenant_slug} (ID: {tenant_id})")
                 else:
                     # Subdomínio não encontrado ou inativo
@@ -65,8 +66,6 @@ class TenantMiddleware(BaseHTTPMiddleware):
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Erro ao processar requisição"
                 )
-            finally:
-                db.close()
         
         # Adiciona tenant_id e tenant_slug ao estado do request
         request.state.tenant_id = tenant_id
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Boolean, Text, Float, Enum, Table
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Date, ForeignKey, Boolean, Text, Float, Enum, Table, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -84,7 +84,14 @@ class Tenant(Base):
     responsavel_email = Column(String(255))
     responsavel_cargo = Column(String(100))
     
+    # Formato padrão das etiquetas: pdf, zpl ou escpos (vazio = pdf)
+    etiqueta_formato = Column(String(10))
+    # Tamanho das etiquetas em mm: 80x60, 60x40 ou 50x30 (vazio = 80x60)
+    etiqueta_tamanho = Column(String(10))
+    
     ativo = Column(Boolean, default=True)
+    # Incrementada a cada escrita em alimentos/movimentações/lotes (ETag das listagens)
+    versao_dados = Column(BigInteger, nullable=False, server_default=text("0"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -122,6 +129,7 @@ class Alimento(Base):
     id = Column(Integer, primary_key=True, index=True)
     tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, index=True)
     nome = Column(String(255), nullable=False)
+    codigo = Column(String(64))  # Código externo (ERP/fornecedor), chave da importação
     categoria = Column(String(100))
     subcategoria = Column(String(120))
     tipo_conservacao = Column(String(20))  # congelado, resfriado
@@ -136,7 +144,7 @@ class Alimento(Base):
     ativo = Column(Boolean, default=True)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     updated_by = Column(Integer, ForeignKey("users.id"), nullable=True)
 
@@ -234,23 +242,65 @@ class MovimentacaoEstoque(Base):
     usuario = relationship("User", back_populates="movimentacoes")
 
 
+class ConsumoDiario(Base):
+    """Rollup diário de movimentações por produto (mantido a cada movimentação)
+
+    Sobrevive à limpeza de histórico de 90 dias das movimentações.
+    Ajustes são gravados como delta (quantidade_nova - quantidade_anterior).
+    """
+    __tablename__ = "consumo_diario"
+
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True)
+    alimento_id = Column(Integer, ForeignKey("alimentos.id", ondelete="CASCADE"), primary_key=True)
+    dia = Column(Date, primary_key=True)
+    entradas = Column(Float, nullable=False, default=0, server_default=text("0"))
+    saidas = Column(Float, nullable=False, default=0, server_default=text("0"))
+    ajustes = Column(Float, nullable=False, default=0, server_default=text("0"))
+
+
+class AlertaValidade(Base):
+    """Calendário de vencimento: lotes/entradas em aberto com saldo e validade
+
+    Reconstruído toda madrugada por tenant e atualizado a cada movimentação,
+    para que /lotes/vencendo seja só uma leitura por faixa de datas.
+    """
+    __tablename__ = "alertas_validade"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
+    alimento_id = Column(Integer, ForeignKey("alimentos.id", ondelete="CASCADE"), nullable=False)
+    origem = Column(String(20), nullable=False)  # 'lote' (produto_lotes) ou 'movimentacao' (entrada)
+    origem_id = Column(Integer, nullable=False)
+    lote_numero = Column(String(50))
+    unidade_medida = Column(String(20))  # Só para lotes; entradas usam a do alimento
+    data_validade = Column(Date, nullable=False)
+    quantidade_disponivel = Column(Float, nullable=False)
+    atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class PrintJob(Base):
-    """Modelo de Trabalho de Impressão"""
+    """Modelo de Trabalho de Impressão (fila assíncrona de etiquetas)"""
     __tablename__ = "print_jobs"
 
     id = Column(Integer, primary_key=True, index=True)
     tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, index=True)
-    lote_id = Column(Integer, ForeignKey("produto_lotes.id", ondelete="CASCADE"), nullable=False)
+    lote_id = Column(Integer, ForeignKey("produto_lotes.id", ondelete="CASCADE"))
+    usuario_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
     
     # Status
-    status = Column(Enum(StatusPrintJob), default=StatusPrintJob.PENDING, index=True)
+    status = Column(Enum(StatusPrintJob, values_callable=lambda x: [e.value for e in x]), default=StatusPrintJob.PENDING, index=True)
     
     # Tentativas
     tentativas = Column(Integer, default=0)
     erro_mensagem = Column(Text)
+    # Próxima tentativa (pending) ou fim da reserva do worker (printing)
+    proxima_tentativa_em = Column(DateTime(timezone=True), server_default=func.now())
     
     # Dados da etiqueta (JSON cache)
     etiqueta_data = Column(Text)  # JSON com todos os dados para impressão
+    total_etiquetas = Column(Integer, default=1)
+    formato = Column(String(10), default="pdf")  # pdf, zpl ou escpos
+    arquivo_chave = Column(String(64))  # Chave do arquivo pronto no cache de etiquetas
     
     # Auditoria
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
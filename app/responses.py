@@ -0,0 +1,58 @@
+"""Respostas JSON rápidas (orjson) para listagens grandes."""
+from __future__ import annotations
+import zlib
+from typing import Iterable, Optional, Type
+
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+# O navegador guarda a resposta, mas sempre revalida com If-None-Match
+CACHE_CONTROL_REVALIDAR = "private, no-cache"
+
+
+def colunas_do_schema(model, schema: Type[BaseModel]) -> tuple:
+    """Retorna as colunas do model ORM que correspondem aos campos do schema.
+
+    Usado para projetar apenas o que a resposta precisa, mantendo a query
+    sincronizada com o schema documentado no OpenAPI.
+    """
+    return tuple(getattr(model, campo) for campo in schema.model_fields)
+
+
+def resposta_lista(linhas: Iterable, status_code: int = 200, etag: Optional[str] = None) -> ORJSONResponse:
+    """Serializa linhas já montadas pelo endpoint direto com orjson.
+
+    Aceita dicts ou Rows do SQLAlchemy. Datetimes, dates e enums são tratados
+    nativamente pelo orjson. Como a resposta é retornada pronta, o FastAPI não
+    revalida o conteúdo contra o `response_model` — usar apenas em endpoints
+    internos cujas linhas já têm o formato do schema.
+    """
+    conteudo = [linha if isinstance(linha, dict) else linha._asdict() for linha in linhas]
+    resposta = ORJSONResponse(content=conteudo, status_code=status_code)
+    if etag:
+        resposta.headers["ETag"] = etag
+        resposta.headers["Cache-Control"] = CACHE_CONTROL_REVALIDAR
+    return resposta
+
+
+def etag_fraco(request: Request, *partes) -> str:
+    """ETag fraco a partir da versão dos dados, distinto por query string."""
+    consulta = zlib.crc32(request.url.query.encode())
+    return 'W/"' + "-".join(str(parte) for parte in partes) + f'-{consulta:x}"'
+
+
+def nao_modificado(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """Resposta 304 se o If-None-Match do cliente já contém o ETag (comparação fraca)."""
+    cabecalho = request.headers.get("if-none-match")
+    if not etag or not cabecalho:
+        return None
+    opaco = etag.removeprefix("W/")
+    for tag in cabecalho.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == opaco:
+            return Response(
+                status_code=304,
+                headers={"ETag": etag, "Cache-Control": CACHE_CONTROL_REVALIDAR}
+            )
+    return None
@@ -6,6 +6,12 @@ from . import (
 	tenant_alimentos,
 	tenant_usuarios,
 	admin_audit,
+	tenant_export,
+	tenant_import,
+	tenant_analytics,
+	tenant_eventos,
+	tenant_impressao,
+	admin_monitor,
 )
 
 __all__ = [
@@ -15,4 +21,10 @@ __all__ = [
 	"tenant_alimentos",
 	"tenant_usuarios",
 	"admin_audit",
+	"tenant_export",
+	"tenant_import",
+	"tenant_analytics",
+	"tenant_eventos",
+	"tenant_impressao",
+	"admin_monitor",
 ]
@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from app.database import get_db
 from app.models import AuditLog
 from app.auth import get_current_admin
+from app.responses import colunas_do_schema, resposta_lista
 
 router = APIRouter(prefix="/api/admin", tags=["Admin - Auditoria"])
 
@@ -37,7 +38,7 @@ def get_audit_logs(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Lista logs de auditoria (apenas admin SaaS)"""
-    query = db.query(AuditLog)
+    query = db.query(*colunas_do_schema(AuditLog, AuditLogResponse))
     
     if user_id:
         query = query.filter(AuditLog.user_id == user_id)
@@ -49,4 +50,4 @@ def get_audit_logs(
         query = query.filter(AuditLog.resource == resource)
     
     logs = query.order_by(desc(AuditLog.timestamp)).offset(skip).limit(limit).all()
-    return logs
\ No newline at end of file
+    return resposta_lista(logs)
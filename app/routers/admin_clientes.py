@@ -10,6 +10,7 @@ from app.models import Cliente, Tenant
 from pydantic import BaseModel, EmailStr
 from app.auth import get_current_admin
 from app.rate_limit import limiter
+from app.services.etiquetas import FORMATOS, TAMANHOS
 
 router = APIRouter(prefix="/api/admin", tags=["Admin - Clientes/Restaurantes"])
 
@@ -60,6 +61,10 @@ class RestauranteCreate(BaseModel):
     responsavel_telefone: Optional[str] = None
     responsavel_email: Optional[str] = None
     responsavel_cargo: Optional[str] = None
+    
+    # Formato padrão das etiquetas (pdf, zpl ou escpos) e tamanho (80x60, 60x40 ou 50x30)
+    etiqueta_formato: Optional[str] = None
+    etiqueta_tamanho: Optional[str] = None
 
 
 class RestauranteResponse(BaseModel):
@@ -86,6 +91,10 @@ class RestauranteResponse(BaseModel):
     responsavel_email: Optional[str] = None
     responsavel_cargo: Optional[str] = None
     
+    # Formato padrão das etiquetas (pdf, zpl ou escpos) e tamanho (80x60, 60x40 ou 50x30)
+    etiqueta_formato: Optional[str] = None
+    etiqueta_tamanho: Optional[str] = None
+    
     ativo: bool
 
     class Config:
@@ -214,6 +223,19 @@ def toggle_status_cliente(
 
 # ==================== RESTAURANTES ====================
 
+def _validar_etiqueta(dados: "RestauranteCreate") -> None:
+    if dados.etiqueta_formato is not None and dados.etiqueta_formato not in FORMATOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato de etiqueta inválido. Use: {', '.join(FORMATOS)}"
+        )
+    if dados.etiqueta_tamanho is not None and dados.etiqueta_tamanho not in TAMANHOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tamanho de etiqueta inválido. Use: {', '.join(TAMANHOS)}"
+        )
+
+
 @router.post("/restaurantes", response_model=RestauranteResponse)
 def criar_restaurante(
     restaurante: RestauranteCreate,
@@ -248,6 +270,8 @@ def criar_restaurante(
                 detail="Email já cadastrado"
             )
     
+    _validar_etiqueta(restaurante)
+    
     novo_restaurante = Tenant(**restaurante.dict())
     db.add(novo_restaurante)
     db.commit()
@@ -320,9 +344,17 @@ def atualizar_restaurante(
             detail="Restaurante não encontrado"
         )
     
+    _validar_etiqueta(dados)
+    
     # Não permitir mudança de cliente
     dados_dict = dados.dict()
     dados_dict.pop("cliente_id", None)
+    # Configuração de etiqueta omitida (telas antigas) mantém a atual;
+    # null explícito volta ao padrão
+    enviados = dados.dict(exclude_unset=True)
+    for campo in ("etiqueta_formato", "etiqueta_tamanho"):
+        if campo not in enviados:
+            dados_dict.pop(campo, None)
     
     for key, value in dados_dict.items():
         setattr(restaurante, key, value)
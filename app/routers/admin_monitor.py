@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.auth import get_current_admin
+from app.services.loop_monitor import monitor
+
+router = APIRouter(prefix="/api/admin", tags=["Admin - Monitoramento"])
+
+
+@router.get("/monitor/event-loop")
+async def relatorio_event_loop(
+    top: int = Query(20, ge=1, le=100),
+    current_admin: dict = Depends(get_current_admin)
+):
+    """
+    Lag do event loop e os maiores causadores de bloqueio (apenas admin SaaS)
+
+    - **histograma**: amostras de lag por faixa
+    - **culpados**: rota + função da aplicação que bloqueou o loop, ordenados
+      pelo tempo total bloqueado, com a pilha capturada durante o bloqueio
+    """
+    if not monitor.ativo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Monitor do event loop desativado (LOOP_MONITOR_ENABLED)"
+        )
+    return monitor.relatorio(top=top)
+
+
+@router.delete("/monitor/event-loop", status_code=status.HTTP_204_NO_CONTENT)
+async def reiniciar_event_loop(current_admin: dict = Depends(get_current_admin)):
+    """Zera as métricas do monitor (ex.: após um deploy com correções)"""
+    monitor.reiniciar()
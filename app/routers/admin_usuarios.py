@@ -11,6 +11,7 @@ from app.database import get_db
 from app.models import Cliente, User, RoleType, user_tenants_association
 from app.security import get_password_hash
 from app.auth import get_current_admin
+from app.services.versao_dados import incrementar_versoes, incrementar_versoes_cliente
 from pydantic import BaseModel, EmailStr
 
 router = APIRouter(prefix="/api/admin", tags=["Admin - Usuários"])
@@ -264,6 +265,14 @@ def atualizar_usuario(
     elif 'senha' in dados:
         dados.pop('senha')
     
+    # O nome aparece em /movimentacoes: invalida os ETags dos restaurantes
+    if 'nome' in dados and dados['nome'] != usuario.nome:
+        if usuario.cliente_id:
+            incrementar_versoes_cliente(db, usuario.cliente_id)
+        else:
+            # Admin do SaaS: só os restaurantes vinculados
+            incrementar_versoes(db, [t.id for t in usuario.tenants])
+    
     # Atualizar campos básicos
     for campo, valor in dados.items():
         if hasattr(usuario, campo):
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import logging
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models import User, Tenant
 from app.schemas import LoginRequest, Token, ConsentRequest
 from app.security import verify_password, create_access_token, get_current_user
@@ -162,48 +163,36 @@ def login(request: Request, credentials: LoginRequest, db: Session = Depends(get
 @router.get("/me")
 async def get_current_user_info(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Retorna informações do usuário logado com seus restaurantes e roles"""
     from app.models import user_tenants_association
     from sqlalchemy import select
     
-    # Busca o usuário novamente para garantir que temos os relacionamentos carregados
-    user = db.query(User).filter(User.id == current_user.id).first()
-    
-    if not user:
-        logger.error(f"Usuário {current_user.id} não encontrado em /me")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Usuário não encontrado"
-        )
-    
-    # Monta lista de restaurantes com roles (incluindo bloqueados)
-    restaurantes = []
-    for tenant in user.tenants:
-        # Busca o role na tabela de associação
-        stmt = select(user_tenants_association).where(
-            user_tenants_association.c.user_id == user.id,
-            user_tenants_association.c.tenant_id == tenant.id
-        )
-        result = db.execute(stmt).first()
-        
-        restaurantes.append({
-            "id": tenant.id,
-            "nome": tenant.nome,
-            "slug": tenant.slug,
-            "ativo": tenant.ativo,
-            "role": result.role if result else None
-        })
+    # Restaurantes com roles (incluindo bloqueados) em uma única consulta
+    result = await db.execute(
+        select(
+            Tenant.id,
+            Tenant.nome,
+            Tenant.slug,
+            Tenant.ativo,
+            user_tenants_association.c.role
+        ).join(
+            user_tenants_association, user_tenants_association.c.tenant_id == Tenant.id
+        ).where(
+            user_tenants_association.c.user_id == current_user.id
+        ).order_by(Tenant.id)
+    )
+    restaurantes = [dict(row._mapping) for row in result]
     
     return {
-        "id": user.id,
-        "nome": user.nome,
-        "email": user.email,
-        "cliente_id": user.cliente_id,
+        "id": current_user.id,
+        "nome": current_user.nome,
+        "email": current_user.email,
+        "cliente_id": current_user.cliente_id,
         "restaurantes": restaurantes,
-        "is_admin": user.is_admin,
-        "lgpd_consent": user.lgpd_consent,
+        "is_admin": current_user.is_admin,
+        "lgpd_consent": current_user.lgpd_consent,
     }
 
 
@@ -221,7 +210,8 @@ def registrar_consentimento(
     if current_user.lgpd_consent:
         return {"message": "Consentimento já registrado."}
 
-    current_user.lgpd_consent = True
+    # current_user vem da sessão async da autenticação: atualiza pela sessão desta rota
+    db.query(User).filter(User.id == current_user.id).update({"lgpd_consent": True})
     registrar_auditoria(
         db,
         user_id=current_user.id,
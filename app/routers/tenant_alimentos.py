@@ -1,24 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import Response
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, select
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Boolean, Date, Float, Integer, String, case, cast, column, desc, func, literal, or_, select, update, values
 from typing import List, Optional
-from datetime import datetime, timedelta
+import enum
+import itertools
+from datetime import date, datetime, timedelta, timezone
 import logging
 
-from app.database import get_db
-from app.models import Alimento, User, MovimentacaoEstoque, TipoMovimentacao, user_tenants_association, RoleType, ProdutoLote, Tenant
-from app.schemas import AlimentoCreate, AlimentoUpdate, AlimentoResponse
+from app.database import SessionLocal, get_db, get_async_db
+from app.models import Alimento, User, MovimentacaoEstoque, TipoMovimentacao, user_tenants_association, RoleType, ProdutoLote, Tenant, AlertaValidade
+from app.schemas import AlimentoCreate, AlimentoUpdate, AlimentoResponse, AlimentoAtualizacaoLote
 from app.auth import get_current_user
 from app.middleware import get_tenant_id
 from app.services.audit import registrar_auditoria
+from app.services.consumo import registrar_consumo
+from app.services.previsao import invalidar_previsao
+from app.services.eventos import notificar_estoque, notificar_validade
+from app.services import alertas_validade
+from app.services.catalogo import ALIMENTO_COLUNAS, invalidar_catalogo, obter_catalogo
+from app.services.versao_dados import incrementar_versao, registrar_versao, versao_atual
+from app.services.purga_alimentos import RETENCAO_DIAS
 from app.rate_limit import limiter
+from app.responses import CACHE_CONTROL_REVALIDAR, etag_fraco, nao_modificado, resposta_lista
+from app.services.etiquetas import (
+    ERROS_TEMPORARIOS_RENDERIZACAO,
+    ETIQUETAS_POR_BLOCO,
+    FORMATO_PADRAO,
+    FORMATOS,
+    TAMANHO_PADRAO,
+    DadosEtiqueta,
+    etag_etiquetas,
+    gerar_etiquetas,
+    obter_etiquetas,
+)
 from pydantic import BaseModel
-import qrcode
-import io
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import mm
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +65,38 @@ def verificar_admin_restaurante(tenant_id: int, user: User, db: Session):
     return True
 
 
+# Reabertura da janela do delta sync (transações confirmadas após o cursor)
+DELTA_SYNC_MARGEM = timedelta(seconds=60)
+
+# Itens aceitos por chamada do PATCH em massa de alimentos
+MAX_ATUALIZACOES_LOTE = 1000
+# Campos alteráveis pelo PATCH em massa e o tipo de cada um na lista VALUES
+CAMPOS_ATUALIZACAO_LOTE = {
+    "preco_unitario": Float,
+    "quantidade_minima": Float,
+    "fornecedor": String,
+}
+
+
+# ==================== BUSCA ====================
+class ModoBusca(str, enum.Enum):
+    CONTEM = "contem"
+    RELEVANCIA = "relevancia"
+
+
+def _normalizado(coluna):
+    """Mesma expressão dos índices GIN trigram (migração 012)"""
+    return func.immutable_unaccent(func.lower(coluna))
+
+
+def _termo_busca(search: str, escapar_like: bool = False):
+    """Termo normalizado no banco (opcionalmente com os curingas do LIKE escapados)"""
+    termo = search.strip()
+    if escapar_like:
+        termo = termo.replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return _normalizado(literal(termo, String))
+
+
 # ==================== SCHEMAS ====================
 class MovimentacaoCreate(BaseModel):
     alimento_id: int
@@ -73,11 +122,63 @@ class MovimentacaoResponse(BaseModel):
     usuario_nome: Optional[str]
     observacao: Optional[str] = None
     data_hora: datetime
+    qr_code_gerado: Optional[str] = None
+    data_producao: Optional[str] = None
+    data_validade: Optional[str] = None
+    usado: Optional[bool] = None
+    unidade_medida: Optional[str] = None
 
     class Config:
         orm_mode = True
 
 
+class EtiquetasRequest(BaseModel):
+    movimentacao_ids: List[int]  # Ordem das páginas no PDF
+
+
+# Colunas usadas nas listagens de movimentações. Selecionar apenas as colunas
+# (em vez da entidade inteira) evita hidratar objetos ORM e o lazy load de
+# `mov.alimento` para cada linha: a página inteira sai em uma única query.
+MOVIMENTACAO_COLUNAS = (
+    MovimentacaoEstoque.id,
+    MovimentacaoEstoque.alimento_id,
+    Alimento.nome.label('alimento_nome'),
+    MovimentacaoEstoque.tipo,
+    MovimentacaoEstoque.quantidade,
+    MovimentacaoEstoque.quantidade_anterior,
+    MovimentacaoEstoque.quantidade_nova,
+    User.nome.label('usuario_nome'),
+    MovimentacaoEstoque.motivo,
+    MovimentacaoEstoque.created_at,
+    MovimentacaoEstoque.qr_code_gerado,
+    MovimentacaoEstoque.data_producao,
+    MovimentacaoEstoque.data_validade,
+    MovimentacaoEstoque.usado,
+    Alimento.unidade_medida,
+)
+
+
+def formatar_movimentacao(row) -> dict:
+    """Converte uma linha de MOVIMENTACAO_COLUNAS no dict de resposta"""
+    return {
+        "id": row.id,
+        "alimento_id": row.alimento_id,
+        "alimento_nome": row.alimento_nome,
+        "tipo": row.tipo.value if hasattr(row.tipo, 'value') else row.tipo,
+        "quantidade": row.quantidade,
+        "quantidade_anterior": row.quantidade_anterior,
+        "quantidade_nova": row.quantidade_nova,
+        "usuario_nome": row.usuario_nome,
+        "observacao": row.motivo,
+        "data_hora": row.created_at,
+        "qr_code_gerado": row.qr_code_gerado,
+        "data_producao": row.data_producao.isoformat() if row.data_producao else None,
+        "data_validade": row.data_validade.isoformat() if row.data_validade else None,
+        "usado": row.usado,
+        "unidade_medida": row.unidade_medida,
+    }
+
+
 @router.post("/{tenant_id}/alimentos", response_model=AlimentoResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("100/minute")
 def create_alimento(
@@ -117,7 +218,11 @@ def create_alimento(
         details=f"Alimento '{new_alimento.nome}' criado",
         request=request,
     )
+    notificar_estoque(db, tenant_id, new_alimento)
+    versao = incrementar_versao(db, tenant_id)
     db.commit()
+    invalidar_catalogo(tenant_id)
+    registrar_versao(tenant_id, versao)
     db.refresh(new_alimento)
     
     return new_alimento
@@ -126,14 +231,24 @@ def create_alimento(
 @router.get("/{tenant_id}/alimentos", response_model=List[AlimentoResponse])
 def list_alimentos(
     tenant_id: int,
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     categoria: Optional[str] = None,
     search: Optional[str] = None,
+    modo_busca: ModoBusca = ModoBusca.CONTEM,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Lista todos os alimentos do restaurante"""
+    """
+    Lista todos os alimentos do restaurante
+    
+    - **search**: busca no nome, sem diferenciar maiúsculas e acentos
+    - **modo_busca**: `contem` (padrão) ou `relevancia` — busca também em
+      categoria e fornecedor, tolera erros de digitação e ordena por
+      similaridade, com quem começa pelo termo primeiro (use com `limit`
+      pequeno para autocompletar)
+    """
     # Verifica se o usuário tem acesso ao tenant
     user_tenants = [t.id for t in current_user.tenants]
     if tenant_id not in user_tenants:
@@ -142,7 +257,21 @@ def list_alimentos(
             detail="Acesso negado"
         )
     
-    query = db.query(Alimento).filter(
+    # Dados inalterados desde a última leitura do cliente: 304 sem consultar nada
+    versao = versao_atual(tenant_id)
+    etag = etag_fraco(request, "alimentos", versao) if versao is not None else None
+    resposta = nao_modificado(request, etag)
+    if resposta:
+        return resposta
+    
+    # Sem busca textual: servido do snapshot em memória do catálogo do tenant
+    if not search:
+        linhas = obter_catalogo(db, tenant_id).linhas
+        if categoria:
+            linhas = [linha for linha in linhas if linha.categoria == categoria]
+        return resposta_lista(linhas[skip:skip + limit], etag=etag)
+    
+    query = db.query(*ALIMENTO_COLUNAS).filter(
         Alimento.tenant_id == tenant_id,
         Alimento.ativo == True
     )
@@ -151,10 +280,117 @@ def list_alimentos(
         query = query.filter(Alimento.categoria == categoria)
 
     if search:
-        query = query.filter(Alimento.nome.ilike(f"%{search}%"))
+        padrao = _termo_busca(search, escapar_like=True)
+        contem = literal("%") + padrao + literal("%")
+        nome = _normalizado(Alimento.nome)
+        if modo_busca == ModoBusca.RELEVANCIA:
+            query = query.filter(or_(
+                nome.like(contem, escape="/"),
+                # Similaridade por palavra: tolera erros de digitação
+                _termo_busca(search).op("<%")(nome),
+                _normalizado(Alimento.categoria).like(contem, escape="/"),
+                _normalizado(Alimento.fornecedor).like(contem, escape="/")
+            )).order_by(
+                case(
+                    (nome.like(padrao + literal("%"), escape="/"), 0),
+                    (nome.like(contem, escape="/"), 1),
+                    else_=2
+                ),
+                func.word_similarity(_termo_busca(search), nome).desc(),
+                Alimento.nome
+            )
+        else:
+            query = query.filter(nome.like(contem, escape="/"))
     
     alimentos = query.offset(skip).limit(limit).all()
-    return alimentos
+    return resposta_lista(alimentos, etag=etag)
+
+
+@router.get("/{tenant_id}/alimentos/estoque-baixo")
+def list_alimentos_estoque_baixo(
+    tenant_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Lista apenas os produtos com estoque abaixo do mínimo, maior falta primeiro"""
+    # Verifica se o usuário tem acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+    
+    # Filtro idêntico ao predicado do índice parcial ix_alimentos_estoque_baixo
+    falta = (Alimento.quantidade_minima - Alimento.quantidade_estoque)
+    alimentos = db.query(*ALIMENTO_COLUNAS, falta.label('falta')).filter(
+        Alimento.tenant_id == tenant_id,
+        Alimento.ativo == True,
+        Alimento.quantidade_minima > 0,
+        Alimento.quantidade_estoque <= Alimento.quantidade_minima
+    ).order_by(falta.desc()).all()
+    
+    return resposta_lista(alimentos)
+
+
+@router.get("/{tenant_id}/alimentos/changes")
+def list_alimentos_changes(
+    tenant_id: int,
+    since: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delta sync do catálogo: produtos alterados desde o cursor
+    
+    - **since**: `cursor` devolvido pela chamada anterior; sem ele, retorna o
+      catálogo completo (`completo: true`)
+    - **alterados**: produtos criados ou alterados (formato de AlimentoResponse)
+    - **removidos**: ids de produtos excluídos ou desativados (tombstones);
+      um `since` anterior à retenção dos tombstones devolve o catálogo completo
+    
+    A janela é reaberta em DELTA_SYNC_MARGEM para cobrir transações que
+    confirmaram depois do cursor: o cliente deve aplicar as linhas de forma
+    idempotente (upsert por id).
+    """
+    # Verifica se o usuário tem acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+    
+    cursor = db.execute(select(func.now())).scalar()
+    
+    # Tombstones mais antigos que a retenção já foram purgados: cursor tão
+    # antigo exige resincronizar o catálogo completo
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if since is not None and since < cursor - timedelta(days=RETENCAO_DIAS):
+        since = None
+    
+    stmt = select(*ALIMENTO_COLUNAS).where(Alimento.tenant_id == tenant_id)
+    if since is None:
+        stmt = stmt.where(Alimento.ativo == True)
+    else:
+        # Servido pelo índice ix_alimentos_tenant_updated_at
+        stmt = stmt.where(Alimento.updated_at > since - DELTA_SYNC_MARGEM)
+    
+    alterados = []
+    removidos = []
+    for row in db.execute(stmt.order_by(Alimento.updated_at, Alimento.id)):
+        if row.ativo:
+            alterados.append(row._asdict())
+        else:
+            removidos.append(row.id)
+    
+    return ORJSONResponse(content={
+        "cursor": cursor.isoformat(),
+        "completo": since is None,
+        "alterados": alterados,
+        "removidos": removidos,
+    })
 
 
 @router.get("/{tenant_id}/alimentos/{alimento_id}", response_model=AlimentoResponse)
@@ -173,11 +409,7 @@ def get_alimento(
             detail="Acesso negado"
         )
     
-    alimento = db.query(Alimento).filter(
-        Alimento.id == alimento_id,
-        Alimento.tenant_id == tenant_id,
-        Alimento.ativo == True
-    ).first()
+    alimento = obter_catalogo(db, tenant_id).por_id.get(alimento_id)
     
     if not alimento:
         raise HTTPException(
@@ -237,12 +469,122 @@ def update_alimento(
         details=f"Alimento '{alimento.nome}' atualizado: {update_data or 'sem alterações explícitas'}",
         request=request,
     )
+    notificar_estoque(db, tenant_id, alimento)
+    versao = incrementar_versao(db, tenant_id)
     db.commit()
+    invalidar_catalogo(tenant_id)
+    registrar_versao(tenant_id, versao)
     db.refresh(alimento)
+    invalidar_previsao(tenant_id)
     
     return alimento
 
 
+@router.patch("/{tenant_id}/alimentos")
+def update_alimentos_lote(
+    tenant_id: int,
+    itens: List[AlimentoAtualizacaoLote],
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Atualiza preço, estoque mínimo e fornecedor de vários alimentos (apenas admins)
+    
+    Recebe uma lista de `{id, preco_unitario?, quantidade_minima?, fornecedor?}`;
+    em cada item só os campos enviados são alterados. Tudo é aplicado num único
+    `UPDATE ... FROM (VALUES ...)`: se algum id não existir, nada é gravado.
+    """
+    # Verifica se o usuário tem acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+    
+    # Verifica se é admin do restaurante
+    verificar_admin_restaurante(tenant_id, current_user, db)
+    
+    if len(itens) > MAX_ATUALIZACOES_LOTE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo de {MAX_ATUALIZACOES_LOTE} alimentos por requisição"
+        )
+    
+    alteracoes = {}
+    for item in itens:
+        if item.id in alteracoes:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Alimento {item.id} repetido na lista"
+            )
+        alteracoes[item.id] = item.dict(exclude_unset=True, exclude={"id"})
+    alteracoes = {alimento_id: campos for alimento_id, campos in alteracoes.items() if campos}
+    if not alteracoes:
+        return {"atualizados": 0}
+    
+    # Uma linha por alimento: valor e flag "campo enviado" de cada campo
+    colunas = [column("id", Integer)]
+    for campo, tipo in CAMPOS_ATUALIZACAO_LOTE.items():
+        colunas += [column(campo, tipo), column(f"define_{campo}", Boolean)]
+    dados = values(*colunas, name="dados").data([
+        (alimento_id, *(
+            valor
+            for campo in CAMPOS_ATUALIZACAO_LOTE
+            for valor in (campos.get(campo), campo in campos)
+        ))
+        for alimento_id, campos in alteracoes.items()
+    ])
+    
+    novos_valores = {
+        # cast: uma coluna só com NULL na lista VALUES chega ao banco como text
+        campo: case(
+            (dados.c[f"define_{campo}"], cast(dados.c[campo], tipo)),
+            else_=getattr(Alimento, campo)
+        )
+        for campo, tipo in CAMPOS_ATUALIZACAO_LOTE.items()
+    }
+    atualizados = db.execute(
+        update(Alimento).where(
+            Alimento.id == dados.c.id,
+            Alimento.tenant_id == tenant_id,
+            Alimento.ativo == True
+        ).values(
+            **novos_valores,
+            updated_by=current_user.id,
+            updated_at=func.now()
+        ).returning(Alimento.id)
+    ).scalars().all()
+    
+    nao_encontrados = sorted(set(alteracoes) - set(atualizados))
+    if nao_encontrados:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Alimentos não encontrados: {nao_encontrados}"
+        )
+    
+    registrar_auditoria(
+        db,
+        user_id=current_user.id,
+        tenant_id=tenant_id,
+        action="UPDATE",
+        resource="alimentos",
+        details=f"Atualização em massa de {len(atualizados)} alimentos: {alteracoes}",
+        request=request,
+    )
+    # Escrita em massa: um único evento de versão (como na importação) em vez de
+    # um NOTIFY de estoque por linha, cada um invalidando o catálogo dos workers
+    versao = incrementar_versao(db, tenant_id)
+    db.commit()
+    invalidar_catalogo(tenant_id)
+    registrar_versao(tenant_id, versao)
+    invalidar_previsao(tenant_id)
+    
+    return {"atualizados": len(atualizados)}
+
+
 @router.delete("/{tenant_id}/alimentos/{alimento_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_alimento(
     tenant_id: int,
@@ -275,20 +617,11 @@ def delete_alimento(
             detail="Alimento não encontrado"
         )
     
-    # Deleta todas as movimentações relacionadas
-    db.query(MovimentacaoEstoque).filter(
-        MovimentacaoEstoque.alimento_id == alimento_id,
-        MovimentacaoEstoque.tenant_id == tenant_id
-    ).delete(synchronize_session=False)
-    
-    # Deleta todos os lotes relacionados
-    db.query(ProdutoLote).filter(
-        ProdutoLote.alimento_id == alimento_id,
-        ProdutoLote.tenant_id == tenant_id
-    ).delete(synchronize_session=False)
-    
-    # Deleta o produto
-    db.delete(alimento)
+    # Soft delete: a linha fica como tombstone para o delta sync (/alimentos/changes)
+    # e movimentações/lotes são apagados pela purga em background após a retenção
+    alimento.ativo = False
+    alimento.deleted_at = func.now()
+    alertas_validade.remover_alimento(db, tenant_id, alimento_id)
 
     registrar_auditoria(
         db,
@@ -300,10 +633,14 @@ def delete_alimento(
         details=f"Alimento '{alimento.nome}' desativado (soft delete)",
         request=request,
     )
+    notificar_estoque(db, tenant_id, alimento, removido=True)
+    versao = incrementar_versao(db, tenant_id)
     db.commit()
+    invalidar_catalogo(tenant_id)
+    registrar_versao(tenant_id, versao)
     
     return {
-        "message": "Alimento desativado. Histórico permanecerá disponível por 90 dias."
+        "message": f"Alimento desativado. Histórico permanecerá disponível por {RETENCAO_DIAS} dias."
     }
 
 
@@ -331,10 +668,11 @@ def criar_movimentacao(
     if dados.tipo in ['entrada', 'ajuste']:
         verificar_admin_restaurante(tenant_id, current_user, db)
     
-    # Busca o alimento
+    # Busca o alimento (produtos excluídos não recebem movimentações)
     alimento = db.query(Alimento).filter(
         Alimento.id == dados.alimento_id,
-        Alimento.tenant_id == tenant_id
+        Alimento.tenant_id == tenant_id,
+        Alimento.ativo == True
     ).first()
     
     if not alimento:
@@ -395,7 +733,32 @@ def criar_movimentacao(
             alimento.quantidade_estoque = quantidade_nova
             quantidade_anterior = quantidade_nova
             db.add(movimentacao)
+            db.flush()
+            alertas_validade.registrar_entrada(db, movimentacao)
+            # Um commit por pacote: o rollup soma só o que foi gravado
+            registrar_consumo(
+                db,
+                tenant_id=tenant_id,
+                alimento_id=dados.alimento_id,
+                tipo=TipoMovimentacao.ENTRADA,
+                quantidade=dados.unidades_por_embalagem,
+            )
+            if i == dados.qtd_pacotes - 1:
+                # Um evento por entrada (não por pacote), junto do último commit
+                notificar_estoque(db, tenant_id, alimento)
+                notificar_validade(
+                    db,
+                    tenant_id,
+                    alimento,
+                    lote_numero=f"{dados.qtd_pacotes} pacotes",
+                    quantidade=quantidade_total,
+                    data_validade=data_validade,
+                )
+            versao = incrementar_versao(db, tenant_id)
             db.commit()
+            invalidar_catalogo(tenant_id)
+            invalidar_previsao(tenant_id)
+            registrar_versao(tenant_id, versao)
             db.refresh(movimentacao)
             results.append({
                 "movimentacao_id": movimentacao.id,
@@ -475,6 +838,27 @@ def criar_movimentacao(
     )
     alimento.quantidade_estoque = quantidade_nova
     db.add(movimentacao)
+    if tipo_enum == TipoMovimentacao.ENTRADA:
+        db.flush()
+        alertas_validade.registrar_entrada(db, movimentacao)
+    
+    registrar_consumo(
+        db,
+        tenant_id=tenant_id,
+        alimento_id=dados.alimento_id,
+        tipo=tipo_enum,
+        quantidade=quantidade_nova - quantidade_anterior if tipo_enum == TipoMovimentacao.AJUSTE else dados.quantidade,
+    )
+    notificar_estoque(db, tenant_id, alimento)
+    if tipo_enum == TipoMovimentacao.ENTRADA:
+        notificar_validade(
+            db,
+            tenant_id,
+            alimento,
+            lote_numero=lote_numero,
+            quantidade=dados.quantidade,
+            data_validade=data_validade,
+        )
     
     # Se o estoque foi zerado, limpa todos os registros de movimentações e lotes
     if quantidade_nova == 0:
@@ -491,8 +875,14 @@ def criar_movimentacao(
             ProdutoLote.tenant_id == tenant_id,
             ProdutoLote.alimento_id == dados.alimento_id
         ).delete(synchronize_session=False)
+        
+        alertas_validade.remover_alimento(db, tenant_id, dados.alimento_id)
     
+    versao = incrementar_versao(db, tenant_id)
     db.commit()
+    invalidar_catalogo(tenant_id)
+    invalidar_previsao(tenant_id)
+    registrar_versao(tenant_id, versao)
     db.refresh(movimentacao)
     return {
         "message": "Movimentação registrada com sucesso",
@@ -504,6 +894,7 @@ def criar_movimentacao(
 @router.get("/{tenant_id}/movimentacoes", response_model=List[MovimentacaoResponse])
 def listar_movimentacoes(
     tenant_id: int,
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     tipo: Optional[str] = None,
@@ -521,11 +912,13 @@ def listar_movimentacoes(
             detail="Acesso negado"
         )
     
-    query = db.query(
-        MovimentacaoEstoque,
-        Alimento.nome.label('alimento_nome'),
-        User.nome.label('usuario_nome')
-    ).join(
+    versao = versao_atual(tenant_id)
+    etag = etag_fraco(request, "movimentacoes", versao) if versao is not None else None
+    resposta = nao_modificado(request, etag)
+    if resposta:
+        return resposta
+    
+    query = db.query(*MOVIMENTACAO_COLUNAS).join(
         Alimento, MovimentacaoEstoque.alimento_id == Alimento.id
     ).join(
         User, MovimentacaoEstoque.usuario_id == User.id
@@ -551,28 +944,8 @@ def listar_movimentacoes(
     
     resultados = query.offset(skip).limit(limit).all()
     
-    # Formata resposta
-    movimentacoes = []
-    for mov, alimento_nome, usuario_nome in resultados:
-        movimentacoes.append({
-            "id": mov.id,
-            "alimento_id": mov.alimento_id,
-            "alimento_nome": alimento_nome,
-            "tipo": mov.tipo.value,
-            "quantidade": mov.quantidade,
-            "quantidade_anterior": mov.quantidade_anterior,
-            "quantidade_nova": mov.quantidade_nova,
-            "usuario_nome": usuario_nome,
-            "observacao": mov.motivo,
-            "data_hora": mov.created_at,
-            "qr_code_gerado": mov.qr_code_gerado,
-            "data_producao": mov.data_producao.isoformat() if mov.data_producao else None,
-            "data_validade": mov.data_validade.isoformat() if mov.data_validade else None,
-            "usado": mov.usado,
-            "unidade_medida": mov.alimento.unidade_medida if mov.alimento else None
-        })
-    
-    return movimentacoes
+    # Formata resposta direto das tuplas (sem instanciar objetos ORM)
+    return resposta_lista((formatar_movimentacao(row) for row in resultados), etag=etag)
 
 
 @router.get("/{tenant_id}/movimentacoes/historico", response_model=List[MovimentacaoResponse])
@@ -594,11 +967,7 @@ def historico_movimentacoes(
     dias = max(1, min(dias, 90))
     cutoff = datetime.utcnow() - timedelta(days=dias)
 
-    query = db.query(
-        MovimentacaoEstoque,
-        Alimento.nome.label('alimento_nome'),
-        User.nome.label('usuario_nome')
-    ).outerjoin(
+    query = db.query(*MOVIMENTACAO_COLUNAS).outerjoin(
         Alimento, MovimentacaoEstoque.alimento_id == Alimento.id
     ).join(
         User, MovimentacaoEstoque.usuario_id == User.id
@@ -617,39 +986,177 @@ def historico_movimentacoes(
 
     resultados = query.all()
 
-    historico = []
-    for mov, alimento_nome, usuario_nome in resultados:
-        historico.append({
-            "id": mov.id,
-            "alimento_id": mov.alimento_id,
-            "alimento_nome": alimento_nome,
-            "tipo": mov.tipo.value if hasattr(mov.tipo, 'value') else mov.tipo,
-            "quantidade": mov.quantidade,
-            "quantidade_anterior": mov.quantidade_anterior,
-            "quantidade_nova": mov.quantidade_nova,
-            "usuario_nome": usuario_nome,
-            "observacao": mov.motivo,
-            "data_hora": mov.created_at,
-            "qr_code_gerado": mov.qr_code_gerado,
-            "data_producao": mov.data_producao.isoformat() if mov.data_producao else None,
-            "data_validade": mov.data_validade.isoformat() if mov.data_validade else None,
-            "usado": mov.usado,
-            "unidade_medida": mov.alimento.unidade_medida if mov.alimento else None
-        })
-
-    return historico
+    return resposta_lista(formatar_movimentacao(row) for row in resultados)
 
 
 # ==================== ETIQUETAS E QR CODE ====================
+# Etiquetas aceitas por PDF no POST /etiquetas
+MAX_ETIQUETAS_POR_PDF = 200
+# Números de lote aceitos em GET /etiquetas/reimpressao
+MAX_LOTES_REIMPRESSAO = 500
+
+# Tudo o que a etiqueta imprime: movimentação, produto e restaurante numa consulta só
+ETIQUETA_COLUNAS = (
+    MovimentacaoEstoque.id,
+    MovimentacaoEstoque.qr_code_gerado,
+    MovimentacaoEstoque.qr_code_usado,
+    MovimentacaoEstoque.quantidade,
+    MovimentacaoEstoque.data_producao,
+    MovimentacaoEstoque.data_validade,
+    MovimentacaoEstoque.etiqueta_impressa,
+    Alimento.nome.label("produto_nome"),
+    Alimento.categoria,
+    Alimento.unidade_medida,
+    Tenant.nome.label("restaurante_nome"),
+    Tenant.cnpj,
+    Tenant.responsavel_nome,
+    Tenant.etiqueta_formato,
+    Tenant.etiqueta_tamanho,
+)
+
+
+def _consultar_etiquetas(db: Session, tenant_id: int, movimentacao_ids: List[int]) -> dict:
+    """Entradas do tenant com os dados da etiqueta, por id da movimentação."""
+    linhas = db.execute(
+        select(*ETIQUETA_COLUNAS).join(
+            Alimento, MovimentacaoEstoque.alimento_id == Alimento.id
+        ).join(
+            Tenant, MovimentacaoEstoque.tenant_id == Tenant.id
+        ).where(
+            MovimentacaoEstoque.id.in_(movimentacao_ids),
+            MovimentacaoEstoque.tenant_id == tenant_id,
+            MovimentacaoEstoque.tipo == TipoMovimentacao.ENTRADA,
+            Alimento.ativo == True
+        )
+    ).all()
+    return {linha.id: linha for linha in linhas}
+
+
+def consultar_etiquetas_lote(db: Session, tenant_id: int, movimentacao_ids: List[int], maximo: int):
+    """Valida uma lista de entradas para impressão em lote.
+
+    Retorna os ids sem repetição (na ordem pedida) e as linhas de
+    ETIQUETA_COLUNAS correspondentes; levanta HTTPException se algum id não
+    for uma entrada do tenant com QR code.
+    """
+    movimentacao_ids = list(dict.fromkeys(movimentacao_ids))
+    if not movimentacao_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe ao menos uma movimentação"
+        )
+    if len(movimentacao_ids) > maximo:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo de {maximo} etiquetas por requisição"
+        )
+    
+    movimentacoes = _consultar_etiquetas(db, tenant_id, movimentacao_ids)
+    
+    nao_encontradas = [i for i in movimentacao_ids if i not in movimentacoes]
+    if nao_encontradas:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Movimentações não encontradas ou que não são entradas: {nao_encontradas}"
+        )
+    
+    sem_qrcode = [i for i in movimentacao_ids if not movimentacoes[i].qr_code_gerado]
+    if sem_qrcode:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Movimentações sem QR code gerado: {sem_qrcode}"
+        )
+    
+    return movimentacao_ids, [movimentacoes[i] for i in movimentacao_ids]
+
+
+def dados_etiqueta(linha, quantidade: Optional[float] = None) -> DadosEtiqueta:
+    return DadosEtiqueta(
+        restaurante_nome=linha.restaurante_nome,
+        cnpj=linha.cnpj,
+        responsavel_nome=linha.responsavel_nome,
+        produto_nome=linha.produto_nome,
+        categoria=linha.categoria,
+        unidade_medida=linha.unidade_medida,
+        lote_numero=linha.qr_code_usado,
+        quantidade=quantidade if quantidade is not None else linha.quantidade,
+        data_producao=linha.data_producao,
+        data_validade=linha.data_validade,
+        qr_code=linha.qr_code_gerado,
+        tamanho=linha.etiqueta_tamanho or TAMANHO_PADRAO,
+    )
+
+
+def _marcar_impressas(db: Session, tenant_id: int, linhas) -> None:
+    """Marca as etiquetas como impressas num único UPDATE (reimpressões não escrevem)."""
+    pendentes = [linha.id for linha in linhas if not linha.etiqueta_impressa]
+    if not pendentes:
+        return
+    db.execute(
+        update(MovimentacaoEstoque).where(
+            MovimentacaoEstoque.id.in_(pendentes)
+        ).values(etiqueta_impressa=True)
+    )
+    versao = incrementar_versao(db, tenant_id)
+    db.commit()
+    registrar_versao(tenant_id, versao)
+
+
+def formato_etiqueta(formato: Optional[str], linha=None) -> str:
+    """Formato pedido na requisição, senão o padrão do restaurante, senão PDF."""
+    formato = formato or (linha.etiqueta_formato if linha is not None else None) or FORMATO_PADRAO
+    if formato not in FORMATOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato de etiqueta inválido. Use: {', '.join(FORMATOS)}"
+        )
+    return formato
+
+
+def resposta_etiquetas(request: Request, etiquetas: List[DadosEtiqueta], nome: str, formato: str = FORMATO_PADRAO) -> Response:
+    etag = etag_etiquetas(etiquetas, formato)
+    resposta = nao_modificado(request, etag)
+    if resposta:
+        return resposta
+    tipo = FORMATOS[formato]
+    try:
+        conteudo = obter_etiquetas(etiquetas, formato)
+    except ERROS_TEMPORARIOS_RENDERIZACAO:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Muitas etiquetas sendo geradas agora, tente novamente em instantes",
+            headers={"Retry-After": "2"}
+        )
+    return Response(
+        content=conteudo,
+        media_type=tipo.media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={nome}.{tipo.extensao}",
+            "ETag": etag,
+            "Cache-Control": CACHE_CONTROL_REVALIDAR,
+        }
+    )
+
+
 @router.get("/{tenant_id}/movimentacoes/{movimentacao_id}/etiqueta")
 def gerar_etiqueta_pdf(
     tenant_id: int,
     movimentacao_id: int,
+    request: Request,
     qtd: int = None,
+    formato: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Gera PDF com etiqueta e QR code para impressão"""
+    """
+    Gera PDF com etiqueta e QR code para impressão
+    
+    O PDF vem do cache de etiquetas quando os dados impressos não mudaram
+    (reimpressão), com ETag forte: `If-None-Match` devolve 304.
+    
+    - **formato**: `pdf`, `zpl` ou `escpos` (comandos nativos da impressora
+      térmica); sem ele vale o padrão do restaurante
+    """
     # Verifica acesso ao tenant
     user_tenants = [t.id for t in current_user.tenants]
     if tenant_id not in user_tenants:
@@ -658,12 +1165,7 @@ def gerar_etiqueta_pdf(
             detail="Acesso negado"
         )
     
-    # Busca a movimentação
-    movimentacao = db.query(MovimentacaoEstoque).join(Alimento).filter(
-        MovimentacaoEstoque.id == movimentacao_id,
-        MovimentacaoEstoque.tenant_id == tenant_id,
-        MovimentacaoEstoque.tipo == 'entrada'
-    ).first()
+    movimentacao = _consultar_etiquetas(db, tenant_id, [movimentacao_id]).get(movimentacao_id)
     
     if not movimentacao:
         raise HTTPException(
@@ -677,109 +1179,152 @@ def gerar_etiqueta_pdf(
             detail="Movimentação não possui QR code gerado"
         )
     
-    alimento = movimentacao.alimento
+    formato = formato_etiqueta(formato, movimentacao)
+    dados = dados_etiqueta(movimentacao, float(qtd) if qtd is not None else None)
+    _marcar_impressas(db, tenant_id, [movimentacao])
+    
+    return resposta_etiquetas(request, [dados], f"etiqueta_{movimentacao_id}", formato)
+
+
+@router.post("/{tenant_id}/etiquetas")
+def gerar_etiquetas_pdf(
+    tenant_id: int,
+    dados: EtiquetasRequest,
+    request: Request,
+    formato: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Gera um único PDF com as etiquetas de várias entradas (uma por página)
     
-    # Busca informações do restaurante
-    tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
-    if not tenant:
+    Usado na entrada por embalagens: uma requisição imprime todos os pacotes,
+    na ordem de `movimentacao_ids`. `formato` como em GET /etiqueta.
+    """
+    # Verifica acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Restaurante não encontrado"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
         )
     
-    # Gera QR code
-    qr = qrcode.QRCode(version=1, box_size=10, border=2)
-    qr.add_data(movimentacao.qr_code_gerado)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Cria PDF otimizado para impressora térmica (apenas preto e branco)
-    pdf_buffer = io.BytesIO()
-    c = canvas.Canvas(pdf_buffer, pagesize=(80*mm, 60*mm))  # Etiqueta 80x60mm
-    
-    # Desenha QR code
-    c.drawInlineImage(qr_img, 5*mm, 25*mm, width=25*mm, height=25*mm)
-    
-    # Adiciona texto - APENAS PRETO (impressora térmica)
-    c.setFillColorRGB(0, 0, 0)
-    
-    # Nome do restaurante no topo
-    c.setFont("Helvetica-Bold", 8)
-    c.drawString(35*mm, 55*mm, (tenant.nome or "Restaurante")[:30])
-    
-    # CNPJ do restaurante
-    if tenant.cnpj:
-        c.setFont("Helvetica", 6)
-        c.drawString(35*mm, 51*mm, f"CNPJ: {tenant.cnpj}")
-    
-    # Nome do produto (fonte maior e bold)
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(35*mm, 46*mm, alimento.nome[:25])
+    movimentacao_ids, linhas = consultar_etiquetas_lote(db, tenant_id, dados.movimentacao_ids, MAX_ETIQUETAS_POR_PDF)
+    formato = formato_etiqueta(formato, linhas[0])
+    etiquetas = [dados_etiqueta(linha) for linha in linhas]
+    _marcar_impressas(db, tenant_id, linhas)
     
-    # Lote manual (letra + 6 dígitos)
-    c.setFont("Helvetica-Bold", 9)
-    lote_numero = movimentacao.qr_code_usado or "N/A"
-    c.drawString(35*mm, 40*mm, f"Lote: {lote_numero}")
-    
-    # Quantidade - formatação inteligente
-    c.setFont("Helvetica", 8)
-    quantidade_etiqueta = movimentacao.quantidade
-    if qtd is not None:
-        try:
-            quantidade_etiqueta = float(qtd)
-        except Exception:
-            pass
-    
-    # Formatar quantidade: inteiro para unidades, decimal para peso/volume
-    unidade = (alimento.unidade_medida or 'un').lower()
-    unidades_peso = ['kg', 'g', 'l', 'ml', 'litro', 'litros', 'kilo', 'kilos', 'grama', 'gramas']
-    
-    if any(u in unidade for u in unidades_peso):
-        # Para pesos/volumes: 2 decimais
-        qtd_formatada = f"{quantidade_etiqueta:.2f}"
-    else:
-        # Para unidades: inteiro ou 1 decimal
-        if quantidade_etiqueta == int(quantidade_etiqueta):
-            qtd_formatada = f"{int(quantidade_etiqueta)}"
-        else:
-            qtd_formatada = f"{quantidade_etiqueta:.1f}"
-    
-    c.drawString(35*mm, 36*mm, f"Qtd: {qtd_formatada} {alimento.unidade_medida or 'un'}")
-    
-    # Data de produção
-    if movimentacao.data_producao:
-        c.drawString(35*mm, 32*mm, f"Prod: {movimentacao.data_producao.strftime('%d/%m/%Y')}")
-    
-    # Data de validade (destaque com *** mas ainda preto)
-    if movimentacao.data_validade:
-        c.setFont("Helvetica-Bold", 8)
-        c.drawString(35*mm, 28*mm, f"*** VAL: {movimentacao.data_validade.strftime('%d/%m/%Y')} ***")
-    
-    # Responsável (se houver)
-    if tenant.responsavel_nome:
-        c.setFont("Helvetica", 6)
-        c.drawString(5*mm, 18*mm, f"Resp: {tenant.responsavel_nome[:30]}")
+    return resposta_etiquetas(request, etiquetas, f"etiquetas_{movimentacao_ids[0]}_{len(etiquetas)}", formato)
+
+
+def _linhas_reimpressao(stmt):
+    """Linhas com cursor no servidor, numa sessão própria.
+
+    A sessão do `get_db` é fechada antes do corpo da resposta ser enviado,
+    por isso o gerador abre (e fecha) a sua.
+    """
+    db = SessionLocal()
+    try:
+        for linha in db.execute(stmt.execution_options(yield_per=ETIQUETAS_POR_BLOCO)):
+            yield linha
+    finally:
+        db.close()
+
+
+@router.get("/{tenant_id}/etiquetas/reimpressao")
+@limiter.limit("10/minute")
+def reimprimir_etiquetas(
+    tenant_id: int,
+    request: Request,
+    de: Optional[date] = None,
+    ate: Optional[date] = None,
+    alimento_id: Optional[int] = None,
+    lotes: Optional[str] = None,
+    formato: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Reimprime de uma vez as etiquetas das entradas em aberto (não usadas)
     
-    # Rodapé - categoria se houver
-    c.setFont("Helvetica", 6)
-    if alimento.categoria:
-        c.drawString(5*mm, 13*mm, f"Cat: {alimento.categoria}")
+    Depois de um atolamento na impressora ou da troca de freezer, em vez de
+    uma etiqueta por vez em GET /movimentacoes/{id}/etiqueta.
     
-    # UUID simplificado no rodapé (para debug)
-    c.setFont("Courier", 5)
-    c.drawString(5*mm, 2*mm, movimentacao.qr_code_gerado[:36])
+    - **de** / **ate**: datas de entrada (inclusive)
+    - **alimento_id**: só as entradas deste produto
+    - **lotes**: números de lote separados por vírgula
+    - **formato**: como em GET /etiqueta
     
-    c.save()
+    O arquivo é gerado e enviado em partes, na ordem de entrada: a memória
+    não cresce com o número de etiquetas. Reimpressão: não altera
+    `etiqueta_impressa`.
+    """
+    # Verifica acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
     
-    # Marca como impressa
-    movimentacao.etiqueta_impressa = True
-    db.commit()
+    numeros_lote = list(dict.fromkeys(l.strip() for l in (lotes or "").split(",") if l.strip()))
+    if not (de or ate or alimento_id or numeros_lote):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe a faixa de datas, o produto ou os lotes"
+        )
+    if len(numeros_lote) > MAX_LOTES_REIMPRESSAO:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo de {MAX_LOTES_REIMPRESSAO} lotes por reimpressão"
+        )
+    if de and ate and ate < de:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Data final anterior à data inicial"
+        )
+    if formato:
+        formato_etiqueta(formato)
     
-    pdf_buffer.seek(0)
-    return Response(
-        content=pdf_buffer.getvalue(),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=etiqueta_{movimentacao_id}.pdf"}
+    # Uma consulta: o predicado de entrada em aberto é o do índice parcial
+    # ix_movimentacoes_entradas_abertas, que já entrega a ordem (created_at, id)
+    stmt = select(*ETIQUETA_COLUNAS).join(
+        Alimento, MovimentacaoEstoque.alimento_id == Alimento.id
+    ).join(
+        Tenant, MovimentacaoEstoque.tenant_id == Tenant.id
+    ).where(
+        MovimentacaoEstoque.tenant_id == tenant_id,
+        MovimentacaoEstoque.tipo == TipoMovimentacao.ENTRADA,
+        MovimentacaoEstoque.usado == False,
+        MovimentacaoEstoque.qr_code_gerado != None,
+        Alimento.ativo == True
+    ).order_by(MovimentacaoEstoque.created_at, MovimentacaoEstoque.id)
+    if de:
+        stmt = stmt.where(MovimentacaoEstoque.created_at >= datetime.combine(de, datetime.min.time()))
+    if ate:
+        stmt = stmt.where(MovimentacaoEstoque.created_at < datetime.combine(ate + timedelta(days=1), datetime.min.time()))
+    if alimento_id:
+        stmt = stmt.where(MovimentacaoEstoque.alimento_id == alimento_id)
+    if numeros_lote:
+        stmt = stmt.where(MovimentacaoEstoque.qr_code_usado.in_(numeros_lote))
+    
+    # A primeira linha decide o 404 e o formato padrão do restaurante
+    linhas = _linhas_reimpressao(stmt)
+    primeira = next(linhas, None)
+    if primeira is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Nenhuma entrada em aberto com etiqueta para os filtros informados"
+        )
+    formato = formato_etiqueta(formato, primeira)
+    tipo = FORMATOS[formato]
+    
+    etiquetas = (dados_etiqueta(linha) for linha in itertools.chain([primeira], linhas))
+    filename = f"reimpressao_{tenant_id}_{datetime.now().strftime('%Y%m%d_%H%M')}.{tipo.extensao}"
+    return StreamingResponse(
+        gerar_etiquetas(etiquetas, formato),
+        media_type=tipo.media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
@@ -808,7 +1353,8 @@ def validar_qrcode(
     movimentacao = db.query(MovimentacaoEstoque).join(Alimento).filter(
         MovimentacaoEstoque.qr_code_gerado == qr_code,
         MovimentacaoEstoque.tenant_id == tenant_id,
-        MovimentacaoEstoque.tipo == 'entrada'
+        MovimentacaoEstoque.tipo == 'entrada',
+        Alimento.ativo == True
     ).first()
     
     if not movimentacao:
@@ -921,7 +1467,8 @@ def usar_qrcode(
     movimentacao_entrada = db.query(MovimentacaoEstoque).join(Alimento).filter(
         MovimentacaoEstoque.qr_code_gerado == qr_code,
         MovimentacaoEstoque.tenant_id == tenant_id,
-        MovimentacaoEstoque.tipo == 'entrada'
+        MovimentacaoEstoque.tipo == 'entrada',
+        Alimento.ativo == True
     ).first()
     
     if not movimentacao_entrada:
@@ -1032,7 +1579,20 @@ def usar_qrcode(
     # movimentacao_entrada.usado = True  <- REMOVIDO
     
     db.add(movimentacao_saida)
+    registrar_consumo(
+        db,
+        tenant_id=tenant_id,
+        alimento_id=alimento.id,
+        tipo=TipoMovimentacao.SAIDA,
+        quantidade=qtd_baixa,
+    )
+    alertas_validade.registrar_saida(db, movimentacao_entrada.id, qtd_baixa)
+    notificar_estoque(db, tenant_id, alimento)
+    versao = incrementar_versao(db, tenant_id)
     db.commit()
+    invalidar_catalogo(tenant_id)
+    invalidar_previsao(tenant_id)
+    registrar_versao(tenant_id, versao)
     
     # Calcula quanto ainda resta disponível neste lote
     quantidade_restante_lote = quantidade_disponivel_lote - qtd_baixa
@@ -1083,7 +1643,8 @@ def validar_lote(
     movimentacao = db.query(MovimentacaoEstoque).join(Alimento).filter(
         MovimentacaoEstoque.qr_code_usado == lote_numero.upper(),
         MovimentacaoEstoque.tenant_id == tenant_id,
-        MovimentacaoEstoque.tipo == 'entrada'
+        MovimentacaoEstoque.tipo == 'entrada',
+        Alimento.ativo == True
     ).first()
     
     if not movimentacao:
@@ -1165,7 +1726,8 @@ def usar_lote(
     movimentacao_entrada = db.query(MovimentacaoEstoque).join(Alimento).filter(
         MovimentacaoEstoque.qr_code_usado == lote_numero.upper(),
         MovimentacaoEstoque.tenant_id == tenant_id,
-        MovimentacaoEstoque.tipo == 'entrada'
+        MovimentacaoEstoque.tipo == 'entrada',
+        Alimento.ativo == True
     ).first()
     
     if not movimentacao_entrada:
@@ -1229,7 +1791,20 @@ def usar_lote(
     alimento.quantidade_estoque = quantidade_nova
     
     db.add(movimentacao_saida)
+    registrar_consumo(
+        db,
+        tenant_id=tenant_id,
+        alimento_id=movimentacao_entrada.alimento_id,
+        tipo=TipoMovimentacao.SAIDA,
+        quantidade=qtd_baixa,
+    )
+    alertas_validade.registrar_saida(db, movimentacao_entrada.id, qtd_baixa)
+    notificar_estoque(db, tenant_id, alimento)
+    versao = incrementar_versao(db, tenant_id)
     db.commit()
+    invalidar_catalogo(tenant_id)
+    invalidar_previsao(tenant_id)
+    registrar_versao(tenant_id, versao)
     
     # Calcula quanto ainda resta disponível neste lote
     quantidade_restante_lote = quantidade_disponivel_lote - qtd_baixa
@@ -1260,11 +1835,21 @@ def usar_lote(
 
 
 # ==================== ALERTAS DE VALIDADE ====================
+def _urgencia(dias_restantes):
+    """Classificação de urgência do alerta, calculada no SQL"""
+    return case(
+        (dias_restantes <= 1, "critico"),
+        (dias_restantes <= 2, "alto"),
+        else_="medio",
+    )
+
+
 @router.get("/{tenant_id}/lotes/vencendo")
 async def listar_lotes_vencendo(
     tenant_id: int,
+    request: Request,
     dias: int = 4,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -1278,114 +1863,63 @@ async def listar_lotes_vencendo(
             user_tenants_association.c.user_id == current_user.id,
             user_tenants_association.c.tenant_id == tenant_id
         )
-        result = db.execute(stmt).first()
+        result = (await db.execute(stmt)).first()
         if not result:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Sem acesso a este restaurante"
             )
     
-    # Calcula data limite
-    data_limite = datetime.now() + timedelta(days=dias)
-    
-    resultado = []
-    
-    # 1. Busca lotes ativos que ainda têm quantidade disponível e estão próximos do vencimento
-    lotes = db.query(ProdutoLote).join(Alimento).filter(
-        ProdutoLote.tenant_id == tenant_id,
-        ProdutoLote.ativo == True,
-        ProdutoLote.usado_completamente == False,
-        ProdutoLote.quantidade_disponivel > 0,
-        ProdutoLote.data_validade <= data_limite,
-        ProdutoLote.data_validade >= datetime.now()
-    ).order_by(ProdutoLote.data_validade.asc()).all()
-    
-    for lote in lotes:
-        # Verifica se o alimento ainda existe
-        if not lote.alimento:
-            continue
-            
-        # Verifica se o produto ainda tem estoque
-        if not lote.alimento.quantidade_estoque or lote.alimento.quantidade_estoque <= 0:
-            continue
-        
-        # Verifica se a quantidade do lote não é maior que o estoque total (inconsistência)
-        if lote.quantidade_disponivel > lote.alimento.quantidade_estoque:
-            continue
-            
-        dias_restantes = (lote.data_validade.date() - datetime.now().date()).days
-        resultado.append({
-            "id": lote.id,
-            "tipo": "lote",
-            "alimento_id": lote.alimento_id,
-            "alimento_nome": lote.alimento.nome,
-            "lote_numero": lote.lote_numero,
-            "quantidade_disponivel": lote.quantidade_disponivel,
-            "unidade_medida": lote.unidade_medida,
-            "data_validade": lote.data_validade.isoformat(),
-            "dias_restantes": dias_restantes,
-            "urgencia": "critico" if dias_restantes <= 1 else "alto" if dias_restantes <= 2 else "medio"
-        })
-    
-    # 2. Busca movimentações de entrada com validade que ainda não foram usadas
-    movimentacoes = db.query(MovimentacaoEstoque).join(Alimento).filter(
-        MovimentacaoEstoque.tenant_id == tenant_id,
-        MovimentacaoEstoque.tipo == TipoMovimentacao.ENTRADA,
-        MovimentacaoEstoque.data_validade != None,
-        MovimentacaoEstoque.usado == False,
-        MovimentacaoEstoque.data_validade <= data_limite,
-        MovimentacaoEstoque.data_validade >= datetime.now().date()
-    ).order_by(MovimentacaoEstoque.data_validade.asc()).all()
+    # dias_restantes muda com a data: ela entra no ETag junto da versão
+    hoje = date.today()
+    versao = versao_atual(tenant_id)
+    etag = etag_fraco(request, "vencendo", versao, hoje.isoformat()) if versao is not None else None
+    resposta = nao_modificado(request, etag)
+    if resposta:
+        return resposta
+    
+    # Leitura por faixa no calendário pré-calculado (índice tenant_id, data_validade);
+    # dias_restantes e urgência continuam calculados no banco
+    data_limite = hoje + timedelta(days=dias)
+    dias_restantes = (AlertaValidade.data_validade - literal(hoje, Date))
+    
+    stmt = select(
+        AlertaValidade.origem_id.label("id"),
+        AlertaValidade.origem.label("tipo"),
+        AlertaValidade.alimento_id,
+        Alimento.nome.label("alimento_nome"),
+        AlertaValidade.lote_numero,
+        AlertaValidade.quantidade_disponivel,
+        func.coalesce(AlertaValidade.unidade_medida, Alimento.unidade_medida).label("unidade_medida"),
+        AlertaValidade.data_validade,
+        dias_restantes.label("dias_restantes"),
+        _urgencia(dias_restantes).label("urgencia"),
+    ).join(
+        Alimento, AlertaValidade.alimento_id == Alimento.id
+    ).where(
+        AlertaValidade.tenant_id == tenant_id,
+        AlertaValidade.data_validade >= hoje,
+        AlertaValidade.data_validade <= data_limite,
+        AlertaValidade.quantidade_disponivel > 0,
+        Alimento.quantidade_estoque > 0,
+        Alimento.ativo == True,
+        # Lote maior que o estoque total = inconsistência, não alerta
+        or_(
+            AlertaValidade.origem != "lote",
+            AlertaValidade.quantidade_disponivel <= Alimento.quantidade_estoque
+        )
+    ).order_by(AlertaValidade.data_validade, AlertaValidade.origem_id)
     
-    for mov in movimentacoes:
-        # Verifica se o alimento ainda existe
-        if not mov.alimento:
-            continue
-            
-        # Verifica se o produto ainda tem estoque
-        if not mov.alimento.quantidade_estoque or mov.alimento.quantidade_estoque <= 0:
-            continue
-            
-        # Calcula quantidade já usada deste lote
-        lote_numero = mov.qr_code_usado
-        total_usado = db.query(func.sum(MovimentacaoEstoque.quantidade)).filter(
-            MovimentacaoEstoque.qr_code_usado == lote_numero,
-            MovimentacaoEstoque.tipo == 'saida',
-            MovimentacaoEstoque.tenant_id == tenant_id
-        ).scalar() or 0
-        
-        quantidade_disponivel = mov.quantidade - total_usado
-        
-        # Só adiciona se ainda tiver quantidade disponível
-        if quantidade_disponivel <= 0:
-            continue
-        
-        # Calcula dias restantes considerando que data_validade é um Date
-        dias_restantes = (mov.data_validade - datetime.now().date()).days
-        resultado.append({
-            "id": mov.id,
-            "tipo": "movimentacao",
-            "alimento_id": mov.alimento_id,
-            "alimento_nome": mov.alimento.nome,
-            "lote_numero": lote_numero or "N/A",
-            "quantidade_disponivel": quantidade_disponivel,
-            "unidade_medida": mov.alimento.unidade_medida,
-            "data_validade": mov.data_validade.isoformat(),
-            "dias_restantes": dias_restantes,
-            "urgencia": "critico" if dias_restantes <= 1 else "alto" if dias_restantes <= 2 else "medio"
-        })
-    
-    # Ordena por data de validade
-    resultado.sort(key=lambda x: x['data_validade'])
+    resultado = (await db.execute(stmt)).all()
     
-    return resultado
+    return resposta_lista(resultado, etag=etag)
 
 
 @router.get("/{tenant_id}/debug/alertas-vencimento")
 async def debug_alertas_vencimento(
     tenant_id: int,
     dias: int = 30,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -1398,39 +1932,59 @@ async def debug_alertas_vencimento(
             user_tenants_association.c.user_id == current_user.id,
             user_tenants_association.c.tenant_id == tenant_id
         )
-        result = db.execute(stmt).first()
+        result = (await db.execute(stmt)).first()
         if not result:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Sem acesso a este restaurante"
             )
     
-    data_limite = datetime.now() + timedelta(days=dias)
-    
-    # Busca todas movimentações de entrada com validade (LEFT JOIN para incluir produtos deletados)
-    movimentacoes = db.query(MovimentacaoEstoque).outerjoin(Alimento).filter(
+    hoje = date.today()
+    data_limite = hoje + timedelta(days=dias)
+    
+    # Saídas por lote numa subquery correlacionada (sem N+1 nem lazy load, que a
+    # sessão async não permite)
+    saida = aliased(MovimentacaoEstoque)
+    total_usado = select(
+        func.coalesce(func.sum(saida.quantidade), 0)
+    ).where(
+        saida.qr_code_usado == MovimentacaoEstoque.qr_code_usado,
+        saida.tipo == TipoMovimentacao.SAIDA,
+        saida.tenant_id == tenant_id
+    ).scalar_subquery()
+    
+    # Todas as movimentações de entrada com validade (LEFT JOIN para incluir produtos deletados)
+    stmt = select(
+        MovimentacaoEstoque.id,
+        MovimentacaoEstoque.qr_code_usado,
+        MovimentacaoEstoque.data_validade,
+        MovimentacaoEstoque.quantidade,
+        Alimento.id.label("alimento_id"),
+        Alimento.nome.label("alimento_nome"),
+        Alimento.quantidade_estoque,
+        total_usado.label("total_usado"),
+    ).outerjoin(
+        Alimento, MovimentacaoEstoque.alimento_id == Alimento.id
+    ).where(
         MovimentacaoEstoque.tenant_id == tenant_id,
         MovimentacaoEstoque.tipo == TipoMovimentacao.ENTRADA,
         MovimentacaoEstoque.data_validade != None,
         MovimentacaoEstoque.usado == False,
-        MovimentacaoEstoque.data_validade <= data_limite.date(),
-        MovimentacaoEstoque.data_validade >= datetime.now().date()
-    ).all()
+        MovimentacaoEstoque.data_validade <= data_limite,
+        MovimentacaoEstoque.data_validade >= hoje
+    )
+    movimentacoes = (await db.execute(stmt)).all()
     
     diagnostico = []
     
     for mov in movimentacoes:
         try:
-            alimento_existe = mov.alimento is not None
-            estoque_atual = mov.alimento.quantidade_estoque if alimento_existe else None
-            alimento_nome = mov.alimento.nome if alimento_existe else "PRODUTO_DELETADO"
+            alimento_existe = mov.alimento_id is not None
+            estoque_atual = mov.quantidade_estoque if alimento_existe else None
+            alimento_nome = mov.alimento_nome if alimento_existe else "PRODUTO_DELETADO"
             
             lote_numero = mov.qr_code_usado or "SEM_LOTE"
-            total_usado = db.query(func.sum(MovimentacaoEstoque.quantidade)).filter(
-                MovimentacaoEstoque.qr_code_usado == lote_numero,
-                MovimentacaoEstoque.tipo == 'saida',
-                MovimentacaoEstoque.tenant_id == tenant_id
-            ).scalar() or 0
+            total_usado = mov.total_usado or 0
             
             quantidade_disponivel = mov.quantidade - total_usado
             
@@ -0,0 +1,141 @@
+"""
+Analytics de consumo do restaurante
+
+Consumo e previsão são servidos pelo rollup `consumo_diario`, nunca por
+`movimentacoes_estoque` (que é limpa após 90 dias).
+"""
+
+import enum
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import Alimento, User, ConsumoDiario
+from app.auth import get_current_user
+from app.responses import resposta_lista
+from app.services.previsao import obter_previsao
+
+router = APIRouter(prefix="/api/tenant", tags=["Tenant - Analytics"])
+
+# Janela máxima de uma consulta (evita varreduras de anos em granularidade diária)
+MAX_DIAS_CONSULTA = 731
+
+
+class Granularidade(str, enum.Enum):
+    DIA = "dia"
+    SEMANA = "semana"
+    MES = "mes"
+
+
+# Granularidade -> campo do date_trunc do PostgreSQL
+DATE_TRUNC = {
+    Granularidade.DIA: "day",
+    Granularidade.SEMANA: "week",
+    Granularidade.MES: "month",
+}
+
+
+@router.get("/{tenant_id}/analytics/consumo")
+def consumo(
+    tenant_id: int,
+    de: Optional[date] = None,
+    ate: Optional[date] = None,
+    granularidade: Granularidade = Granularidade.DIA,
+    alimento_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Consumo por produto e período (entradas, saídas e ajustes)
+
+    - **de** / **ate**: intervalo de datas (padrão: últimos 30 dias)
+    - **granularidade**: `dia`, `semana` ou `mes`
+    - **alimento_id**: filtra um produto específico
+    """
+    # Verifica se o usuário tem acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+
+    ate = ate or date.today()
+    de = de or ate - timedelta(days=30)
+    if de > ate:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Data inicial maior que a data final"
+        )
+    if (ate - de).days > MAX_DIAS_CONSULTA:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Intervalo máximo de {MAX_DIAS_CONSULTA} dias"
+        )
+
+    periodo = func.date_trunc(DATE_TRUNC[granularidade], ConsumoDiario.dia).label("periodo")
+
+    stmt = select(
+        periodo,
+        ConsumoDiario.alimento_id,
+        Alimento.nome.label("alimento_nome"),
+        Alimento.unidade_medida,
+        func.sum(ConsumoDiario.entradas).label("entradas"),
+        func.sum(ConsumoDiario.saidas).label("saidas"),
+        func.sum(ConsumoDiario.ajustes).label("ajustes"),
+    ).join(
+        Alimento, ConsumoDiario.alimento_id == Alimento.id
+    ).where(
+        ConsumoDiario.tenant_id == tenant_id,
+        ConsumoDiario.dia >= de,
+        ConsumoDiario.dia <= ate
+    ).group_by(
+        periodo, ConsumoDiario.alimento_id, Alimento.nome, Alimento.unidade_medida
+    ).order_by(periodo, Alimento.nome)
+
+    if alimento_id:
+        stmt = stmt.where(ConsumoDiario.alimento_id == alimento_id)
+
+    linhas = [
+        {
+            "periodo": row.periodo.date().isoformat(),
+            "alimento_id": row.alimento_id,
+            "alimento_nome": row.alimento_nome,
+            "unidade_medida": row.unidade_medida,
+            "entradas": row.entradas,
+            "saidas": row.saidas,
+            "ajustes": row.ajustes,
+        }
+        for row in db.execute(stmt)
+    ]
+
+    return resposta_lista(linhas)
+
+
+@router.get("/{tenant_id}/previsao")
+def previsao(
+    tenant_id: int,
+    janela: int = Query(28, ge=7, le=365),
+    horizonte: int = Query(7, ge=1, le=90),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Dias até a ruptura de estoque e sugestão de reposição por produto
+
+    - **janela**: dias de histórico de consumo considerados (padrão: 28)
+    - **horizonte**: dias de cobertura desejados após a reposição (padrão: 7)
+    """
+    # Verifica se o usuário tem acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+
+    return resposta_lista(obter_previsao(db, tenant_id, janela=janela, horizonte=horizonte))
@@ -0,0 +1,75 @@
+"""
+Stream de eventos do restaurante (Server-Sent Events)
+
+Substitui o polling de alertas dos tablets: mudanças de estoque e alertas de
+validade chegam em segundos, distribuídos pelo listener único do worker.
+"""
+
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import StreamingResponse
+
+from app.models import User
+from app.auth import get_current_user
+from app.services.eventos import broker, Assinatura, HEARTBEAT_SEGUNDOS
+
+router = APIRouter(prefix="/api/tenant", tags=["Tenant - Eventos"])
+
+
+async def _stream_eventos(request: Request, assinatura: Assinatura):
+    try:
+        # Tempo de reconexão sugerido ao cliente (ms)
+        yield "retry: 5000\n\n"
+        while True:
+            if await request.is_disconnected():
+                break
+            try:
+                evento = await asyncio.wait_for(assinatura.fila.get(), timeout=HEARTBEAT_SEGUNDOS)
+            except asyncio.TimeoutError:
+                # Heartbeat: mantém a conexão viva em proxies e detecta clientes que saíram
+                yield ": ping\n\n"
+                continue
+            yield f"event: {evento.get('tipo', 'message')}\ndata: {json.dumps(evento, default=str)}\n\n"
+    finally:
+        broker.cancelar(assinatura)
+
+
+@router.get("/{tenant_id}/eventos")
+async def stream_eventos(
+    tenant_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream SSE com eventos do restaurante
+
+    - `estoque`: estado atual de estoque de um produto alterado
+    - `validade`: entrada que já chega perto do vencimento
+    - `impressao`: mudança de status de um job da fila de impressão
+    - `resync`: eventos foram perdidos, o cliente deve recarregar os dados
+    """
+    # Verifica se o usuário tem acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+
+    if not broker.ativo:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Stream de eventos indisponível"
+        )
+
+    assinatura = broker.assinar(tenant_id)
+    return StreamingResponse(
+        _stream_eventos(request, assinatura),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # nginx não deve bufferizar o stream
+        },
+    )
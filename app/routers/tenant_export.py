@@ -0,0 +1,259 @@
+"""
+Exportação de estoque, movimentações e lotes do restaurante (CSV / XLSX)
+
+Os arquivos são gerados de forma incremental: as linhas vêm de um cursor
+no servidor (`yield_per`) e são escritas em blocos, então a memória fica
+constante mesmo em exportações com centenas de milhares de linhas. O
+gerador é síncrono e o StreamingResponse o consome no threadpool, sem
+bloquear o event loop.
+"""
+
+import csv
+import enum
+import io
+import tempfile
+import zlib
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, get_db
+from app.models import Alimento, User, MovimentacaoEstoque, TipoMovimentacao
+from app.auth import get_current_user
+from app.rate_limit import limiter
+from app.routers.tenant_alimentos import verificar_admin_restaurante
+import xlsxwriter
+
+router = APIRouter(prefix="/api/tenant", tags=["Tenant - Exportação"])
+
+# Linhas buscadas por ida ao banco e escritas por bloco enviado ao cliente
+EXPORT_BATCH = 1000
+# Tamanho dos blocos ao enviar o XLSX finalizado
+XLSX_CHUNK = 64 * 1024
+
+
+class RecursoExport(str, enum.Enum):
+    ALIMENTOS = "alimentos"
+    MOVIMENTACOES = "movimentacoes"
+    LOTES = "lotes"
+
+
+class FormatoExport(str, enum.Enum):
+    CSV = "csv"
+    XLSX = "xlsx"
+
+
+# ==================== CONSULTAS ====================
+def _consulta_alimentos(tenant_id: int):
+    return select(
+        Alimento.id,
+        Alimento.codigo,
+        Alimento.nome,
+        Alimento.categoria,
+        Alimento.subcategoria,
+        Alimento.tipo_conservacao,
+        Alimento.unidade_medida,
+        Alimento.quantidade_estoque,
+        Alimento.quantidade_minima,
+        Alimento.tipo_embalagem,
+        Alimento.unidades_por_embalagem,
+        Alimento.preco_unitario,
+        Alimento.fornecedor,
+        Alimento.created_at,
+        Alimento.updated_at,
+    ).where(
+        Alimento.tenant_id == tenant_id,
+        Alimento.ativo == True
+    ).order_by(Alimento.id)
+
+
+def _consulta_movimentacoes(tenant_id: int):
+    return select(
+        MovimentacaoEstoque.id,
+        MovimentacaoEstoque.created_at,
+        Alimento.nome.label("alimento_nome"),
+        MovimentacaoEstoque.tipo,
+        MovimentacaoEstoque.quantidade,
+        MovimentacaoEstoque.quantidade_anterior,
+        MovimentacaoEstoque.quantidade_nova,
+        Alimento.unidade_medida,
+        User.nome.label("usuario_nome"),
+        MovimentacaoEstoque.qr_code_usado.label("lote_numero"),
+        MovimentacaoEstoque.data_producao,
+        MovimentacaoEstoque.data_validade,
+        MovimentacaoEstoque.motivo,
+    ).outerjoin(
+        Alimento, MovimentacaoEstoque.alimento_id == Alimento.id
+    ).join(
+        User, MovimentacaoEstoque.usuario_id == User.id
+    ).where(
+        MovimentacaoEstoque.tenant_id == tenant_id
+    ).order_by(MovimentacaoEstoque.id)
+
+
+def _consulta_lotes(tenant_id: int):
+    """Lotes = entradas com etiqueta, com o saldo calculado pelas saídas do lote"""
+    saidas = select(
+        MovimentacaoEstoque.qr_code_usado.label("lote_numero"),
+        func.sum(MovimentacaoEstoque.quantidade).label("total_usado"),
+    ).where(
+        MovimentacaoEstoque.tenant_id == tenant_id,
+        MovimentacaoEstoque.tipo == TipoMovimentacao.SAIDA,
+        MovimentacaoEstoque.qr_code_usado != None
+    ).group_by(MovimentacaoEstoque.qr_code_usado).subquery()
+
+    return select(
+        MovimentacaoEstoque.qr_code_usado.label("lote_numero"),
+        Alimento.nome.label("alimento_nome"),
+        MovimentacaoEstoque.quantidade.label("quantidade_original"),
+        (MovimentacaoEstoque.quantidade - func.coalesce(saidas.c.total_usado, 0)).label("quantidade_disponivel"),
+        Alimento.unidade_medida,
+        MovimentacaoEstoque.data_producao,
+        MovimentacaoEstoque.data_validade,
+        MovimentacaoEstoque.qr_code_gerado,
+        MovimentacaoEstoque.created_at,
+    ).join(
+        Alimento, MovimentacaoEstoque.alimento_id == Alimento.id
+    ).outerjoin(
+        saidas, saidas.c.lote_numero == MovimentacaoEstoque.qr_code_usado
+    ).where(
+        MovimentacaoEstoque.tenant_id == tenant_id,
+        MovimentacaoEstoque.tipo == TipoMovimentacao.ENTRADA,
+        MovimentacaoEstoque.qr_code_gerado != None
+    ).order_by(MovimentacaoEstoque.id)
+
+
+CONSULTAS = {
+    RecursoExport.ALIMENTOS: _consulta_alimentos,
+    RecursoExport.MOVIMENTACOES: _consulta_movimentacoes,
+    RecursoExport.LOTES: _consulta_lotes,
+}
+
+
+# ==================== GERADORES ====================
+def _linhas(stmt):
+    """Itera as linhas com cursor no servidor, usando uma sessão própria.
+
+    A sessão do `get_db` é fechada antes do corpo da resposta ser enviado,
+    por isso o gerador abre (e fecha) a sua.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH))
+        for row in result:
+            yield row
+    finally:
+        db.close()
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _gerar_csv(cabecalho, linhas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    buffer.write("\ufeff")  # BOM para o Excel reconhecer UTF-8
+    writer.writerow(cabecalho)
+
+    for i, linha in enumerate(linhas, 1):
+        writer.writerow([_valor_csv(v) for v in linha])
+        if i % EXPORT_BATCH == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _gerar_xlsx(cabecalho, linhas):
+    """Escreve o XLSX em modo constant_memory (linha a linha, sem manter a planilha)."""
+    with tempfile.TemporaryFile() as arquivo:
+        workbook = xlsxwriter.Workbook(arquivo, {
+            "constant_memory": True,
+            "remove_timezone": True,
+            "default_date_format": "dd/mm/yyyy hh:mm",
+        })
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, cabecalho)
+
+        for i, linha in enumerate(linhas, 1):
+            worksheet.write_row(i, 0, [v.value if isinstance(v, enum.Enum) else v for v in linha])
+
+        workbook.close()
+
+        arquivo.seek(0)
+        while True:
+            bloco = arquivo.read(XLSX_CHUNK)
+            if not bloco:
+                break
+            yield bloco
+
+
+def _gzip(blocos):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for bloco in blocos:
+        comprimido = compressor.compress(bloco)
+        if comprimido:
+            yield comprimido
+    yield compressor.flush()
+
+
+# ==================== ENDPOINT ====================
+@router.get("/{tenant_id}/export/{recurso}")
+@limiter.limit("10/minute")
+def exportar(
+    tenant_id: int,
+    recurso: RecursoExport,
+    request: Request,
+    formato: FormatoExport = FormatoExport.CSV,
+    gzip: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Exporta alimentos, movimentações ou lotes do restaurante (apenas admins)
+
+    - **formato**: `csv` (padrão) ou `xlsx`
+    - **gzip**: comprime o arquivo (.gz)
+    """
+    # Verifica se o usuário tem acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+
+    verificar_admin_restaurante(tenant_id, current_user, db)
+
+    stmt = CONSULTAS[recurso](tenant_id)
+    cabecalho = [coluna.name for coluna in stmt.selected_columns]
+
+    if formato == FormatoExport.XLSX:
+        conteudo = _gerar_xlsx(cabecalho, _linhas(stmt))
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        conteudo = _gerar_csv(cabecalho, _linhas(stmt))
+        media_type = "text/csv; charset=utf-8"
+
+    filename = f"{recurso.value}_{tenant_id}_{datetime.now().strftime('%Y%m%d_%H%M')}.{formato.value}"
+    if gzip:
+        conteudo = _gzip(conteudo)
+        media_type = "application/gzip"
+        filename += ".gz"
+
+    return StreamingResponse(
+        conteudo,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
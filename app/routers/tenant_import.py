@@ -0,0 +1,109 @@
+"""
+Importação em massa de produtos do restaurante (CSV / XLSX)
+
+Substitui centenas de chamadas a POST /alimentos no cadastro inicial de um
+restaurante: uma validação em streaming, um `COPY` para staging e um único
+upsert set-based, com um registro de auditoria por importação.
+"""
+
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import User
+from app.auth import get_current_user
+from app.rate_limit import limiter
+from app.routers.tenant_alimentos import verificar_admin_restaurante
+from app.services.audit import registrar_auditoria
+from app.services.catalogo import invalidar_catalogo
+from app.services.importacao_alimentos import ArquivoInvalido, carregar, validar_arquivo
+from app.services.versao_dados import incrementar_versao, registrar_versao
+
+router = APIRouter(prefix="/api/tenant", tags=["Tenant - Importação"])
+
+
+@router.post("/{tenant_id}/alimentos/import")
+@limiter.limit("5/minute")
+def importar_alimentos(
+    tenant_id: int,
+    request: Request,
+    arquivo: UploadFile = File(...),
+    ignorar_erros: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Importa produtos de uma planilha CSV ou XLSX (apenas admins)
+
+    - **arquivo**: CSV (`;` ou `,`, UTF-8) ou XLSX; a primeira linha traz os
+      nomes das colunas de AlimentoCreate (`nome` é obrigatória, demais
+      colunas são ignoradas — o arquivo da exportação pode ser reimportado)
+    - **ignorar_erros**: importa as linhas válidas mesmo havendo linhas com
+      erro; por padrão nada é gravado se alguma linha for inválida
+
+    Produtos existentes são atualizados, identificados pelo `codigo` ou, sem
+    ele, pelo `nome` (sem diferenciar maiúsculas). Células vazias mantêm o
+    valor atual e `quantidade_estoque` só é usada na criação do produto.
+    """
+    # Verifica se o usuário tem acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+
+    verificar_admin_restaurante(tenant_id, current_user, db)
+
+    try:
+        resultado = validar_arquivo(arquivo.file)
+    except ArquivoInvalido as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    try:
+        resumo = {
+            "total_linhas": resultado.total_linhas,
+            "total_erros": resultado.total_erros,
+            "erros": resultado.erros,
+        }
+        if resultado.total_erros and not ignorar_erros:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={
+                    "message": "Arquivo com linhas inválidas; nenhum produto foi importado",
+                    **resumo,
+                }
+            )
+
+        inseridos = atualizados = 0
+        if resultado.validas:
+            inseridos, atualizados = carregar(db, tenant_id, current_user.id, resultado.staging)
+
+        registrar_auditoria(
+            db,
+            user_id=current_user.id,
+            tenant_id=tenant_id,
+            action="IMPORT",
+            resource="alimentos",
+            details=(
+                f"Importação '{arquivo.filename}': {inseridos} criados, "
+                f"{atualizados} atualizados, {resultado.total_erros} linhas com erro"
+            ),
+            request=request,
+        )
+        versao = incrementar_versao(db, tenant_id)
+        db.commit()
+        invalidar_catalogo(tenant_id)
+        registrar_versao(tenant_id, versao)
+    finally:
+        resultado.staging.close()
+
+    return {
+        "message": f"Importação concluída: {inseridos} produtos criados e {atualizados} atualizados",
+        "inseridos": inseridos,
+        "atualizados": atualizados,
+        **resumo,
+    }
@@ -0,0 +1,154 @@
+"""
+Fila de impressão de etiquetas
+
+A cozinha enfileira as etiquetas (centenas de uma vez, se preciso) e segue
+trabalhando; os workers geram o PDF em segundo plano. O status de cada job
+chega pelo stream de eventos (`impressao`) ou por polling, e o arquivo
+pronto (PDF, ZPL ou ESC/POS) é baixado em GET /impressao/{job_id}/arquivo.
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import desc
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import PrintJob, StatusPrintJob, User
+from app.schemas import PrintJobCreate, PrintJobResponse
+from app.auth import get_current_user
+from app.rate_limit import limiter
+from app.routers.tenant_alimentos import consultar_etiquetas_lote, dados_etiqueta, formato_etiqueta, resposta_etiquetas
+from app.services.etiquetas import FORMATO_PADRAO
+from app.services.fila_impressao import enfileirar, etiquetas_do_job
+
+router = APIRouter(prefix="/api/tenant", tags=["Tenant - Impressão"])
+
+# Etiquetas aceitas por job da fila
+MAX_ETIQUETAS_POR_JOB = 500
+# Jobs devolvidos na listagem
+MAX_JOBS_LISTAGEM = 100
+
+
+def _buscar_job(db: Session, tenant_id: int, job_id: int) -> PrintJob:
+    job = db.query(PrintJob).filter(
+        PrintJob.id == job_id,
+        PrintJob.tenant_id == tenant_id
+    ).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job de impressão não encontrado"
+        )
+    return job
+
+
+@router.post("/{tenant_id}/impressao", response_model=PrintJobResponse, status_code=status.HTTP_202_ACCEPTED)
+@limiter.limit("30/minute")
+def enfileirar_impressao(
+    tenant_id: int,
+    dados: PrintJobCreate,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Enfileira a impressão das etiquetas de várias entradas (um arquivo por job)
+
+    - **formato**: `pdf`, `zpl` ou `escpos`; sem ele vale o padrão do restaurante
+
+    Responde na hora com o job `pending`; acompanhe o status pelo stream de
+    eventos ou por GET /impressao/{job_id}.
+    """
+    # Verifica acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+
+    movimentacao_ids, linhas = consultar_etiquetas_lote(db, tenant_id, dados.movimentacao_ids, MAX_ETIQUETAS_POR_JOB)
+    formato = formato_etiqueta(dados.formato, linhas[0])
+    etiquetas = [dados_etiqueta(linha) for linha in linhas]
+
+    job = enfileirar(db, tenant_id, current_user.id, movimentacao_ids, etiquetas, formato)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+@router.get("/{tenant_id}/impressao", response_model=List[PrintJobResponse])
+def listar_impressoes(
+    tenant_id: int,
+    status_job: Optional[StatusPrintJob] = Query(None, alias="status"),
+    limite: int = 50,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Lista os jobs de impressão mais recentes do restaurante"""
+    # Verifica acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+
+    query = db.query(PrintJob).filter(PrintJob.tenant_id == tenant_id)
+    if status_job:
+        query = query.filter(PrintJob.status == status_job)
+
+    return query.order_by(desc(PrintJob.id)).limit(max(1, min(limite, MAX_JOBS_LISTAGEM))).all()
+
+
+@router.get("/{tenant_id}/impressao/{job_id}", response_model=PrintJobResponse)
+def obter_impressao(
+    tenant_id: int,
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Status de um job de impressão (polling)"""
+    # Verifica acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+
+    return _buscar_job(db, tenant_id, job_id)
+
+
+@router.get("/{tenant_id}/impressao/{job_id}/arquivo")
+def baixar_impressao(
+    tenant_id: int,
+    job_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Arquivo de um job concluído, no formato escolhido ao enfileirar
+
+    O PDF vem do cache de etiquetas preenchido pelo worker, com ETag forte
+    (`If-None-Match` devolve 304).
+    """
+    # Verifica acesso ao tenant
+    user_tenants = [t.id for t in current_user.tenants]
+    if tenant_id not in user_tenants:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+
+    job = _buscar_job(db, tenant_id, job_id)
+    if job.status != StatusPrintJob.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job de impressão ainda não concluído (status: {job.status.value})"
+        )
+
+    # Mesmos dados, mesma chave: normalmente um hit no cache; re-renderiza se foi podado
+    return resposta_etiquetas(request, etiquetas_do_job(job), f"impressao_{job_id}", job.formato or FORMATO_PADRAO)
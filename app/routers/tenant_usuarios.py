@@ -11,7 +11,9 @@ from app.database import get_db
 from app.models import User, Tenant, RoleType, user_tenants_association
 from app.security import get_password_hash, get_current_user
 from app.services.audit import registrar_auditoria
+from app.services.versao_dados import incrementar_versoes_cliente
 from app.rate_limit import limiter
+from app.responses import resposta_lista
 from pydantic import BaseModel, EmailStr
 
 router = APIRouter(prefix="/api/tenant", tags=["Tenant - Usuários"])
@@ -78,25 +80,33 @@ def listar_usuarios(
     if not tenant:
         raise HTTPException(status_code=404, detail="Restaurante não encontrado")
     
-    # Lista usuários vinculados ao tenant
-    usuarios = []
-    for user in tenant.users:
-        # Busca o role
-        stmt = select(user_tenants_association).where(
-            user_tenants_association.c.user_id == user.id,
+    # Lista usuários vinculados ao tenant (role vem no mesmo SELECT)
+    rows = db.execute(
+        select(
+            User.id,
+            User.nome,
+            User.email,
+            User.ativo,
+            user_tenants_association.c.role,
+        ).join(
+            user_tenants_association, user_tenants_association.c.user_id == User.id
+        ).where(
             user_tenants_association.c.tenant_id == tenant_id
         )
-        result = db.execute(stmt).first()
-        
-        usuarios.append({
-            "id": user.id,
-            "nome": user.nome,
-            "email": user.email,
-            "ativo": user.ativo,
-            "is_admin_restaurante": result.role == RoleType.ADMIN if result else False
-        })
+    ).all()
     
-    return usuarios
+    usuarios = [
+        {
+            "id": row.id,
+            "nome": row.nome,
+            "email": row.email,
+            "ativo": row.ativo,
+            "is_admin_restaurante": row.role == RoleType.ADMIN,
+        }
+        for row in rows
+    ]
+    
+    return resposta_lista(usuarios)
 
 
 @router.post("/{tenant_id}/usuarios", response_model=UsuarioTenantResponse, status_code=status.HTTP_201_CREATED)
@@ -198,8 +208,10 @@ def atualizar_usuario(
         )
     
     # Atualiza campos
-    if dados.nome is not None:
+    if dados.nome is not None and dados.nome != user.nome:
         user.nome = dados.nome
+        # O nome aparece em /movimentacoes: invalida os ETags dos restaurantes
+        incrementar_versoes_cliente(db, user.cliente_id)
     
     if dados.email is not None:
         # Verifica se novo email já existe
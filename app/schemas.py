@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -100,6 +100,7 @@ class UserResponse(UserBase):
 # ============= ALIMENTO SCHEMAS =============
 class AlimentoBase(BaseModel):
     nome: str
+    codigo: Optional[str] = None  # Código externo (ERP/fornecedor)
     categoria: Optional[str] = None
     subcategoria: Optional[str] = None
     tipo_conservacao: Optional[str] = None  # congelado, resfriado
@@ -119,6 +120,7 @@ class AlimentoCreate(AlimentoBase):
 
 class AlimentoUpdate(BaseModel):
     nome: Optional[str] = None
+    codigo: Optional[str] = None
     categoria: Optional[str] = None
     subcategoria: Optional[str] = None
     tipo_conservacao: Optional[str] = None
@@ -133,6 +135,24 @@ class AlimentoUpdate(BaseModel):
     ativo: Optional[bool] = None
 
 
+class AlimentoAtualizacaoLote(BaseModel):
+    """Item do PATCH em massa: só os campos enviados são alterados"""
+    id: int
+    preco_unitario: Optional[float] = Field(None, ge=0)
+    quantidade_minima: Optional[float] = Field(None, ge=0)
+    # Mesmo limite da coluna: um valor maior derrubaria o UPDATE único inteiro
+    fornecedor: Optional[str] = Field(None, max_length=255)
+
+    @field_validator("preco_unitario", "quantidade_minima")
+    @classmethod
+    def _nao_nulo(cls, valor):
+        # Omitido mantém o valor atual; null explícito não é aceito (o mínimo
+        # alimenta o índice parcial de estoque baixo)
+        if valor is None:
+            raise ValueError("não pode ser nulo")
+        return valor
+
+
 class AlimentoResponse(AlimentoBase):
     id: int
     tenant_id: int
@@ -266,14 +286,21 @@ class MovimentacaoEstoqueResponse(MovimentacaoEstoqueBase):
 
 
 # ============= PRINT JOB SCHEMAS =============
+class PrintJobCreate(BaseModel):
+    movimentacao_ids: List[int]  # Ordem das páginas no PDF
+    formato: Optional[str] = None  # pdf, zpl ou escpos (padrão do restaurante)
+
+
 class PrintJobResponse(BaseModel):
     id: int
     tenant_id: int
-    lote_id: int
+    usuario_id: Optional[int] = None
     status: str
     tentativas: int
+    total_etiquetas: Optional[int] = None
+    formato: Optional[str] = None
     erro_mensagem: Optional[str] = None
-    etiqueta_data: Optional[str] = None
+    proxima_tentativa_em: Optional[datetime] = None
     created_at: datetime
     printed_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
@@ -9,10 +9,11 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
+from app.database import AsyncSessionLocal
 from app.models import User, Tenant, user_tenants_association
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 from app.config import settings
 
 # Contexto de hash de senha
@@ -56,11 +57,10 @@ def verify_token(token: str) -> dict:
         )
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+async def get_current_user(
+    token: str = Depends(oauth2_scheme)
+) -> User:
     """Obtém o usuário atual baseado no token"""
-    from app.database import get_db
-    from sqlalchemy.orm import Session
-    
     payload = verify_token(token)
     user_id = payload.get("user_id")
     email = payload.get("sub")
@@ -71,21 +71,23 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
             detail="Token inválido"
         )
     
-    # Nota: Como este é um Depends, precisamos criar uma sessão aqui
-    # Alternativa seria refatorar para usar Depends(get_db) como parâmetro
-    from app.database import SessionLocal
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.id == user_id, User.email == email).first()
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Usuário não encontrado"
+    # Sessão async própria e curta (não bloqueia o event loop nem segura a
+    # conexão durante o endpoint); tenants carregados para uso fora dela
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(User).options(selectinload(User.tenants)).where(
+                User.id == user_id,
+                User.email == email
             )
-        
-        return user
-    finally:
-        db.close()
+        )
+        user = result.scalar_one_or_none()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuário não encontrado"
+        )
+    
+    return user
 
 
 def check_role_access(user_id: int, tenant_id: int, required_role: str, db: Session) -> bool:
@@ -0,0 +1,191 @@
+"""Calendário de vencimento pré-calculado (alertas_validade).
+
+Toda madrugada cada tenant tem o calendário reconstruído com os lotes e
+entradas em aberto (saldo > 0 e validade futura). Entre as reconstruções,
+as movimentações o mantêm atualizado de forma incremental.
+"""
+from __future__ import annotations
+import logging
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import Date, cast, delete, func, literal, null, select, text, true, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+
+from app.database import SessionLocal, engine
+from app.models import AlertaValidade, Alimento, MovimentacaoEstoque, ProdutoLote, Tenant, TipoMovimentacao
+from app.services.versao_dados import incrementar_versoes
+
+logger = logging.getLogger(__name__)
+
+# Tenants reconstruídos por transação no job diário
+TENANTS_POR_LOTE = 50
+# Garante uma única execução do job mesmo com vários workers
+ADVISORY_LOCK_ID = 734001
+
+COLUNAS = [
+    "tenant_id",
+    "alimento_id",
+    "origem",
+    "origem_id",
+    "lote_numero",
+    "unidade_medida",
+    "data_validade",
+    "quantidade_disponivel",
+]
+
+
+def _select_abertos(tenant_ids: List[int], hoje: date):
+    """Lotes e entradas em aberto dos tenants, no formato de COLUNAS."""
+    lotes = select(
+        ProdutoLote.tenant_id,
+        ProdutoLote.alimento_id,
+        literal("lote"),
+        ProdutoLote.id,
+        ProdutoLote.lote_numero,
+        ProdutoLote.unidade_medida,
+        cast(ProdutoLote.data_validade, Date),
+        ProdutoLote.quantidade_disponivel,
+    ).join(
+        Alimento, ProdutoLote.alimento_id == Alimento.id
+    ).where(
+        ProdutoLote.tenant_id.in_(tenant_ids),
+        # Produtos excluídos (soft delete) aguardando a purga ficam de fora
+        Alimento.ativo == True,
+        ProdutoLote.ativo == True,
+        ProdutoLote.usado_completamente == False,
+        ProdutoLote.quantidade_disponivel > 0,
+        cast(ProdutoLote.data_validade, Date) >= hoje
+    )
+
+    # Saldo da entrada = quantidade - saídas do mesmo lote (LATERAL por entrada)
+    saida = aliased(MovimentacaoEstoque)
+    total_usado = select(
+        func.coalesce(func.sum(saida.quantidade), 0).label("total_usado")
+    ).where(
+        saida.tenant_id == MovimentacaoEstoque.tenant_id,
+        saida.qr_code_usado == MovimentacaoEstoque.qr_code_usado,
+        saida.tipo == TipoMovimentacao.SAIDA
+    ).lateral("total_usado")
+    disponivel = MovimentacaoEstoque.quantidade - total_usado.c.total_usado
+
+    entradas = select(
+        MovimentacaoEstoque.tenant_id,
+        MovimentacaoEstoque.alimento_id,
+        literal("movimentacao"),
+        MovimentacaoEstoque.id,
+        func.coalesce(MovimentacaoEstoque.qr_code_usado, "N/A"),
+        null(),
+        MovimentacaoEstoque.data_validade,
+        disponivel,
+    ).join(
+        Alimento, MovimentacaoEstoque.alimento_id == Alimento.id
+    ).join(
+        total_usado, true()
+    ).where(
+        MovimentacaoEstoque.tenant_id.in_(tenant_ids),
+        Alimento.ativo == True,
+        MovimentacaoEstoque.tipo == TipoMovimentacao.ENTRADA,
+        MovimentacaoEstoque.data_validade != None,
+        MovimentacaoEstoque.usado == False,
+        MovimentacaoEstoque.data_validade >= hoje,
+        disponivel > 0
+    )
+
+    return union_all(lotes, entradas)
+
+
+def reconstruir_tenants(db: Session, tenant_ids: List[int], hoje: Optional[date] = None) -> int:
+    """Substitui o calendário dos tenants pelos lotes em aberto (sem commit)."""
+    hoje = hoje or date.today()
+    db.execute(delete(AlertaValidade).where(AlertaValidade.tenant_id.in_(tenant_ids)))
+    # Em READ COMMITTED, uma entrada commitada entre o DELETE e o INSERT já tem
+    # a sua linha (registrar_entrada) e também aparece no SELECT: sobrescreve
+    # em vez de violar ix_alertas_validade_origem e desfazer o lote inteiro
+    stmt = pg_insert(AlertaValidade).from_select(COLUNAS, _select_abertos(tenant_ids, hoje))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AlertaValidade.origem, AlertaValidade.origem_id],
+        set_={coluna: stmt.excluded[coluna] for coluna in COLUNAS if coluna not in ("origem", "origem_id")},
+    )
+    result = db.execute(stmt)
+    # O calendário alimenta /lotes/vencendo: invalida os ETags dos tenants
+    incrementar_versoes(db, tenant_ids)
+    return result.rowcount or 0
+
+
+def reconstruir_calendario(tenants_por_lote: int = TENANTS_POR_LOTE) -> int:
+    """Job diário: reconstrói o calendário de todos os tenants ativos em lotes.
+
+    Cada lote de tenants roda na sua própria transação. Retorna o total de
+    alertas gravados, ou -1 se outro worker já está executando o job.
+    """
+    # O lock é de sessão: fica numa conexão dedicada durante todo o job
+    with engine.connect() as lock_conn:
+        adquirido = lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID}
+        ).scalar()
+        lock_conn.commit()
+        if not adquirido:
+            return -1
+
+        db = SessionLocal()
+        try:
+            hoje = date.today()
+            total = 0
+            ultimo_id = 0
+            while True:
+                tenant_ids = db.execute(
+                    select(Tenant.id).where(
+                        Tenant.id > ultimo_id,
+                        Tenant.ativo == True
+                    ).order_by(Tenant.id).limit(tenants_por_lote)
+                ).scalars().all()
+                if not tenant_ids:
+                    break
+                total += reconstruir_tenants(db, tenant_ids, hoje)
+                db.commit()
+                ultimo_id = tenant_ids[-1]
+            return total
+        finally:
+            db.close()
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+            lock_conn.commit()
+
+
+# ==================== ATUALIZAÇÃO INCREMENTAL ====================
+def registrar_entrada(db: Session, movimentacao: MovimentacaoEstoque) -> None:
+    """Inclui no calendário uma entrada com validade (a movimentação precisa de id)."""
+    if not movimentacao.data_validade or movimentacao.data_validade < date.today():
+        return
+    db.add(AlertaValidade(
+        tenant_id=movimentacao.tenant_id,
+        alimento_id=movimentacao.alimento_id,
+        origem="movimentacao",
+        origem_id=movimentacao.id,
+        lote_numero=movimentacao.qr_code_usado or "N/A",
+        data_validade=movimentacao.data_validade,
+        quantidade_disponivel=movimentacao.quantidade,
+    ))
+
+
+def registrar_saida(db: Session, movimentacao_entrada_id: int, quantidade: float) -> None:
+    """Abate uma saída do saldo da entrada de origem no calendário."""
+    db.execute(
+        update(AlertaValidade).where(
+            AlertaValidade.origem == "movimentacao",
+            AlertaValidade.origem_id == movimentacao_entrada_id
+        ).values(
+            quantidade_disponivel=AlertaValidade.quantidade_disponivel - quantidade
+        )
+    )
+
+
+def remover_alimento(db: Session, tenant_id: int, alimento_id: int) -> None:
+    """Remove os alertas de um produto com estoque zerado ou excluído."""
+    db.execute(
+        delete(AlertaValidade).where(
+            AlertaValidade.tenant_id == tenant_id,
+            AlertaValidade.alimento_id == alimento_id
+        )
+    )
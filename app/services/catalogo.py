@@ -0,0 +1,119 @@
+"""Cache do catálogo de produtos por tenant (list_alimentos / get_alimento).
+
+O primeiro acesso carrega um snapshot imutável com os produtos ativos do
+tenant; as leituras seguintes não vão ao banco. As escritas invalidam o
+tenant logo após o commit e os demais workers recebem a invalidação pelos
+eventos de estoque do LISTEN/NOTIFY. A memória é limitada por LRU de tenants.
+"""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models import Alimento
+from app.responses import colunas_do_schema
+from app.schemas import AlimentoResponse
+from app.services.eventos import broker
+
+# Tenants mantidos em memória por worker (LRU)
+MAX_TENANTS = 256
+# Rede de segurança caso o listener de eventos esteja fora do ar
+CACHE_TTL_SEGUNDOS = 300
+
+ALIMENTO_COLUNAS = colunas_do_schema(Alimento, AlimentoResponse)
+
+
+class SnapshotCatalogo:
+    """Produtos ativos de um tenant em uma versão; nunca é alterado após criado."""
+
+    __slots__ = ("versao", "criado_em", "linhas", "por_id")
+
+    def __init__(self, versao: int, linhas: Tuple[Row, ...]):
+        self.versao = versao
+        self.criado_em = time.monotonic()
+        self.linhas = linhas
+        self.por_id: Mapping[int, Row] = MappingProxyType({linha.id: linha for linha in linhas})
+
+
+_cache: "OrderedDict[int, SnapshotCatalogo]" = OrderedDict()
+_versao: Dict[int, int] = {}
+_cache_lock = threading.Lock()
+_metricas = {"hits": 0, "misses": 0, "invalidacoes": 0, "descartes_lru": 0}
+
+
+def invalidar_catalogo(tenant_id: int) -> None:
+    """Descarta o snapshot do tenant (chamar após o commit da escrita)."""
+    with _cache_lock:
+        _cache.pop(tenant_id, None)
+        _versao[tenant_id] = _versao.get(tenant_id, 0) + 1
+        _metricas["invalidacoes"] += 1
+
+
+def limpar_catalogo() -> None:
+    """Descarta todos os snapshots (ex.: eventos perdidos pelo listener)."""
+    with _cache_lock:
+        for tenant_id in _cache:
+            _versao[tenant_id] = _versao.get(tenant_id, 0) + 1
+        _cache.clear()
+
+
+def obter_catalogo(db: Session, tenant_id: int) -> SnapshotCatalogo:
+    """Snapshot atual do catálogo do tenant, carregado do banco se necessário."""
+    agora = time.monotonic()
+    with _cache_lock:
+        snapshot = _cache.get(tenant_id)
+        versao = _versao.get(tenant_id, 0)
+        if snapshot is not None and agora - snapshot.criado_em < CACHE_TTL_SEGUNDOS:
+            _cache.move_to_end(tenant_id)
+            _metricas["hits"] += 1
+            return snapshot
+        _metricas["misses"] += 1
+
+    linhas = tuple(db.execute(
+        select(*ALIMENTO_COLUNAS).where(
+            Alimento.tenant_id == tenant_id,
+            Alimento.ativo == True
+        ).order_by(Alimento.id)
+    ).all())
+    snapshot = SnapshotCatalogo(versao, linhas)
+
+    with _cache_lock:
+        # Só guarda se nenhuma escrita invalidou o tenant durante a carga
+        if _versao.get(tenant_id, 0) == versao:
+            _cache[tenant_id] = snapshot
+            _cache.move_to_end(tenant_id)
+            while len(_cache) > MAX_TENANTS:
+                _cache.popitem(last=False)
+                _metricas["descartes_lru"] += 1
+    return snapshot
+
+
+def metricas_catalogo() -> dict:
+    with _cache_lock:
+        consultas = _metricas["hits"] + _metricas["misses"]
+        return {
+            **_metricas,
+            "tenants": len(_cache),
+            "max_tenants": MAX_TENANTS,
+            "taxa_acerto": round(_metricas["hits"] / consultas, 4) if consultas else None,
+        }
+
+
+def _ao_evento(evento: dict) -> None:
+    # Escritas feitas em outros workers chegam como eventos de estoque; as
+    # escritas em massa (importação) só publicam a nova versão do tenant
+    if evento.get("tipo") in ("estoque", "versao"):
+        tenant_id = evento.get("tenant_id")
+        if tenant_id is not None:
+            invalidar_catalogo(tenant_id)
+    elif evento.get("tipo") == "resync":
+        limpar_catalogo()
+
+
+broker.ouvir(_ao_evento)
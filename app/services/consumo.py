@@ -0,0 +1,47 @@
+"""Manutenção incremental do rollup de consumo diário (consumo_diario)."""
+from __future__ import annotations
+from datetime import date
+from typing import Optional
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models import ConsumoDiario, TipoMovimentacao
+
+# Coluna do rollup que acumula cada tipo de movimentação
+COLUNA_POR_TIPO = {
+    TipoMovimentacao.ENTRADA: "entradas",
+    TipoMovimentacao.SAIDA: "saidas",
+    TipoMovimentacao.USO: "saidas",
+    TipoMovimentacao.AJUSTE: "ajustes",
+}
+
+
+def registrar_consumo(
+    db: Session,
+    *,
+    tenant_id: int,
+    alimento_id: int,
+    tipo,
+    quantidade: float,
+    dia: Optional[date] = None,
+) -> None:
+    """Soma a movimentação no rollup do dia com um único UPSERT.
+
+    Deve ser chamado na mesma transação que grava a movimentação. Para
+    ajustes, `quantidade` é o delta aplicado ao estoque. O chamador invalida
+    a previsão (`invalidar_previsao`) depois do commit: antes dele, um
+    cálculo concorrente ainda leria os dados antigos e os guardaria no cache.
+    """
+    coluna = COLUNA_POR_TIPO[TipoMovimentacao(tipo)]
+    valores = {"entradas": 0, "saidas": 0, "ajustes": 0, coluna: quantidade}
+
+    stmt = insert(ConsumoDiario).values(
+        tenant_id=tenant_id,
+        alimento_id=alimento_id,
+        dia=dia or date.today(),
+        **valores,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ConsumoDiario.tenant_id, ConsumoDiario.alimento_id, ConsumoDiario.dia],
+        set_={coluna: getattr(ConsumoDiario, coluna) + stmt.excluded[coluna]},
+    )
+    db.execute(stmt)
@@ -0,0 +1,974 @@
+"""Renderização e cache das etiquetas de lote (PDF, ZPL e ESC/POS).
+
+A etiqueta depende só dos dados impressos (DadosEtiqueta) e da versão do
+template, então o PDF é endereçado pelo hash desse conteúdo: uma LRU em
+memória na frente de um armazenamento em disco limitado por tamanho,
+compartilhado pelos workers. Reimpressões devolvem os mesmos bytes com um
+ETag forte, sem gerar QR code nem canvas de novo. As renderizações novas
+rodam num pool de processos próprio, fora das threads das requisições.
+
+Impressoras térmicas também recebem a etiqueta em comandos nativos (ZPL ou
+ESC/POS, com o QR como código de barras da própria impressora): algumas
+centenas de bytes, sem raster nem PDF no caminho.
+
+Reimpressões em massa (milhares de etiquetas) não passam pelo cache:
+`gerar_etiquetas` produz o arquivo em partes, bloco a bloco, e o PDF é
+escrito incrementalmente (PdfIncremental), com memória constante.
+"""
+from __future__ import annotations
+import functools
+import hashlib
+import io
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, astuple, dataclass
+from datetime import date
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import qrcode
+from reportlab import rl_config
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Streams só comprimidos, sem a camada ASCII85 (+25% de bytes e CPU). O
+# reportlab só é usado nas etiquetas, que não têm imagens inline (essas exigem ASCII85)
+rl_config.useA85 = 0
+
+# Incrementar a cada mudança no layout: invalida todas as etiquetas em cache
+TEMPLATE_VERSAO = 3
+# Ao passar do limite, o disco é podado até esta fração dele
+DISCO_ALVO_PODA = 0.8
+# Tempo máximo de espera por uma renderização no pool (fila + CPU)
+TIMEOUT_RENDERIZACAO = 30
+# Etiquetas renderizadas por vez ao gerar um arquivo em partes (gerar_etiquetas)
+ETIQUETAS_POR_BLOCO = 50
+
+# Formatos brutos: impressoras térmicas de 203 dpi
+PONTOS_POR_MM = 8
+PT_EM_MM = 25.4 / 72
+# QR de UUID (versão 3): 29 módulos; no PDF, mais 2 módulos de margem de cada lado
+QR_MODULOS_UUID = 29
+QR_BORDA = 2
+# Máscara fixa: escolher a "melhor" das 8 custava ~80% da renderização (qualquer
+# máscara é válida pela norma; a escolha só reduz padrões parecidos com os localizadores)
+QR_MASCARA = 0
+QR_MODULO_ESCPOS = 6
+# Tamanho das etiquetas sem configuração no restaurante (ver TAMANHOS)
+TAMANHO_PADRAO = "80x60"
+
+UNIDADES_PESO = ['kg', 'g', 'l', 'ml', 'litro', 'litros', 'kilo', 'kilos', 'grama', 'gramas']
+
+
+@dataclass(frozen=True)
+class DadosEtiqueta:
+    """Tudo o que é impresso na etiqueta (e nada além disso)."""
+
+    restaurante_nome: Optional[str]
+    cnpj: Optional[str]
+    responsavel_nome: Optional[str]
+    produto_nome: str
+    categoria: Optional[str]
+    unidade_medida: Optional[str]
+    lote_numero: Optional[str]
+    quantidade: float
+    data_producao: Optional[date]
+    data_validade: Optional[date]
+    qr_code: str
+    tamanho: str = TAMANHO_PADRAO
+
+    def chave(self) -> str:
+        conteudo = json.dumps([TEMPLATE_VERSAO, *astuple(self)], default=str, ensure_ascii=False)
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def chave_etiquetas(etiquetas: Sequence[DadosEtiqueta], formato: str = "pdf") -> str:
+    """Chave do arquivo com as etiquetas na ordem dada (uma etiqueta em PDF = chave dela)."""
+    if len(etiquetas) == 1:
+        chave = etiquetas[0].chave()
+    else:
+        chave = hashlib.sha256("|".join(dados.chave() for dados in etiquetas).encode()).hexdigest()
+    if formato != "pdf":
+        chave = hashlib.sha256(f"{formato}:{chave}".encode()).hexdigest()
+    return chave
+
+
+def etag_etiquetas(etiquetas: Sequence[DadosEtiqueta], formato: str = "pdf") -> str:
+    # Forte: a renderização é determinística (canvas invariant, comandos de texto)
+    return f'"{chave_etiquetas(etiquetas, formato)}"'
+
+
+def etiquetas_para_json(etiquetas: Sequence[DadosEtiqueta]) -> List[dict]:
+    """Etiquetas serializáveis (print_jobs.etiqueta_data)."""
+    return [
+        {**asdict(dados), "data_producao": _data_iso(dados.data_producao), "data_validade": _data_iso(dados.data_validade)}
+        for dados in etiquetas
+    ]
+
+
+def etiquetas_de_json(itens: Sequence[dict]) -> List[DadosEtiqueta]:
+    """Inverso de `etiquetas_para_json`: mesmos dados, mesma chave de cache."""
+    return [
+        DadosEtiqueta(**{
+            **item,
+            "data_producao": _data_de_iso(item.get("data_producao")),
+            "data_validade": _data_de_iso(item.get("data_validade")),
+        })
+        for item in itens
+    ]
+
+
+def _data_iso(valor: Optional[date]) -> Optional[str]:
+    return valor.isoformat() if valor else None
+
+
+def _data_de_iso(valor: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(valor) if valor else None
+
+
+# ==================== TEMPLATES ====================
+@dataclass(frozen=True)
+class Campo:
+    """Posição de um texto: x e linha de base em mm (origem no canto inferior esquerdo)."""
+
+    x: float
+    y: float
+    fonte: str
+    corpo: float
+    max_caracteres: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class LayoutEtiqueta:
+    largura: float
+    altura: float
+    qr_x: float
+    qr_y: float
+    qr_lado: float
+    # Campos impressos neste tamanho, na ordem de leitura (os ausentes não cabem)
+    campos: Tuple[Tuple[str, Campo], ...]
+
+
+TAMANHOS = {
+    "80x60": LayoutEtiqueta(80, 60, qr_x=5, qr_y=25, qr_lado=25, campos=(
+        ("restaurante", Campo(35, 55, "Helvetica-Bold", 8, 30)),
+        ("cnpj", Campo(35, 51, "Helvetica", 6)),
+        ("produto", Campo(35, 46, "Helvetica-Bold", 10, 25)),
+        ("lote", Campo(35, 40, "Helvetica-Bold", 9)),
+        ("quantidade", Campo(35, 36, "Helvetica", 8)),
+        ("producao", Campo(35, 32, "Helvetica", 8)),
+        ("validade", Campo(35, 28, "Helvetica-Bold", 8)),
+        ("responsavel", Campo(5, 18, "Helvetica", 6, 36)),
+        ("categoria", Campo(5, 13, "Helvetica", 6, 60)),
+        ("codigo", Campo(5, 2, "Courier", 5, 36)),
+    )),
+    "60x40": LayoutEtiqueta(60, 40, qr_x=3, qr_y=14, qr_lado=22, campos=(
+        ("restaurante", Campo(27, 36, "Helvetica-Bold", 7, 24)),
+        ("cnpj", Campo(27, 32.5, "Helvetica", 5)),
+        ("produto", Campo(27, 28, "Helvetica-Bold", 8, 20)),
+        ("lote", Campo(27, 24, "Helvetica-Bold", 7)),
+        ("quantidade", Campo(27, 20.5, "Helvetica", 6.5)),
+        ("producao", Campo(27, 17, "Helvetica", 6.5)),
+        ("validade", Campo(27, 13.5, "Helvetica-Bold", 6.5)),
+        ("responsavel", Campo(3, 9, "Helvetica", 5, 40)),
+        ("codigo", Campo(3, 2, "Courier", 4, 36)),
+    )),
+    "50x30": LayoutEtiqueta(50, 30, qr_x=2, qr_y=6, qr_lado=20, campos=(
+        ("restaurante", Campo(24, 26.5, "Helvetica-Bold", 6, 20)),
+        ("produto", Campo(24, 22, "Helvetica-Bold", 7, 16)),
+        ("lote", Campo(24, 17.5, "Helvetica-Bold", 6)),
+        ("quantidade", Campo(24, 14, "Helvetica", 5.5)),
+        ("producao", Campo(24, 10.5, "Helvetica", 5.5)),
+        ("validade", Campo(24, 7, "Helvetica-Bold", 6)),
+        ("codigo", Campo(2, 2, "Courier", 3.5, 36)),
+    )),
+}
+# Campos que só dependem do restaurante: vão no template (cabeçalho e rodapé fixos)
+CAMPOS_FIXOS = frozenset({"restaurante", "cnpj", "responsavel"})
+# Templates (restaurante x tamanho) mantidos por processo
+TEMPLATES_EM_CACHE = 256
+
+
+def _valores(dados: DadosEtiqueta) -> dict:
+    """Texto de cada campo da etiqueta (None = não impresso)."""
+    qtd_formatada = _formatar_quantidade(dados.quantidade, dados.unidade_medida)
+    return {
+        "restaurante": dados.restaurante_nome or "Restaurante",
+        "cnpj": f"CNPJ: {dados.cnpj}" if dados.cnpj else None,
+        "produto": dados.produto_nome,
+        # Lote manual (letra + 6 dígitos)
+        "lote": f"Lote: {dados.lote_numero or 'N/A'}",
+        "quantidade": f"Qtd: {qtd_formatada} {dados.unidade_medida or 'un'}",
+        "producao": f"Prod: {dados.data_producao.strftime('%d/%m/%Y')}" if dados.data_producao else None,
+        # Destaque com *** mas ainda preto (impressora térmica)
+        "validade": f"*** VAL: {dados.data_validade.strftime('%d/%m/%Y')} ***" if dados.data_validade else None,
+        "responsavel": f"Resp: {dados.responsavel_nome}" if dados.responsavel_nome else None,
+        "categoria": f"Cat: {dados.categoria}" if dados.categoria else None,
+        # UUID no rodapé (para debug)
+        "codigo": dados.qr_code,
+    }
+
+
+def _textos(layout: LayoutEtiqueta, valores: dict, fixos: Optional[bool] = None) -> Tuple[Tuple[str, Campo, str], ...]:
+    """(nome, campo, texto) na ordem do layout; `fixos` filtra só os fixos (True) ou só os variáveis (False)."""
+    return tuple(
+        (nome, campo, valores[nome][:campo.max_caracteres])
+        for nome, campo in layout.campos
+        if valores.get(nome) and (fixos is None or (nome in CAMPOS_FIXOS) == fixos)
+    )
+
+
+@dataclass(frozen=True)
+class TemplateEtiqueta:
+    """Parte fixa das etiquetas de um restaurante num tamanho."""
+
+    chave: str
+    layout: LayoutEtiqueta
+    fixos: Tuple[Tuple[str, Campo, str], ...]
+
+
+@functools.lru_cache(maxsize=TEMPLATES_EM_CACHE)
+def _template(tamanho: str, restaurante_nome: Optional[str], cnpj: Optional[str], responsavel_nome: Optional[str]) -> TemplateEtiqueta:
+    # Chaveado pelos próprios dados: editar o restaurante gera outro template
+    layout = TAMANHOS.get(tamanho) or TAMANHOS[TAMANHO_PADRAO]
+    valores = _valores(DadosEtiqueta(restaurante_nome, cnpj, responsavel_nome, "", None, None, None, 0, None, None, ""))
+    conteudo = json.dumps([TEMPLATE_VERSAO, tamanho, restaurante_nome, cnpj, responsavel_nome], ensure_ascii=False)
+    return TemplateEtiqueta(
+        chave=hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:16],
+        layout=layout,
+        fixos=_textos(layout, valores, fixos=True),
+    )
+
+
+def template_etiqueta(dados: DadosEtiqueta) -> TemplateEtiqueta:
+    return _template(dados.tamanho, dados.restaurante_nome, dados.cnpj, dados.responsavel_nome)
+
+
+# ==================== RENDERIZAÇÃO ====================
+def _formatar_quantidade(quantidade: float, unidade_medida: Optional[str]) -> str:
+    # Formatar quantidade: inteiro para unidades, decimal para peso/volume
+    unidade = (unidade_medida or 'un').lower()
+    if any(u in unidade for u in UNIDADES_PESO):
+        # Para pesos/volumes: 2 decimais
+        return f"{quantidade:.2f}"
+    # Para unidades: inteiro ou 1 decimal
+    if quantidade == int(quantidade):
+        return f"{int(quantidade)}"
+    return f"{quantidade:.1f}"
+
+
+# ---------- PDF ----------
+def _desenhar_textos(c: canvas.Canvas, textos: Sequence[Tuple[str, Campo, str]]) -> None:
+    fonte_atual = None
+    for _, campo, texto in textos:
+        if (campo.fonte, campo.corpo) != fonte_atual:
+            c.setFont(campo.fonte, campo.corpo)
+            fonte_atual = (campo.fonte, campo.corpo)
+        c.drawString(campo.x*mm, campo.y*mm, texto)
+
+
+def _qr_operadores(conteudo: str, layout: LayoutEtiqueta) -> str:
+    """QR em vetor: um retângulo por sequência horizontal de módulos escuros,
+    em coordenadas de módulo (inteiros curtos no content stream)."""
+    qr = qrcode.QRCode(version=1, border=QR_BORDA, mask_pattern=QR_MASCARA)
+    qr.add_data(conteudo)
+    qr.make(fit=True)
+    matriz = qr.get_matrix()
+
+    modulo = layout.qr_lado * mm / len(matriz)
+    retangulos = []
+    for i, linha in enumerate(matriz):
+        j = 0
+        while j < len(linha):
+            if not linha[j]:
+                j += 1
+                continue
+            inicio = j
+            while j < len(linha) and linha[j]:
+                j += 1
+            # Eixo y invertido pela matriz de transformação: linha i, de cima para baixo
+            retangulos.append(f"{inicio} {i} {j - inicio} 1 re")
+    return (
+        f"q {modulo:.4f} 0 0 {-modulo:.4f} {layout.qr_x * mm:.2f} {(layout.qr_y + layout.qr_lado) * mm:.2f} cm\n"
+        + "\n".join(retangulos)
+        + "\nf Q"
+    )
+
+
+def _desenhar_qr(c: canvas.Canvas, conteudo: str, layout: LayoutEtiqueta) -> None:
+    c.addLiteral(_qr_operadores(conteudo, layout))
+
+
+def renderizar_pdf(etiquetas: Sequence[DadosEtiqueta]) -> bytes:
+    """Uma etiqueta por página, no tamanho do template do restaurante, num
+    único canvas. `invariant`: mesmos dados, mesmos bytes.
+
+    A parte fixa de cada template vira um form XObject desenhado uma vez
+    por documento e só referenciado nas páginas; o QR é vetorial.
+    """
+    # Cria PDF otimizado para impressora térmica (apenas preto e branco)
+    pdf_buffer = io.BytesIO()
+    c = canvas.Canvas(pdf_buffer, invariant=True)
+    templates = [template_etiqueta(dados) for dados in etiquetas]
+    # Template usado numa página só: o form custaria mais bytes do que economiza
+    usos = Counter(template.chave for template in templates)
+    formularios = set()
+    for dados, template in zip(etiquetas, templates):
+        layout = template.layout
+        c.setPageSize((layout.largura*mm, layout.altura*mm))
+        # Adiciona texto - APENAS PRETO (impressora térmica)
+        c.setFillColorRGB(0, 0, 0)
+        if usos[template.chave] == 1:
+            _desenhar_textos(c, template.fixos)
+        else:
+            if template.chave not in formularios:
+                c.beginForm(template.chave)
+                _desenhar_textos(c, template.fixos)
+                c.endForm()
+                formularios.add(template.chave)
+            c.doForm(template.chave)
+        _desenhar_qr(c, dados.qr_code, layout)
+        _desenhar_textos(c, _textos(layout, _valores(dados), fixos=False))
+        c.showPage()
+    c.save()
+    return pdf_buffer.getvalue()
+
+
+# ---------- PDF em partes (reimpressão em massa) ----------
+# Fontes base do PDF (WinAnsi, sem embutir), com o nome do recurso nas páginas
+FONTES_PDF = {
+    fonte: f"F{i}"
+    for i, fonte in enumerate(sorted({campo.fonte for layout in TAMANHOS.values() for _, campo in layout.campos}), 1)
+}
+
+
+def _texto_pdf(texto: str) -> bytes:
+    # String literal do PDF: WinAnsi (cp1252) com \, ( e ) escapados
+    return texto.encode("cp1252", errors="replace").replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _textos_operadores(textos: Sequence[Tuple[str, Campo, str]]) -> bytes:
+    partes = [b"BT"]
+    fonte_atual = None
+    for _, campo, texto in textos:
+        if (campo.fonte, campo.corpo) != fonte_atual:
+            partes.append(f"/{FONTES_PDF[campo.fonte]} {campo.corpo} Tf".encode("ascii"))
+            fonte_atual = (campo.fonte, campo.corpo)
+        partes.append(f"1 0 0 1 {campo.x*mm:.2f} {campo.y*mm:.2f} Tm (".encode("ascii") + _texto_pdf(texto) + b") Tj")
+    partes.append(b"ET")
+    return b"\n".join(partes)
+
+
+def paginas_pdf(etiquetas: Sequence[DadosEtiqueta]) -> List[bytes]:
+    """Content stream comprimido de cada etiqueta, para o PdfIncremental.
+
+    Só a parte variável: a parte fixa do template entra como o form /T.
+    """
+    paginas = []
+    for dados in etiquetas:
+        layout = template_etiqueta(dados).layout
+        conteudo = b"\n".join([
+            b"/T Do",
+            _qr_operadores(dados.qr_code, layout).encode("ascii"),
+            _textos_operadores(_textos(layout, _valores(dados), fixos=False)),
+        ])
+        paginas.append(zlib.compress(conteudo))
+    return paginas
+
+
+class PdfIncremental:
+    """PDF de muitas páginas escrito à medida que elas chegam.
+
+    Cada método devolve os bytes prontos para enviar: só ficam em memória o
+    offset de cada objeto e os ids das páginas (8 bytes cada, para a xref e
+    a árvore de páginas no final), não o conteúdo. Objetos 1 e 2 (catálogo e
+    árvore de páginas) são reservados no início e escritos por último.
+    """
+
+    # Entradas da xref (e páginas na árvore) por parte devolvida em fim()
+    ITENS_POR_PARTE = 1000
+
+    def __init__(self):
+        self._offsets = array("q", [0, 0])
+        self._posicao = 0
+        self._paginas = array("q")
+        self._fontes = ""
+        # Chave do template -> id do form XObject com a parte fixa
+        self._formularios = {}
+
+    def _reservar(self) -> int:
+        self._offsets.append(0)
+        return len(self._offsets)
+
+    def _objeto(self, numero: int, dicionario: str, stream: Optional[bytes] = None) -> bytes:
+        self._offsets[numero - 1] = self._posicao
+        if stream is None:
+            dados = f"{numero} 0 obj\n{dicionario}\nendobj\n".encode("ascii")
+        else:
+            # Em streams, `dicionario` são só as entradas além do filtro e do tamanho
+            entradas = " ".join(filter(None, (dicionario, "/Filter /FlateDecode", f"/Length {len(stream)}")))
+            dados = (
+                f"{numero} 0 obj\n<< {entradas} >>\nstream\n".encode("ascii")
+                + stream + b"\nendstream\nendobj\n"
+            )
+        self._posicao += len(dados)
+        return dados
+
+    def inicio(self) -> bytes:
+        # Comentário binário na 2ª linha: o arquivo não é tratado como texto
+        partes = [b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"]
+        self._posicao = len(partes[0])
+        recursos = []
+        for fonte, nome in FONTES_PDF.items():
+            numero = self._reservar()
+            partes.append(self._objeto(numero, f"<< /Type /Font /Subtype /Type1 /BaseFont /{fonte} /Encoding /WinAnsiEncoding >>"))
+            recursos.append(f"/{nome} {numero} 0 R")
+        self._fontes = " ".join(recursos)
+        return b"".join(partes)
+
+    def pagina(self, template: TemplateEtiqueta, conteudo: bytes) -> bytes:
+        """Uma etiqueta: o form do template (na primeira vez), o conteúdo e a página."""
+        layout = template.layout
+        caixa = f"[0 0 {layout.largura*mm:.2f} {layout.altura*mm:.2f}]"
+        partes = []
+        formulario = self._formularios.get(template.chave)
+        if formulario is None:
+            formulario = self._reservar()
+            partes.append(self._objeto(
+                formulario,
+                f"/Type /XObject /Subtype /Form /BBox {caixa} /Resources << /Font << {self._fontes} >> >>",
+                zlib.compress(_textos_operadores(template.fixos)),
+            ))
+            self._formularios[template.chave] = formulario
+
+        conteudo_id = self._reservar()
+        partes.append(self._objeto(conteudo_id, "", conteudo))
+        pagina_id = self._reservar()
+        partes.append(self._objeto(
+            pagina_id,
+            f"<< /Type /Page /Parent 2 0 R /MediaBox {caixa} "
+            f"/Resources << /Font << {self._fontes} >> /XObject << /T {formulario} 0 R >> >> "
+            f"/Contents {conteudo_id} 0 R >>",
+        ))
+        self._paginas.append(pagina_id)
+        return b"".join(partes)
+
+    def _partes(self, valores, formato: str) -> Iterator[bytes]:
+        for i in range(0, len(valores), self.ITENS_POR_PARTE):
+            yield "".join(formato.format(valor) for valor in valores[i:i + self.ITENS_POR_PARTE]).encode("ascii")
+
+    def fim(self) -> Iterator[bytes]:
+        """Árvore de páginas, catálogo, xref e trailer, em partes."""
+        # Árvore de páginas plana: o dicionário /Kids sai em partes, sem montar a string inteira
+        self._offsets[1] = self._posicao
+        inicio = f"2 0 obj\n<< /Type /Pages /Count {len(self._paginas)} /Kids [".encode("ascii")
+        yield inicio
+        self._posicao += len(inicio)
+        for parte in self._partes(self._paginas, "{} 0 R "):
+            self._posicao += len(parte)
+            yield parte
+        fechamento = b"] >>\nendobj\n"
+        self._posicao += len(fechamento)
+        yield fechamento + self._objeto(1, "<< /Type /Catalog /Pages 2 0 R >>")
+
+        total = len(self._offsets) + 1
+        yield f"xref\n0 {total}\n0000000000 65535 f \n".encode("ascii")
+        yield from self._partes(self._offsets, "{:010d} 00000 n \n")
+        yield f"trailer\n<< /Size {total} /Root 1 0 R >>\nstartxref\n{self._posicao}\n%%EOF\n".encode("ascii")
+
+
+# ---------- ZPL (Zebra e compatíveis) ----------
+def _pontos(valor_mm: float) -> int:
+    return round(valor_mm * PONTOS_POR_MM)
+
+
+def _zpl_texto(texto: str) -> str:
+    # Com ^FH\, os caracteres de comando no texto vão em hexadecimal
+    return texto.replace("\\", "\\5C").replace("^", "\\5E").replace("~", "\\7E")
+
+
+def _zpl_etiqueta(dados: DadosEtiqueta) -> str:
+    layout = template_etiqueta(dados).layout
+    comandos = [
+        # ^CI28: texto em UTF-8 (acentos); 203 dpi
+        f"^XA^CI28^PW{_pontos(layout.largura)}^LL{_pontos(layout.altura)}",
+        # QR nativo da impressora: modelo 2, correção M, entrada automática
+        f"^FO{_pontos(layout.qr_x)},{_pontos(layout.altura - layout.qr_y - layout.qr_lado)}"
+        f"^BQN,2,{max(1, _pontos(layout.qr_lado) // QR_MODULOS_UUID)}^FDMA,{dados.qr_code}^FS",
+    ]
+    for _, campo, texto in _textos(layout, _valores(dados)):
+        # ^FO posiciona o topo do campo; o PDF posiciona a linha de base
+        altura = _pontos(campo.corpo * PT_EM_MM)
+        largura = altura if campo.fonte.endswith("-Bold") else round(altura * 0.8)
+        comandos.append(
+            f"^FO{_pontos(campo.x)},{_pontos(layout.altura - campo.y) - altura}"
+            f"^A0N,{altura},{largura}^FH\\^FD{_zpl_texto(texto)}^FS"
+        )
+    comandos.append("^XZ")
+    return "".join(comandos)
+
+
+def renderizar_zpl(etiquetas: Sequence[DadosEtiqueta]) -> bytes:
+    """Um formato ^XA...^XZ por etiqueta, enviado como está para a impressora."""
+    return "\n".join(_zpl_etiqueta(dados) for dados in etiquetas).encode("utf-8")
+
+
+# ---------- ESC/POS (impressoras de bobina) ----------
+ESC = b"\x1b"
+GS = b"\x1d"
+
+
+def _escpos_qr(conteudo: str) -> bytes:
+    dados = conteudo.encode("ascii", errors="replace")
+    tamanho = len(dados) + 3
+    return b"".join([
+        GS + b"(k\x04\x00\x31\x41\x32\x00",                         # modelo 2
+        GS + b"(k\x03\x00\x31\x43" + bytes([QR_MODULO_ESCPOS]),     # tamanho do módulo
+        GS + b"(k\x03\x00\x31\x45\x31",                             # correção M
+        GS + b"(k" + bytes([tamanho % 256, tamanho // 256]) + b"\x31\x50\x30" + dados,
+        GS + b"(k\x03\x00\x31\x51\x30",                             # imprime o QR guardado
+    ])
+
+
+def _escpos_etiqueta(dados: DadosEtiqueta) -> bytes:
+    partes = [
+        ESC + b"@",              # reinicia a impressora
+        ESC + b"t\x03",          # página de código CP860 (português)
+        ESC + b"a\x01",          # centraliza o QR
+        _escpos_qr(dados.qr_code),
+        b"\n",
+        ESC + b"a\x00",
+    ]
+    # Na bobina o texto corre de cima para baixo, na ordem do layout
+    for nome, campo, texto in _textos(template_etiqueta(dados).layout, _valores(dados)):
+        negrito = campo.fonte.endswith("-Bold")
+        partes.append(ESC + b"E" + (b"\x01" if negrito else b"\x00"))
+        # Nome do produto em altura dupla
+        partes.append(GS + b"!" + (b"\x01" if nome == "produto" else b"\x00"))
+        partes.append(texto.encode("cp860", errors="replace") + b"\n")
+    partes.append(ESC + b"E\x00" + GS + b"!\x00")
+    partes.append(GS + b"V\x42\x03")  # avança e corta (corte parcial)
+    return b"".join(partes)
+
+
+def renderizar_escpos(etiquetas: Sequence[DadosEtiqueta]) -> bytes:
+    """Uma etiqueta por corte de bobina."""
+    return b"".join(_escpos_etiqueta(dados) for dados in etiquetas)
+
+
+# ---------- Registro ----------
+@dataclass(frozen=True)
+class FormatoEtiqueta:
+    nome: str
+    media_type: str
+    extensao: str
+    renderizar: Callable[[Sequence[DadosEtiqueta]], bytes]
+    # reportlab/qrcode são CPU pesada: pool de processos e cache. Os formatos
+    # brutos custam microssegundos e são gerados na hora, sem cache
+    pesado: bool
+    # Entre as partes de um arquivo gerado em blocos (formatos brutos)
+    separador: bytes = b""
+
+
+FORMATOS = {
+    "pdf": FormatoEtiqueta("pdf", "application/pdf", "pdf", renderizar_pdf, pesado=True),
+    "zpl": FormatoEtiqueta("zpl", "text/plain; charset=utf-8", "zpl", renderizar_zpl, pesado=False, separador=b"\n"),
+    "escpos": FormatoEtiqueta("escpos", "application/octet-stream", "bin", renderizar_escpos, pesado=False),
+}
+FORMATO_PADRAO = "pdf"
+
+
+# ==================== CACHE ====================
+class CacheEtiquetas:
+    """LRU em memória (limitada em bytes) na frente de um diretório em disco."""
+
+    def __init__(self, diretorio: str, memoria_max_bytes: int, disco_max_bytes: int):
+        self.diretorio = diretorio
+        self.memoria_max_bytes = memoria_max_bytes
+        self.disco_max_bytes = disco_max_bytes
+        self._memoria: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memoria_bytes = 0
+        # Calculado na primeira gravação (varredura do diretório)
+        self._disco_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+        self._metricas = {"hits_memoria": 0, "hits_disco": 0, "misses": 0, "podas_disco": 0, "erros_disco": 0}
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave[:2], f"{chave}.pdf")
+
+    # ---------- memória ----------
+    def _guardar_memoria(self, chave: str, conteudo: bytes) -> None:
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                return
+            self._memoria[chave] = conteudo
+            self._memoria_bytes += len(conteudo)
+            while self._memoria_bytes > self.memoria_max_bytes and self._memoria:
+                _, descartado = self._memoria.popitem(last=False)
+                self._memoria_bytes -= len(descartado)
+
+    # ---------- disco ----------
+    def _ler_disco(self, chave: str) -> Optional[bytes]:
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "rb") as arquivo:
+                conteudo = arquivo.read()
+            # mtime = último acesso: a poda remove os menos usados
+            os.utime(caminho)
+            return conteudo
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            self._falha_disco(e)
+            return None
+
+    def _gravar_disco(self, chave: str, conteudo: bytes) -> None:
+        caminho = self._caminho(chave)
+        try:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            # Grava em arquivo temporário + rename: outro worker nunca lê um PDF pela metade
+            fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".tmp")
+            with os.fdopen(fd, "wb") as arquivo:
+                arquivo.write(conteudo)
+            os.replace(temporario, caminho)
+        except OSError as e:
+            self._falha_disco(e)
+            return
+
+        with self._lock:
+            if self._disco_bytes is not None:
+                self._disco_bytes += len(conteudo)
+            podar = self._disco_bytes is None or self._disco_bytes > self.disco_max_bytes
+        if podar:
+            self._podar_disco()
+
+    def _podar_disco(self) -> None:
+        """Varre o diretório e remove os arquivos mais antigos até o alvo."""
+        arquivos = []
+        for raiz, _, nomes in os.walk(self.diretorio):
+            for nome in nomes:
+                caminho = os.path.join(raiz, nome)
+                try:
+                    info = os.stat(caminho)
+                except OSError:
+                    continue
+                arquivos.append((info.st_mtime, info.st_size, caminho))
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        if total > self.disco_max_bytes:
+            alvo = self.disco_max_bytes * DISCO_ALVO_PODA
+            for _, tamanho, caminho in sorted(arquivos):
+                if total <= alvo:
+                    break
+                try:
+                    os.remove(caminho)
+                    total -= tamanho
+                except OSError:
+                    continue
+            with self._lock:
+                self._metricas["podas_disco"] += 1
+        with self._lock:
+            self._disco_bytes = total
+
+    def _falha_disco(self, erro: OSError) -> None:
+        # Disco indisponível não derruba a impressão: segue só com a memória
+        logger.warning("Cache de etiquetas em disco indisponível: %s", erro)
+        with self._lock:
+            self._metricas["erros_disco"] += 1
+
+    # ---------- API ----------
+    def obter(self, chave: str) -> Optional[bytes]:
+        with self._lock:
+            conteudo = self._memoria.get(chave)
+            if conteudo is not None:
+                self._memoria.move_to_end(chave)
+                self._metricas["hits_memoria"] += 1
+                return conteudo
+        conteudo = self._ler_disco(chave)
+        with self._lock:
+            self._metricas["hits_disco" if conteudo is not None else "misses"] += 1
+        if conteudo is not None:
+            self._guardar_memoria(chave, conteudo)
+        return conteudo
+
+    def guardar(self, chave: str, conteudo: bytes) -> None:
+        self._guardar_memoria(chave, conteudo)
+        self._gravar_disco(chave, conteudo)
+
+    def metricas(self) -> dict:
+        with self._lock:
+            consultas = self._metricas["hits_memoria"] + self._metricas["hits_disco"] + self._metricas["misses"]
+            acertos = self._metricas["hits_memoria"] + self._metricas["hits_disco"]
+            return {
+                **self._metricas,
+                "memoria_bytes": self._memoria_bytes,
+                "memoria_itens": len(self._memoria),
+                "disco_bytes": self._disco_bytes,
+                "taxa_acerto": round(acertos / consultas, 4) if consultas else None,
+            }
+
+
+cache_etiquetas = CacheEtiquetas(
+    diretorio=settings.ETIQUETAS_CACHE_DIR or os.path.join(tempfile.gettempdir(), "controle_cozinha_etiquetas"),
+    memoria_max_bytes=settings.ETIQUETAS_CACHE_MEMORIA_MB * 1024 * 1024,
+    disco_max_bytes=settings.ETIQUETAS_CACHE_DISCO_MB * 1024 * 1024,
+)
+
+
+# ==================== POOL DE RENDERIZAÇÃO ====================
+class FilaEtiquetasCheia(RuntimeError):
+    """Renderizações pendentes no limite: o cliente deve tentar de novo."""
+
+
+# Falhas passageiras do pool (fila cheia, timeout, processo que morreu e já foi
+# substituído): a requisição responde 503 com Retry-After em vez de 500
+ERROS_TEMPORARIOS_RENDERIZACAO = (FilaEtiquetasCheia, BrokenProcessPool, FuturesTimeoutError)
+
+
+def _renderizar_medido(renderizar: Callable, etiquetas: Sequence[DadosEtiqueta]) -> Tuple[object, float]:
+    # Executa no processo do pool: mede só a CPU da renderização, sem a fila
+    inicio = time.perf_counter()
+    conteudo = renderizar(etiquetas)
+    return conteudo, time.perf_counter() - inicio
+
+
+class PoolRenderizacao:
+    """ProcessPoolExecutor dedicado às etiquetas, com fila limitada.
+
+    QR code, PIL e reportlab são CPU puro e seguram o GIL: fora do processo
+    da API, uma rajada de impressões não atrasa os demais endpoints do
+    threadpool. Só dados simples (DadosEtiqueta) atravessam o pool.
+    """
+
+    def __init__(self, processos: int, fila_max: int, timeout: float = TIMEOUT_RENDERIZACAO):
+        self.processos = processos
+        self.fila_max = fila_max
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._vagas = threading.BoundedSemaphore(fila_max)
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._metricas = {
+            "renderizadas": 0,
+            "rejeitadas_fila_cheia": 0,
+            "erros": 0,
+            "reinicios": 0,
+            "render_total_s": 0.0,
+            "render_max_s": 0.0,
+            "espera_total_s": 0.0,
+        }
+
+    # ---------- ciclo de vida ----------
+    def _novo_executor(self) -> ProcessPoolExecutor:
+        # spawn: o processo da API tem threads e conexões abertas (fork não é seguro)
+        return ProcessPoolExecutor(
+            max_workers=self.processos,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def iniciar(self) -> None:
+        with self._lock:
+            if self._executor is None and self.processos > 0:
+                self._executor = self._novo_executor()
+
+    def _reiniciar(self, quebrado: ProcessPoolExecutor) -> Optional[ProcessPoolExecutor]:
+        """Troca o executor quebrado (um processo morreu: OOM, segfault no
+        reportlab/PIL) por um novo; sem isso toda renderização seguinte
+        falharia com BrokenProcessPool até reiniciar a API."""
+        with self._lock:
+            if self._executor is quebrado:
+                logger.error("❌ Pool de renderização de etiquetas quebrado, recriando processos")
+                self._executor = self._novo_executor()
+                self._metricas["reinicios"] += 1
+            # Outra thread já trocou (ou o pool foi parado): usa o atual
+            executor = self._executor
+        quebrado.shutdown(wait=False, cancel_futures=True)
+        return executor
+
+    def parar(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @property
+    def ativo(self) -> bool:
+        return self._executor is not None
+
+    # ---------- renderização ----------
+    def renderizar(self, etiquetas: Sequence[DadosEtiqueta], formato: str = "pdf") -> bytes:
+        """Renderiza no pool (ou na própria thread, se o pool não foi iniciado)."""
+        return self._executar(FORMATOS[formato].renderizar, etiquetas)
+
+    def paginas_pdf(self, etiquetas: Sequence[DadosEtiqueta]) -> List[bytes]:
+        """Content streams das páginas (PdfIncremental), renderizados no pool.
+
+        Usado no meio de uma resposta em streaming, que já começou: em vez de
+        recusar com a fila cheia, espera uma vaga (até o timeout).
+        """
+        return self._executar(paginas_pdf, etiquetas, espera=self.timeout)
+
+    def _executar(self, renderizar: Callable, etiquetas: Sequence[DadosEtiqueta], espera: float = 0):
+        executor = self._executor
+        if executor is None:
+            conteudo, duracao = _renderizar_medido(renderizar, etiquetas)
+            self._registrar(duracao, 0.0)
+            return conteudo
+
+        inicio = time.perf_counter()
+        etiquetas = list(etiquetas)
+        try:
+            try:
+                conteudo, duracao = self._submeter(executor, renderizar, etiquetas, espera)
+            except BrokenProcessPool:
+                # Tenta uma vez no executor novo; se quebrar de novo, o chamador responde 503
+                executor = self._reiniciar(executor)
+                if executor is None:
+                    raise
+                try:
+                    conteudo, duracao = self._submeter(executor, renderizar, etiquetas, espera)
+                except BrokenProcessPool:
+                    self._reiniciar(executor)
+                    raise
+        except FilaEtiquetasCheia:
+            raise
+        except Exception:
+            with self._lock:
+                self._metricas["erros"] += 1
+            raise
+        self._registrar(duracao, time.perf_counter() - inicio - duracao)
+        return conteudo
+
+    def _submeter(self, executor: ProcessPoolExecutor, renderizar: Callable, etiquetas: List[DadosEtiqueta], espera: float):
+        """Envia uma renderização ao pool e espera o resultado.
+
+        A vaga da fila só é devolvida quando o trabalho sai do pool (callback
+        do future), não quando a espera estoura: um timeout não abre espaço
+        para mais trabalho enquanto o anterior ainda ocupa os processos.
+        """
+        vaga = self._vagas.acquire(timeout=espera) if espera else self._vagas.acquire(blocking=False)
+        if not vaga:
+            with self._lock:
+                self._metricas["rejeitadas_fila_cheia"] += 1
+            raise FilaEtiquetasCheia("Fila de renderização de etiquetas cheia")
+        with self._lock:
+            self._pendentes += 1
+        try:
+            futuro = executor.submit(_renderizar_medido, renderizar, etiquetas)
+        except BaseException:
+            self._liberar_vaga()
+            raise
+        futuro.add_done_callback(self._liberar_vaga)
+        try:
+            return futuro.result(self.timeout)
+        except FuturesTimeoutError:
+            # Ainda na fila: sai dela (e o callback devolve a vaga); se já está
+            # rodando, a vaga continua ocupada até o processo terminar
+            futuro.cancel()
+            raise
+
+    def _liberar_vaga(self, _futuro=None) -> None:
+        with self._lock:
+            self._pendentes -= 1
+        self._vagas.release()
+
+    def _registrar(self, duracao: float, espera: float) -> None:
+        with self._lock:
+            self._metricas["renderizadas"] += 1
+            self._metricas["render_total_s"] += duracao
+            self._metricas["render_max_s"] = max(self._metricas["render_max_s"], duracao)
+            self._metricas["espera_total_s"] += max(espera, 0.0)
+
+    def metricas(self) -> dict:
+        with self._lock:
+            renderizadas = self._metricas["renderizadas"]
+            return {
+                "ativo": self.ativo,
+                "processos": self.processos,
+                "fila_max": self.fila_max,
+                "fila_atual": self._pendentes,
+                "renderizadas": renderizadas,
+                "rejeitadas_fila_cheia": self._metricas["rejeitadas_fila_cheia"],
+                "erros": self._metricas["erros"],
+                "reinicios": self._metricas["reinicios"],
+                "render_medio_ms": round(self._metricas["render_total_s"] / renderizadas * 1000, 2) if renderizadas else None,
+                "render_max_ms": round(self._metricas["render_max_s"] * 1000, 2),
+                "espera_media_ms": round(self._metricas["espera_total_s"] / renderizadas * 1000, 2) if renderizadas else None,
+            }
+
+
+pool_renderizacao = PoolRenderizacao(
+    processos=settings.ETIQUETAS_PROCESSOS,
+    fila_max=settings.ETIQUETAS_FILA_MAX,
+)
+
+
+def obter_etiquetas(etiquetas: Sequence[DadosEtiqueta], formato: str = FORMATO_PADRAO) -> bytes:
+    """Arquivo das etiquetas no formato pedido.
+
+    PDF: do cache ou renderizado agora no pool (e guardado); levanta
+    FilaEtiquetasCheia se o pool já tem renderizações demais pendentes (e
+    os demais ERROS_TEMPORARIOS_RENDERIZACAO em timeout ou pool quebrado).
+    Formatos brutos (ZPL, ESC/POS): gerados na hora, na própria thread.
+    """
+    tipo = FORMATOS[formato]
+    if not tipo.pesado:
+        return tipo.renderizar(etiquetas)
+
+    chave = chave_etiquetas(etiquetas, formato)
+    conteudo = cache_etiquetas.obter(chave)
+    if conteudo is None:
+        conteudo = pool_renderizacao.renderizar(etiquetas, formato)
+        cache_etiquetas.guardar(chave, conteudo)
+    return conteudo
+
+
+def _em_blocos(etiquetas: Iterable[DadosEtiqueta], tamanho: int) -> Iterator[List[DadosEtiqueta]]:
+    iterador = iter(etiquetas)
+    while True:
+        bloco = list(itertools.islice(iterador, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+def gerar_etiquetas(
+    etiquetas: Iterable[DadosEtiqueta],
+    formato: str = FORMATO_PADRAO,
+    por_bloco: int = ETIQUETAS_POR_BLOCO,
+) -> Iterator[bytes]:
+    """Arquivo das etiquetas em partes, `por_bloco` etiquetas por vez.
+
+    Para reimpressões de milhares de etiquetas: nem as etiquetas nem o
+    arquivo ficam inteiros em memória (sem cache). PDF: um único documento
+    (PdfIncremental) com as páginas renderizadas no pool; formatos brutos:
+    as etiquetas de cada bloco concatenadas.
+    """
+    tipo = FORMATOS[formato]
+    if not tipo.pesado:
+        for i, bloco in enumerate(_em_blocos(etiquetas, por_bloco)):
+            yield (tipo.separador if i else b"") + tipo.renderizar(bloco)
+        return
+
+    documento = PdfIncremental()
+    yield documento.inicio()
+    for bloco in _em_blocos(etiquetas, por_bloco):
+        paginas = pool_renderizacao.paginas_pdf(bloco)
+        yield b"".join(documento.pagina(template_etiqueta(dados), pagina) for dados, pagina in zip(bloco, paginas))
+    yield from documento.fim()
@@ -0,0 +1,259 @@
+"""Eventos em tempo real (SSE) via LISTEN/NOTIFY do PostgreSQL.
+
+Escritas de movimentações e produtos chamam `notificar_*` dentro da própria
+transação: o PostgreSQL só entrega o NOTIFY após o commit. Cada worker mantém
+uma única conexão em LISTEN (`broker`) e distribui os eventos em memória para
+as conexões SSE do tenant, sem nenhuma query extra por cliente.
+"""
+from __future__ import annotations
+import asyncio
+import contextlib
+import json
+import logging
+from collections import defaultdict
+from datetime import date
+from typing import Callable, Dict, List, Optional, Set
+
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CANAL = "cozinha_eventos"
+# Eventos pendentes por conexão antes de considerar o cliente atrasado
+FILA_MAX = 100
+# Intervalo do heartbeat (comentário SSE) por conexão
+HEARTBEAT_SEGUNDOS = 15
+# Janela de alerta de validade enviada em tempo real (mesma do frontend)
+ALERTA_VALIDADE_DIAS = 4
+
+
+# ==================== PUBLICAÇÃO ====================
+def _notificar(db: Session, tenant_id: int, evento: dict) -> None:
+    evento["tenant_id"] = tenant_id
+    db.execute(
+        text("SELECT pg_notify(:canal, :payload)"),
+        {"canal": CANAL, "payload": json.dumps(evento, default=str)},
+    )
+
+
+def notificar_estoque(db: Session, tenant_id: int, alimento, *, removido: bool = False) -> None:
+    """Publica o estado atual de estoque de um produto (entregue após o commit)."""
+    estoque = alimento.quantidade_estoque or 0
+    minimo = alimento.quantidade_minima or 0
+    ativo = not removido and alimento.ativo is not False
+    _notificar(db, tenant_id, {
+        "tipo": "estoque",
+        "alimento_id": alimento.id,
+        "nome": alimento.nome,
+        "quantidade_estoque": estoque,
+        "quantidade_minima": minimo,
+        "unidade_medida": alimento.unidade_medida,
+        "ativo": ativo,
+        "estoque_baixo": ativo and minimo > 0 and estoque <= minimo,
+    })
+
+
+def notificar_validade(
+    db: Session,
+    tenant_id: int,
+    alimento,
+    *,
+    lote_numero: Optional[str],
+    quantidade: float,
+    data_validade: Optional[date],
+) -> None:
+    """Publica um alerta se a entrada já chega dentro da janela de vencimento."""
+    if not data_validade:
+        return
+    dias_restantes = (data_validade - date.today()).days
+    if dias_restantes < 0 or dias_restantes > ALERTA_VALIDADE_DIAS:
+        return
+    _notificar(db, tenant_id, {
+        "tipo": "validade",
+        "alimento_id": alimento.id,
+        "alimento_nome": alimento.nome,
+        "lote_numero": lote_numero or "N/A",
+        "quantidade_disponivel": quantidade,
+        "unidade_medida": alimento.unidade_medida,
+        "data_validade": data_validade.isoformat(),
+        "dias_restantes": dias_restantes,
+        "urgencia": "critico" if dias_restantes <= 1 else "alto" if dias_restantes <= 2 else "medio",
+    })
+
+
+def notificar_versao(db: Session, tenant_id: int, versao: int) -> None:
+    """Publica a nova versão dos dados do tenant (entregue após o commit)."""
+    _notificar(db, tenant_id, {"tipo": "versao", "versao": versao})
+
+
+def notificar_impressao(
+    db: Session,
+    tenant_id: int,
+    job_id: int,
+    status: str,
+    *,
+    tentativas: int = 0,
+    erro_mensagem: Optional[str] = None,
+) -> None:
+    """Publica a mudança de status de um job da fila de impressão."""
+    _notificar(db, tenant_id, {
+        "tipo": "impressao",
+        "job_id": job_id,
+        "status": status,
+        "tentativas": tentativas,
+        "erro_mensagem": erro_mensagem,
+    })
+
+
+# ==================== DISTRIBUIÇÃO ====================
+class Assinatura:
+    """Uma conexão SSE: fila própria e limitada (backpressure por cliente)."""
+
+    def __init__(self, tenant_id: int):
+        self.tenant_id = tenant_id
+        self.fila: asyncio.Queue = asyncio.Queue(maxsize=FILA_MAX)
+
+    def entregar(self, evento: dict) -> None:
+        try:
+            self.fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente lento: descarta o acumulado e pede recarga completa
+            while not self.fila.empty():
+                self.fila.get_nowait()
+            self.fila.put_nowait({"tipo": "resync"})
+
+
+class EventBroker:
+    """Uma conexão LISTEN por worker, com fan-out em memória por tenant."""
+
+    def __init__(self):
+        self._assinaturas: Dict[int, Set[Assinatura]] = defaultdict(set)
+        # Consumidores internos de todos os eventos (ex.: invalidação de caches)
+        self._ouvintes: List[Callable[[dict], None]] = []
+        self._conn = None
+        self._conectado = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def total_assinaturas(self) -> int:
+        return sum(len(a) for a in self._assinaturas.values())
+
+    def assinar(self, tenant_id: int) -> Assinatura:
+        assinatura = Assinatura(tenant_id)
+        self._assinaturas[tenant_id].add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura) -> None:
+        assinantes = self._assinaturas.get(assinatura.tenant_id)
+        if assinantes is not None:
+            assinantes.discard(assinatura)
+            if not assinantes:
+                del self._assinaturas[assinatura.tenant_id]
+
+    def ouvir(self, callback: Callable[[dict], None]) -> None:
+        """Registra um consumidor interno que recebe todos os eventos do worker."""
+        self._ouvintes.append(callback)
+
+    def _repassar_ouvintes(self, evento: dict) -> None:
+        for callback in self._ouvintes:
+            try:
+                callback(evento)
+            except Exception:
+                logger.exception("Erro em ouvinte de eventos")
+
+    def publicar(self, evento: dict) -> None:
+        for assinatura in list(self._assinaturas.get(evento.get("tenant_id"), ())):
+            assinatura.entregar(evento)
+
+    def _publicar_todos(self, evento: dict) -> None:
+        for assinantes in list(self._assinaturas.values()):
+            for assinatura in list(assinantes):
+                assinatura.entregar(evento)
+
+    # ---------- conexão LISTEN ----------
+    def _conectar(self):
+        conn = psycopg2.connect(settings.DATABASE_URL)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CANAL}")
+        return conn
+
+    def _ler_notificacoes(self, caiu: asyncio.Event) -> None:
+        try:
+            self._conn.poll()
+        except Exception as e:
+            logger.error("❌ Conexão LISTEN perdida: %s", e)
+            caiu.set()
+            return
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            try:
+                evento = json.loads(notify.payload)
+            except ValueError:
+                logger.warning("Payload de evento inválido: %s", notify.payload[:200])
+                continue
+            self._repassar_ouvintes(evento)
+            self.publicar(evento)
+
+    async def _executar(self) -> None:
+        loop = asyncio.get_running_loop()
+        tentativa = 0
+        while True:
+            caiu = asyncio.Event()
+            fd = None
+            try:
+                self._conn = await asyncio.to_thread(self._conectar)
+                fd = self._conn.fileno()
+                loop.add_reader(fd, self._ler_notificacoes, caiu)
+                self._conectado = True
+                logger.info("✅ Listener de eventos conectado (canal %s)", CANAL)
+                # A partir daqui nenhum evento se perde: ouvintes podem (re)carregar estado
+                self._repassar_ouvintes({"tipo": "conectado"})
+                if tentativa:
+                    # Eventos podem ter sido perdidos enquanto estava desconectado
+                    self._repassar_ouvintes({"tipo": "resync"})
+                    self._publicar_todos({"tipo": "resync"})
+                tentativa = 0
+                await caiu.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("❌ Falha no listener de eventos: %s", e)
+            finally:
+                self._conectado = False
+                if fd is not None:
+                    loop.remove_reader(fd)
+                if self._conn is not None:
+                    with contextlib.suppress(Exception):
+                        self._conn.close()
+                    self._conn = None
+            tentativa += 1
+            await asyncio.sleep(min(2 ** tentativa, 60))
+
+    def iniciar(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._executar())
+
+    async def parar(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    @property
+    def ativo(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def conectado(self) -> bool:
+        """True enquanto a conexão LISTEN está ativa (nenhum evento sendo perdido)."""
+        return self._conectado
+
+
+broker = EventBroker()
@@ -0,0 +1,289 @@
+"""Fila assíncrona de impressão de etiquetas (print_jobs).
+
+POST /impressao grava o job com os dados das etiquetas já resolvidos
+(etiqueta_data) e responde na hora: a cozinha enfileira centenas de
+etiquetas e segue trabalhando. Os workers reservam jobs em lote com
+`FOR UPDATE SKIP LOCKED` (vários processos consomem a fila sem disputar as
+mesmas linhas), renderizam no pool de etiquetas e deixam o PDF no cache.
+Falhas voltam para a fila com backoff exponencial até MAX_TENTATIVAS; a
+mudança de status de cada job chega ao tablet pelo stream de eventos.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import List, Optional, Sequence
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import MovimentacaoEstoque, PrintJob, StatusPrintJob
+from app.services.etiquetas import (
+    FORMATO_PADRAO,
+    DadosEtiqueta,
+    FilaEtiquetasCheia,
+    chave_etiquetas,
+    etiquetas_de_json,
+    etiquetas_para_json,
+    obter_etiquetas,
+    pool_renderizacao,
+)
+from app.services.eventos import broker, notificar_impressao
+from app.services.versao_dados import incrementar_versoes
+
+logger = logging.getLogger(__name__)
+
+# Jobs reservados por rodada do worker
+JOBS_POR_LOTE = 10
+# Tentativas de renderização antes de marcar o job como falho
+MAX_TENTATIVAS = 5
+BACKOFF_BASE_SEGUNDOS = 5
+BACKOFF_MAX_SEGUNDOS = 10 * 60
+# Prazo para o worker concluir um job reservado; depois disso outro worker o retoma
+RESERVA_SEGUNDOS = 2 * 60
+# Sem evento de job novo, o worker ainda verifica a fila neste intervalo (backoffs vencidos)
+POLL_SEGUNDOS = 5
+# Jobs finalizados (concluídos ou falhos) ficam consultáveis por este período
+RETENCAO_JOBS_DIAS = 7
+JOBS_POR_LIMPEZA = 1000
+
+ABERTOS = (StatusPrintJob.PENDING, StatusPrintJob.PRINTING)
+FINALIZADOS = (StatusPrintJob.COMPLETED, StatusPrintJob.FAILED)
+
+# Acorda o worker deste processo quando qualquer processo enfileira um job
+novos_jobs = asyncio.Event()
+
+
+@dataclass
+class _JobReservado:
+    id: int
+    tenant_id: int
+    tentativas: int
+    movimentacao_ids: List[int]
+    etiquetas: List[DadosEtiqueta]
+    formato: str
+    chave: Optional[str] = None
+    erro: Optional[Exception] = None
+
+
+def _backoff(tentativas: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_BASE_SEGUNDOS * 2 ** max(tentativas - 1, 0), BACKOFF_MAX_SEGUNDOS))
+
+
+# ==================== ENFILEIRAMENTO ====================
+def enfileirar(
+    db: Session,
+    tenant_id: int,
+    usuario_id: int,
+    movimentacao_ids: Sequence[int],
+    etiquetas: Sequence[DadosEtiqueta],
+    formato: str = FORMATO_PADRAO,
+) -> PrintJob:
+    """Cria o job (sem commit); o worker é acordado pelo NOTIFY após o commit."""
+    job = PrintJob(
+        tenant_id=tenant_id,
+        usuario_id=usuario_id,
+        status=StatusPrintJob.PENDING,
+        tentativas=0,
+        total_etiquetas=len(etiquetas),
+        formato=formato,
+        etiqueta_data=json.dumps({
+            "movimentacao_ids": list(movimentacao_ids),
+            "etiquetas": etiquetas_para_json(etiquetas),
+        }, ensure_ascii=False),
+    )
+    db.add(job)
+    db.flush()
+    notificar_impressao(db, tenant_id, job.id, StatusPrintJob.PENDING.value)
+    return job
+
+
+def etiquetas_do_job(job: PrintJob) -> List[DadosEtiqueta]:
+    return etiquetas_de_json(json.loads(job.etiqueta_data)["etiquetas"])
+
+
+# ==================== CONSUMO ====================
+def _reservar(db: Session, limite: int) -> List[_JobReservado]:
+    """Reserva até `limite` jobs vencidos: pendentes ou com a reserva expirada
+    (worker que caiu no meio). Servido pelo índice parcial ix_print_jobs_abertos."""
+    agora = func.now()
+
+    # Reserva expirada sem tentativas restantes: o job derruba quem o processa
+    esgotados = db.execute(
+        update(PrintJob).where(
+            PrintJob.status == StatusPrintJob.PRINTING,
+            PrintJob.proxima_tentativa_em <= agora,
+            PrintJob.tentativas >= MAX_TENTATIVAS
+        ).values(
+            status=StatusPrintJob.FAILED,
+            erro_mensagem="Tempo de renderização esgotado",
+            completed_at=agora
+        ).returning(PrintJob.id, PrintJob.tenant_id, PrintJob.tentativas)
+    ).all()
+    for linha in esgotados:
+        notificar_impressao(
+            db, linha.tenant_id, linha.id, StatusPrintJob.FAILED.value,
+            tentativas=linha.tentativas, erro_mensagem="Tempo de renderização esgotado"
+        )
+
+    vencidos = select(PrintJob.id).where(
+        PrintJob.status.in_(ABERTOS),
+        PrintJob.proxima_tentativa_em <= agora
+    ).order_by(
+        PrintJob.proxima_tentativa_em, PrintJob.id
+    ).limit(limite).with_for_update(skip_locked=True).scalar_subquery()
+
+    linhas = db.execute(
+        update(PrintJob).where(
+            PrintJob.id.in_(vencidos)
+        ).values(
+            status=StatusPrintJob.PRINTING,
+            tentativas=PrintJob.tentativas + 1,
+            proxima_tentativa_em=agora + timedelta(seconds=RESERVA_SEGUNDOS)
+        ).returning(PrintJob.id, PrintJob.tenant_id, PrintJob.tentativas, PrintJob.formato, PrintJob.etiqueta_data)
+    ).all()
+
+    jobs = []
+    for linha in linhas:
+        dados = json.loads(linha.etiqueta_data)
+        jobs.append(_JobReservado(
+            id=linha.id,
+            tenant_id=linha.tenant_id,
+            tentativas=linha.tentativas,
+            movimentacao_ids=dados["movimentacao_ids"],
+            etiquetas=etiquetas_de_json(dados["etiquetas"]),
+            formato=linha.formato or FORMATO_PADRAO,
+        ))
+        notificar_impressao(
+            db, linha.tenant_id, linha.id, StatusPrintJob.PRINTING.value, tentativas=linha.tentativas
+        )
+    return jobs
+
+
+def _renderizar(job: _JobReservado) -> _JobReservado:
+    try:
+        # PDF: do cache (reimpressão) ou renderizado agora no pool e guardado nele;
+        # formatos brutos só são validados aqui (o download os gera na hora)
+        obter_etiquetas(job.etiquetas, job.formato)
+        job.chave = chave_etiquetas(job.etiquetas, job.formato)
+    except Exception as e:
+        job.erro = e
+    return job
+
+
+def _finalizar(db: Session, jobs: List[_JobReservado]) -> None:
+    """Grava o resultado do lote numa transação só (sem commit)."""
+    agora = func.now()
+    impressas: List[int] = []
+
+    for job in jobs:
+        if job.chave is not None:
+            db.execute(
+                update(PrintJob).where(PrintJob.id == job.id).values(
+                    status=StatusPrintJob.COMPLETED,
+                    arquivo_chave=job.chave,
+                    erro_mensagem=None,
+                    printed_at=agora,
+                    completed_at=agora
+                )
+            )
+            impressas.extend(job.movimentacao_ids)
+            notificar_impressao(db, job.tenant_id, job.id, StatusPrintJob.COMPLETED.value, tentativas=job.tentativas)
+            continue
+
+        if isinstance(job.erro, FilaEtiquetasCheia):
+            # Pool ocupado com as impressões síncronas: devolve sem consumir tentativa
+            tentativas, atraso, erro = job.tentativas - 1, timedelta(seconds=BACKOFF_BASE_SEGUNDOS), None
+        else:
+            tentativas, atraso, erro = job.tentativas, _backoff(job.tentativas), str(job.erro)[:500]
+            logger.warning("Falha ao renderizar job de impressão %s (tentativa %s): %s", job.id, tentativas, job.erro)
+
+        falhou = erro is not None and tentativas >= MAX_TENTATIVAS
+        status_job = StatusPrintJob.FAILED if falhou else StatusPrintJob.PENDING
+        db.execute(
+            update(PrintJob).where(PrintJob.id == job.id).values(
+                status=status_job,
+                tentativas=tentativas,
+                erro_mensagem=erro,
+                proxima_tentativa_em=agora + atraso,
+                completed_at=agora if falhou else None
+            )
+        )
+        notificar_impressao(
+            db, job.tenant_id, job.id, status_job.value, tentativas=tentativas, erro_mensagem=erro
+        )
+
+    if impressas:
+        # Um único UPDATE para todas as etiquetas do lote (reimpressões não escrevem)
+        tenant_ids = db.execute(
+            update(MovimentacaoEstoque).where(
+                MovimentacaoEstoque.id.in_(impressas),
+                or_(MovimentacaoEstoque.etiqueta_impressa == False, MovimentacaoEstoque.etiqueta_impressa == None)
+            ).values(etiqueta_impressa=True).returning(MovimentacaoEstoque.tenant_id)
+        ).scalars().all()
+        incrementar_versoes(db, sorted(set(tenant_ids)))
+
+
+def processar_fila(limite: int = JOBS_POR_LOTE) -> int:
+    """Uma rodada do worker: reserva, renderiza e finaliza um lote de jobs.
+
+    Retorna quantos jobs foram reservados (igual a `limite`: pode haver mais).
+    """
+    db = SessionLocal()
+    try:
+        # Reserva curta: os locks de linha só duram até este commit
+        jobs = _reservar(db, limite)
+        db.commit()
+        if not jobs:
+            return 0
+
+        # Os jobs do lote disputam o pool de processos em paralelo
+        with ThreadPoolExecutor(max_workers=max(1, min(len(jobs), pool_renderizacao.processos))) as executor:
+            jobs = list(executor.map(_renderizar, jobs))
+
+        _finalizar(db, jobs)
+        db.commit()
+        return len(jobs)
+    finally:
+        db.close()
+
+
+# ==================== LIMPEZA ====================
+def limpar_jobs_finalizados(
+    retencao_dias: int = RETENCAO_JOBS_DIAS,
+    jobs_por_lote: int = JOBS_POR_LIMPEZA,
+) -> int:
+    """Apaga, em lotes, os jobs finalizados há mais que a retenção.
+
+    O PDF continua no cache de etiquetas até ser podado por tamanho.
+    """
+    corte = func.now() - timedelta(days=retencao_dias)
+    db = SessionLocal()
+    try:
+        total = 0
+        while True:
+            # Servido pelo índice parcial ix_print_jobs_finalizados
+            ids = select(PrintJob.id).where(
+                PrintJob.status.in_(FINALIZADOS),
+                PrintJob.completed_at < corte
+            ).limit(jobs_por_lote).scalar_subquery()
+            removidos = db.execute(delete(PrintJob).where(PrintJob.id.in_(ids))).rowcount or 0
+            db.commit()
+            total += removidos
+            if removidos < jobs_por_lote:
+                return total
+    finally:
+        db.close()
+
+
+def _ao_evento(evento: dict) -> None:
+    # Jobs novos e devolvidos à fila, de qualquer worker, acordam o consumidor local
+    if evento.get("tipo") == "impressao" and evento.get("status") == StatusPrintJob.PENDING.value:
+        novos_jobs.set()
+
+
+broker.ouvir(_ao_evento)
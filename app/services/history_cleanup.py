@@ -1,10 +1,11 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
-from sqlalchemy import delete
+from sqlalchemy import delete, select
 
 from app.database import SessionLocal
 from app.models import MovimentacaoEstoque
+from app.services.versao_dados import incrementar_versoes
 
 RETENTION_DAYS = 90
 
@@ -15,8 +16,13 @@ def cleanup_history(retention_days: Optional[int] = None) -> int:
     cutoff = datetime.utcnow() - timedelta(days=days)
     session = SessionLocal()
     try:
-        stmt = delete(MovimentacaoEstoque).where(MovimentacaoEstoque.created_at < cutoff)
-        result = session.execute(stmt)
+        antigas = MovimentacaoEstoque.created_at < cutoff
+        tenant_ids = session.execute(
+            select(MovimentacaoEstoque.tenant_id).where(antigas).distinct()
+        ).scalars().all()
+        result = session.execute(delete(MovimentacaoEstoque).where(antigas))
+        # Listagens de movimentações mudaram: invalida os ETags dos tenants afetados
+        incrementar_versoes(session, tenant_ids)
         session.commit()
         return result.rowcount or 0
     finally:
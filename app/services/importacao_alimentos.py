@@ -0,0 +1,321 @@
+"""Importação em massa do catálogo de produtos (CSV / XLSX).
+
+O arquivo é lido e validado linha a linha; as linhas válidas vão para um
+CSV temporário que é carregado com `COPY` numa tabela de staging. Um único
+`INSERT ... ON CONFLICT` faz o upsert de todas elas, com os produtos
+existentes identificados pelo código externo ou, sem ele, pelo nome.
+"""
+from __future__ import annotations
+import codecs
+import csv
+import io
+import itertools
+import math
+import tempfile
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from zipfile import BadZipFile
+
+import openpyxl
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import Alimento
+
+# Limite de linhas por arquivo e de erros devolvidos na resposta
+MAX_LINHAS = 50_000
+MAX_ERROS = 1000
+# Memória usada pelo CSV de staging antes de ir para disco
+STAGING_MEMORIA = 8 * 1024 * 1024
+
+
+def _texto(coluna: str) -> Callable[[object], Optional[str]]:
+    tamanho = Alimento.__table__.c[coluna].type.length
+
+    def converter(valor):
+        valor = str(valor).strip()
+        if tamanho and len(valor) > tamanho:
+            raise ValueError(f"máximo de {tamanho} caracteres")
+        return valor
+
+    return converter
+
+
+def _decimal(valor) -> float:
+    if isinstance(valor, (int, float)):
+        numero = float(valor)
+    else:
+        # Aceita vírgula decimal (planilhas em pt-BR)
+        valor = str(valor).strip().replace(" ", "")
+        if "," in valor:
+            valor = valor.replace(".", "").replace(",", ".")
+        try:
+            numero = float(valor)
+        except ValueError:
+            raise ValueError("número inválido")
+    if not math.isfinite(numero):
+        raise ValueError("número inválido")
+    if numero < 0:
+        raise ValueError("não pode ser negativo")
+    return numero
+
+
+def _inteiro(valor) -> int:
+    numero = _decimal(valor)
+    if not numero.is_integer():
+        raise ValueError("deve ser um número inteiro")
+    return int(numero)
+
+
+# Colunas aceitas no arquivo, na ordem da tabela de staging
+CAMPOS: Dict[str, Callable[[object], object]] = {
+    "codigo": _texto("codigo"),
+    "nome": _texto("nome"),
+    "categoria": _texto("categoria"),
+    "subcategoria": _texto("subcategoria"),
+    "tipo_conservacao": _texto("tipo_conservacao"),
+    "unidade_medida": _texto("unidade_medida"),
+    "quantidade_estoque": _decimal,
+    "quantidade_minima": _decimal,
+    "tipo_embalagem": _texto("tipo_embalagem"),
+    "unidades_por_embalagem": _inteiro,
+    "preco_unitario": _decimal,
+    "fornecedor": _texto("fornecedor"),
+    "observacoes": str,
+}
+
+CRIAR_STAGING = """
+CREATE TEMP TABLE importacao_alimentos (
+    linha integer NOT NULL,
+    codigo varchar(64),
+    nome varchar(255) NOT NULL,
+    categoria varchar(100),
+    subcategoria varchar(120),
+    tipo_conservacao varchar(20),
+    unidade_medida varchar(20),
+    quantidade_estoque double precision,
+    quantidade_minima double precision,
+    tipo_embalagem varchar(50),
+    unidades_por_embalagem integer,
+    preco_unitario double precision,
+    fornecedor varchar(255),
+    observacoes text,
+    alimento_id integer
+) ON COMMIT DROP
+"""
+
+# Produtos existentes: primeiro pelo código externo, depois pelo nome
+# (índices parciais ix_alimentos_tenant_codigo / ix_alimentos_tenant_nome_lower)
+CASAR_POR_CODIGO = """
+UPDATE importacao_alimentos s
+SET alimento_id = a.id
+FROM alimentos a
+WHERE s.codigo IS NOT NULL
+  AND a.tenant_id = :tenant_id
+  AND a.ativo = true
+  AND a.codigo IS NOT NULL
+  AND a.codigo = s.codigo
+"""
+
+CASAR_POR_NOME = """
+UPDATE importacao_alimentos s
+SET alimento_id = (
+    SELECT min(a.id) FROM alimentos a
+    WHERE a.tenant_id = :tenant_id
+      AND a.ativo = true
+      AND lower(a.nome) = lower(s.nome)
+)
+WHERE s.alimento_id IS NULL
+"""
+
+# Um produto casado por mais de uma linha fica com a última do arquivo.
+# O estoque só é gravado na criação: em produtos existentes ele muda apenas
+# por movimentações. Células vazias mantêm o valor atual.
+UPSERT = """
+INSERT INTO alimentos (
+    id, tenant_id, codigo, nome, categoria, subcategoria, tipo_conservacao,
+    unidade_medida, quantidade_estoque, quantidade_minima, tipo_embalagem,
+    unidades_por_embalagem, preco_unitario, fornecedor, observacoes,
+    ativo, created_by, updated_by
+)
+SELECT
+    COALESCE(s.alimento_id, nextval(pg_get_serial_sequence('alimentos', 'id'))),
+    :tenant_id, s.codigo, s.nome, s.categoria, s.subcategoria, s.tipo_conservacao,
+    s.unidade_medida, COALESCE(s.quantidade_estoque, 0), COALESCE(s.quantidade_minima, 0),
+    s.tipo_embalagem, s.unidades_por_embalagem, s.preco_unitario, s.fornecedor, s.observacoes,
+    true, :user_id, :user_id
+FROM (
+    SELECT DISTINCT ON (COALESCE(alimento_id, -linha)) *
+    FROM importacao_alimentos
+    ORDER BY COALESCE(alimento_id, -linha), linha DESC
+) s
+ON CONFLICT (id) DO UPDATE SET
+    codigo = COALESCE(EXCLUDED.codigo, alimentos.codigo),
+    nome = EXCLUDED.nome,
+    categoria = COALESCE(EXCLUDED.categoria, alimentos.categoria),
+    subcategoria = COALESCE(EXCLUDED.subcategoria, alimentos.subcategoria),
+    tipo_conservacao = COALESCE(EXCLUDED.tipo_conservacao, alimentos.tipo_conservacao),
+    unidade_medida = COALESCE(EXCLUDED.unidade_medida, alimentos.unidade_medida),
+    quantidade_minima = COALESCE(EXCLUDED.quantidade_minima, alimentos.quantidade_minima),
+    tipo_embalagem = COALESCE(EXCLUDED.tipo_embalagem, alimentos.tipo_embalagem),
+    unidades_por_embalagem = COALESCE(EXCLUDED.unidades_por_embalagem, alimentos.unidades_por_embalagem),
+    preco_unitario = COALESCE(EXCLUDED.preco_unitario, alimentos.preco_unitario),
+    fornecedor = COALESCE(EXCLUDED.fornecedor, alimentos.fornecedor),
+    observacoes = COALESCE(EXCLUDED.observacoes, alimentos.observacoes),
+    updated_by = EXCLUDED.updated_by,
+    updated_at = now()
+WHERE alimentos.tenant_id = EXCLUDED.tenant_id
+RETURNING (xmax = 0) AS inserido
+"""
+
+
+class ArquivoInvalido(ValueError):
+    """Arquivo ilegível ou sem as colunas obrigatórias (erro do arquivo todo)."""
+
+
+@dataclass
+class ResultadoValidacao:
+    total_linhas: int = 0
+    validas: int = 0
+    total_erros: int = 0
+    erros: List[dict] = field(default_factory=list)
+    staging: Optional[BinaryIO] = None
+
+    def erro(self, linha: int, mensagem: str) -> None:
+        self.total_erros += 1
+        if len(self.erros) < MAX_ERROS:
+            self.erros.append({"linha": linha, "erro": mensagem})
+
+
+# ==================== LEITURA ====================
+def _e_xlsx(arquivo: BinaryIO) -> bool:
+    # XLSX é um zip: começa com a assinatura "PK\x03\x04"
+    inicio = arquivo.read(4)
+    arquivo.seek(0)
+    return inicio == b"PK\x03\x04"
+
+
+def _linhas_csv(arquivo: BinaryIO) -> Iterator[Tuple]:
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    try:
+        cabecalho = texto.readline()
+        # Aceita o CSV da exportação (;) e o padrão com vírgula
+        delimitador = ";" if cabecalho.count(";") >= cabecalho.count(",") else ","
+        yield from csv.reader(itertools.chain([cabecalho], texto), delimiter=delimitador)
+    except UnicodeDecodeError:
+        raise ArquivoInvalido("O arquivo CSV deve estar em UTF-8")
+    except csv.Error as e:
+        # Ex.: campo maior que o limite do módulo csv (aspas sem fechamento)
+        raise ArquivoInvalido(f"Arquivo CSV inválido: {e}")
+    finally:
+        texto.detach()
+
+
+def _linhas_xlsx(arquivo: BinaryIO) -> Iterator[Tuple]:
+    try:
+        # read_only: lê a planilha em streaming, sem carregá-la inteira
+        workbook = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    except (BadZipFile, KeyError, OSError) as e:
+        raise ArquivoInvalido(f"Arquivo XLSX inválido: {e}")
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _mapear_cabecalho(cabecalho: Tuple) -> Dict[int, str]:
+    colunas = {}
+    for i, nome in enumerate(cabecalho):
+        nome = str(nome).strip().lower() if nome is not None else ""
+        # Colunas desconhecidas (ex.: id, created_at da exportação) são ignoradas
+        if nome in CAMPOS:
+            colunas[i] = nome
+    if "nome" not in colunas.values():
+        raise ArquivoInvalido("Coluna obrigatória ausente: nome")
+    return colunas
+
+
+# ==================== VALIDAÇÃO ====================
+def validar_arquivo(arquivo: BinaryIO) -> ResultadoValidacao:
+    """Valida o arquivo em uma passada e grava as linhas válidas para o COPY."""
+    linhas = _linhas_xlsx(arquivo) if _e_xlsx(arquivo) else _linhas_csv(arquivo)
+    cabecalho = next(linhas, None)
+    if cabecalho is None:
+        raise ArquivoInvalido("Arquivo vazio")
+    colunas = _mapear_cabecalho(cabecalho)
+
+    resultado = ResultadoValidacao()
+    staging = tempfile.SpooledTemporaryFile(max_size=STAGING_MEMORIA, mode="w+b")
+    writer = csv.writer(codecs.getwriter("utf-8")(staging), lineterminator="\n")
+    vistas: Dict[Tuple[str, str], int] = {}
+
+    try:
+        for numero, linha in enumerate(linhas, 2):
+            if not any(v is not None and str(v).strip() for v in linha):
+                continue
+            resultado.total_linhas += 1
+            if resultado.total_linhas > MAX_LINHAS:
+                raise ArquivoInvalido(f"O arquivo excede o limite de {MAX_LINHAS} linhas")
+
+            valores = dict.fromkeys(CAMPOS)
+            problemas = []
+            for i, coluna in colunas.items():
+                bruto = linha[i] if i < len(linha) else None
+                if bruto is None or (isinstance(bruto, str) and not bruto.strip()):
+                    continue
+                try:
+                    valores[coluna] = CAMPOS[coluna](bruto)
+                except ValueError as e:
+                    problemas.append(f"{coluna}: {e}")
+
+            if not valores["nome"]:
+                problemas.append("nome: obrigatório")
+            if problemas:
+                resultado.erro(numero, "; ".join(problemas))
+                continue
+
+            chave = ("codigo", valores["codigo"]) if valores["codigo"] else ("nome", valores["nome"].lower())
+            if chave in vistas:
+                resultado.erro(numero, f"Produto repetido no arquivo (linha {vistas[chave]})")
+                continue
+            vistas[chave] = numero
+
+            # None vira campo vazio sem aspas, que o COPY lê como NULL
+            writer.writerow([numero, *valores.values()])
+            resultado.validas += 1
+    except BaseException:
+        # Arquivo inválido no meio da leitura: não deixa o staging (nem a planilha) aberto
+        staging.close()
+        linhas.close()
+        raise
+
+    staging.seek(0)
+    resultado.staging = staging
+    return resultado
+
+
+# ==================== CARGA ====================
+def carregar(db: Session, tenant_id: int, user_id: int, staging: BinaryIO) -> Tuple[int, int]:
+    """COPY das linhas validadas + upsert set-based (sem commit).
+
+    Retorna (inseridos, atualizados).
+    """
+    db.execute(text(CRIAR_STAGING))
+
+    # COPY pela conexão DBAPI (psycopg2) da própria transação da sessão
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY importacao_alimentos (linha, {', '.join(CAMPOS)}) FROM STDIN WITH (FORMAT csv)",
+            staging,
+        )
+    finally:
+        cursor.close()
+
+    parametros = {"tenant_id": tenant_id, "user_id": user_id}
+    db.execute(text(CASAR_POR_CODIGO), parametros)
+    db.execute(text(CASAR_POR_NOME), parametros)
+    linhas = db.execute(text(UPSERT), parametros).all()
+    inseridos = sum(1 for linha in linhas if linha.inserido)
+    return inseridos, len(linhas) - inseridos
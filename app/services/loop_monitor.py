@@ -0,0 +1,237 @@
+"""Monitor de travamentos do event loop (opcional, LOOP_MONITOR_ENABLED).
+
+Um heartbeat no loop mede o atraso (lag) continuamente. Uma thread vigia o
+heartbeat: se o loop fica parado além do limiar, ela captura a pilha da thread
+do loop *durante* o bloqueio e atribui o travamento à rota da requisição em
+execução e à função da aplicação (endpoint ou dependency) que o causou.
+"""
+from __future__ import annotations
+import asyncio
+import contextlib
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+
+# Limites superiores (ms) das faixas do histograma de lag
+FAIXAS_LAG_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Intervalo do heartbeat e da vigia
+INTERVALO_SEGUNDOS = 0.05
+# Culpados distintos mantidos (os de menor bloqueio total saem primeiro)
+MAX_CULPADOS = 100
+# Quadros guardados por pilha capturada
+MAX_QUADROS = 25
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _quadro_da_app(quadro: traceback.FrameSummary) -> bool:
+    return quadro.filename.startswith(_APP_DIR) and quadro.filename != __file__
+
+
+def _caminho(arquivo: str) -> str:
+    return os.path.relpath(arquivo, os.path.dirname(_APP_DIR))
+
+
+class MonitorLoop:
+    """Heartbeat no loop + thread vigia que captura a pilha do bloqueio."""
+
+    def __init__(self, limiar_ms: float = 100, intervalo: float = INTERVALO_SEGUNDOS):
+        self.limiar = limiar_ms / 1000
+        self.intervalo = intervalo
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_loop_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._vigia: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._ultimo_tick = time.perf_counter()
+        # Task -> scope ASGI da requisição que ela está processando
+        self._escopos: Dict[asyncio.Task, dict] = {}
+        # Travamento em andamento, capturado pela vigia e fechado pelo heartbeat
+        self._travamento: Optional[dict] = None
+        self._reiniciar_metricas()
+
+    def _reiniciar_metricas(self) -> None:
+        self._histograma = [0] * (len(FAIXAS_LAG_MS) + 1)
+        self._amostras = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._travamentos = 0
+        self._culpados: Dict[Tuple[str, str, str], dict] = {}
+
+    # ---------- ciclo de vida ----------
+    def iniciar(self) -> None:
+        if self.ativo:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread_loop_id = threading.get_ident()
+        self._ultimo_tick = time.perf_counter()
+        self._parar.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._vigia = threading.Thread(target=self._vigiar, name="loop-monitor", daemon=True)
+        self._vigia.start()
+
+    async def parar(self) -> None:
+        self._parar.set()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._vigia is not None:
+            self._vigia.join(timeout=1)
+            self._vigia = None
+
+    @property
+    def ativo(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ---------- atribuição a requisições ----------
+    def entrar_requisicao(self, scope: dict) -> Optional[asyncio.Task]:
+        task = asyncio.current_task()
+        if task is not None:
+            self._escopos[task] = scope
+        return task
+
+    def sair_requisicao(self, task: Optional[asyncio.Task]) -> None:
+        if task is not None:
+            self._escopos.pop(task, None)
+
+    # ---------- medição ----------
+    async def _heartbeat(self) -> None:
+        while True:
+            inicio = time.perf_counter()
+            await asyncio.sleep(self.intervalo)
+            agora = time.perf_counter()
+            self._ultimo_tick = agora
+            self._registrar_lag(agora - inicio - self.intervalo)
+
+    def _registrar_lag(self, lag: float) -> None:
+        lag = max(lag, 0.0)
+        lag_ms = lag * 1000
+        with self._lock:
+            self._amostras += 1
+            self._lag_total += lag
+            self._lag_max = max(self._lag_max, lag)
+            for i, limite in enumerate(FAIXAS_LAG_MS):
+                if lag_ms <= limite:
+                    self._histograma[i] += 1
+                    break
+            else:
+                self._histograma[-1] += 1
+
+            travamento, self._travamento = self._travamento, None
+            if travamento is not None:
+                self._travamentos += 1
+                self._acumular_culpado(travamento, lag_ms)
+
+    def _acumular_culpado(self, travamento: dict, bloqueio_ms: float) -> None:
+        chave = (travamento["rota"], travamento["origem"], travamento["local"])
+        culpado = self._culpados.get(chave)
+        if culpado is None:
+            if len(self._culpados) >= MAX_CULPADOS:
+                menor = min(self._culpados, key=lambda c: self._culpados[c]["bloqueio_total_ms"])
+                del self._culpados[menor]
+            culpado = self._culpados[chave] = {
+                "rota": travamento["rota"],
+                "origem": travamento["origem"],
+                "local": travamento["local"],
+                "ocorrencias": 0,
+                "bloqueio_total_ms": 0.0,
+                "bloqueio_max_ms": 0.0,
+            }
+        culpado["ocorrencias"] += 1
+        culpado["bloqueio_total_ms"] += bloqueio_ms
+        culpado["bloqueio_max_ms"] = max(culpado["bloqueio_max_ms"], bloqueio_ms)
+        culpado["pilha"] = travamento["pilha"]
+
+    # ---------- vigia (thread própria) ----------
+    def _vigiar(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            parado = time.perf_counter() - self._ultimo_tick - self.intervalo
+            if parado >= self.limiar and self._travamento is None:
+                travamento = self._capturar()
+                if travamento is not None:
+                    with self._lock:
+                        self._travamento = travamento
+
+    def _capturar(self) -> Optional[dict]:
+        quadro = sys._current_frames().get(self._thread_loop_id)
+        if quadro is None:
+            return None
+        pilha = traceback.extract_stack(quadro)
+
+        rota = "<fora de requisição>"
+        task = asyncio.current_task(self._loop)
+        scope = self._escopos.get(task) if task is not None else None
+        if scope is not None:
+            route = scope.get("route")
+            caminho = getattr(route, "path", None) or scope.get("path", "")
+            rota = f"{scope.get('method', '')} {caminho}".strip()
+
+        # Mais externo da app = endpoint/dependency; mais interno = linha que bloqueou
+        da_app = [q for q in pilha if _quadro_da_app(q)]
+        if da_app:
+            origem = f"{_caminho(da_app[0].filename)}:{da_app[0].name}"
+            local = f"{_caminho(da_app[-1].filename)}:{da_app[-1].lineno}"
+        else:
+            origem = local = f"{os.path.basename(pilha[-1].filename)}:{pilha[-1].lineno}"
+
+        return {
+            "rota": rota,
+            "origem": origem,
+            "local": local,
+            "pilha": traceback.format_list(pilha[-MAX_QUADROS:]),
+        }
+
+    # ---------- relatório ----------
+    def relatorio(self, top: int = 20) -> dict:
+        with self._lock:
+            faixas = [f"<={limite}ms" for limite in FAIXAS_LAG_MS] + [f">{FAIXAS_LAG_MS[-1]}ms"]
+            culpados: List[dict] = sorted(
+                self._culpados.values(), key=lambda c: c["bloqueio_total_ms"], reverse=True
+            )[:top]
+            return {
+                "ativo": self.ativo,
+                "limiar_ms": self.limiar * 1000,
+                "amostras": self._amostras,
+                "lag_medio_ms": (self._lag_total / self._amostras * 1000) if self._amostras else 0.0,
+                "lag_max_ms": self._lag_max * 1000,
+                "travamentos": self._travamentos,
+                "histograma": dict(zip(faixas, self._histograma)),
+                "culpados": [dict(c) for c in culpados],
+            }
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._reiniciar_metricas()
+
+
+class MonitorLoopMiddleware:
+    """Middleware ASGI que associa a task da requisição ao seu scope.
+
+    Deve ser o mais interno da pilha: os middlewares `BaseHTTPMiddleware` rodam
+    o restante da aplicação em outra task.
+    """
+
+    def __init__(self, app, monitor: MonitorLoop):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = self.monitor.entrar_requisicao(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.sair_requisicao(task)
+
+
+monitor = MonitorLoop(limiar_ms=settings.LOOP_MONITOR_THRESHOLD_MS)
@@ -0,0 +1,190 @@
+"""Previsão de ruptura de estoque e sugestão de reposição (vetorizada com NumPy).
+
+A matriz de consumo (produtos x dias) de um restaurante vem do rollup
+`consumo_diario` em uma única query e todas as estatísticas são calculadas
+de uma vez para o catálogo inteiro. O resultado fica em cache por tenant
+até a próxima movimentação (ver `invalidar_previsao`).
+"""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Alimento, ConsumoDiario
+
+# Dias de antecedência entre o pedido e a chegada do produto
+LEAD_TIME_DIAS = 2
+# Nível de serviço do estoque de segurança (z ~ 95%)
+Z_SEGURANCA = 1.65
+# Janela da média móvel curta (a longa é a janela inteira)
+JANELA_CURTA = 7
+# Cada worker tem o seu cache; o TTL limita a defasagem entre workers
+CACHE_TTL_SEGUNDOS = 600
+# Tenants mantidos em memória por worker e combinações (janela, horizonte) por tenant (LRU)
+MAX_TENANTS = 256
+MAX_PREVISOES_POR_TENANT = 8
+
+_cache: "OrderedDict[int, OrderedDict[Tuple[int, int], Tuple[float, List[dict]]]]" = OrderedDict()
+_geracao: Dict[int, int] = {}
+_cache_lock = threading.Lock()
+
+
+def invalidar_previsao(tenant_id: int) -> None:
+    """Descarta as previsões em cache do tenant (chamar após o commit de cada movimentação)."""
+    with _cache_lock:
+        _cache.pop(tenant_id, None)
+        _geracao[tenant_id] = _geracao.get(tenant_id, 0) + 1
+
+
+def calcular_previsao(
+    consumo: np.ndarray,
+    estoque: np.ndarray,
+    minimo: np.ndarray,
+    horizonte: int,
+) -> Dict[str, np.ndarray]:
+    """Calcula as métricas de previsão para todos os produtos de uma vez.
+
+    `consumo` é a matriz (produtos x dias) de saídas diárias, do dia mais
+    antigo para o mais recente. Retorna arrays alinhados com as linhas.
+    """
+    n_produtos, n_dias = consumo.shape
+    curta = min(JANELA_CURTA, n_dias)
+
+    media_longa = consumo.mean(axis=1)
+    media_curta = consumo[:, -curta:].mean(axis=1)
+    desvio = consumo.std(axis=1)
+
+    # Tendência: inclinação da regressão linear (consumo/dia por dia) em todas as linhas
+    t = np.arange(n_dias, dtype=np.float64)
+    t_centrado = t - t.mean()
+    var_t = float((t_centrado ** 2).sum())
+    if var_t > 0:
+        tendencia = (consumo - media_longa[:, None]) @ t_centrado / var_t
+    else:
+        tendencia = np.zeros(n_produtos)
+
+    # Demanda diária projetada: média curta ajustada pela tendência, nunca negativa
+    demanda_diaria = np.maximum(media_curta + tendencia * (curta / 2), 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dias_ate_ruptura = np.where(demanda_diaria > 0, estoque / demanda_diaria, np.inf)
+    dias_ate_ruptura = np.maximum(dias_ate_ruptura, 0.0)
+
+    cobertura = LEAD_TIME_DIAS + horizonte
+    estoque_seguranca = Z_SEGURANCA * desvio * np.sqrt(cobertura)
+    necessidade = demanda_diaria * cobertura + estoque_seguranca + minimo
+    sugestao_reposicao = np.maximum(necessidade - estoque, 0.0)
+
+    return {
+        "media_diaria": media_longa,
+        "media_recente": media_curta,
+        "tendencia": tendencia,
+        "desvio_padrao": desvio,
+        "demanda_diaria": demanda_diaria,
+        "dias_ate_ruptura": dias_ate_ruptura,
+        "sugestao_reposicao": sugestao_reposicao,
+    }
+
+
+def _carregar_e_calcular(db: Session, tenant_id: int, janela: int, horizonte: int) -> List[dict]:
+    alimentos = db.execute(
+        select(
+            Alimento.id,
+            Alimento.nome,
+            Alimento.unidade_medida,
+            Alimento.quantidade_estoque,
+            Alimento.quantidade_minima,
+        ).where(
+            Alimento.tenant_id == tenant_id,
+            Alimento.ativo == True
+        ).order_by(Alimento.id)
+    ).all()
+    if not alimentos:
+        return []
+
+    inicio = date.today() - timedelta(days=janela - 1)
+    linhas = db.execute(
+        select(
+            ConsumoDiario.alimento_id,
+            ConsumoDiario.dia,
+            ConsumoDiario.saidas,
+        ).where(
+            ConsumoDiario.tenant_id == tenant_id,
+            ConsumoDiario.dia >= inicio
+        )
+    ).all()
+
+    ids = np.fromiter((a.id for a in alimentos), dtype=np.int64, count=len(alimentos))
+    estoque = np.fromiter((a.quantidade_estoque or 0 for a in alimentos), dtype=np.float64, count=len(alimentos))
+    minimo = np.fromiter((a.quantidade_minima or 0 for a in alimentos), dtype=np.float64, count=len(alimentos))
+
+    consumo = np.zeros((len(alimentos), janela), dtype=np.float64)
+    if linhas:
+        alimento_ids = np.fromiter((l.alimento_id for l in linhas), dtype=np.int64, count=len(linhas))
+        dias = np.fromiter(((l.dia - inicio).days for l in linhas), dtype=np.int64, count=len(linhas))
+        saidas = np.fromiter((l.saidas for l in linhas), dtype=np.float64, count=len(linhas))
+
+        # ids está ordenado: searchsorted mapeia alimento_id -> linha da matriz
+        posicao = np.searchsorted(ids, alimento_ids)
+        conhecido = (posicao < len(ids)) & (ids[np.minimum(posicao, len(ids) - 1)] == alimento_ids) & (dias < janela)
+        np.add.at(consumo, (posicao[conhecido], dias[conhecido]), saidas[conhecido])
+
+    metricas = calcular_previsao(consumo, estoque, minimo, horizonte)
+
+    resultado = []
+    for i, alimento in enumerate(alimentos):
+        dias_ruptura = metricas["dias_ate_ruptura"][i]
+        resultado.append({
+            "alimento_id": alimento.id,
+            "alimento_nome": alimento.nome,
+            "unidade_medida": alimento.unidade_medida,
+            "quantidade_estoque": float(estoque[i]),
+            "quantidade_minima": float(minimo[i]),
+            "media_diaria": round(float(metricas["media_diaria"][i]), 3),
+            "media_recente": round(float(metricas["media_recente"][i]), 3),
+            "tendencia": round(float(metricas["tendencia"][i]), 4),
+            "desvio_padrao": round(float(metricas["desvio_padrao"][i]), 3),
+            "dias_ate_ruptura": round(float(dias_ruptura), 1) if np.isfinite(dias_ruptura) else None,
+            "sugestao_reposicao": round(float(metricas["sugestao_reposicao"][i]), 2),
+        })
+
+    # Mais urgentes primeiro; produtos sem consumo (None) no final
+    resultado.sort(key=lambda r: (r["dias_ate_ruptura"] is None, r["dias_ate_ruptura"] or 0))
+    return resultado
+
+
+def obter_previsao(db: Session, tenant_id: int, janela: int = 28, horizonte: int = 7) -> List[dict]:
+    """Retorna a previsão do tenant, usando o cache enquanto não houver movimentação."""
+    chave = (janela, horizonte)
+    agora = time.monotonic()
+
+    with _cache_lock:
+        previsoes = _cache.get(tenant_id)
+        entrada = previsoes.get(chave) if previsoes is not None else None
+        if entrada:
+            _cache.move_to_end(tenant_id)
+            previsoes.move_to_end(chave)
+        geracao = _geracao.get(tenant_id, 0)
+    if entrada and agora - entrada[0] < CACHE_TTL_SEGUNDOS:
+        return entrada[1]
+
+    resultado = _carregar_e_calcular(db, tenant_id, janela, horizonte)
+
+    with _cache_lock:
+        # Só guarda se nenhuma movimentação invalidou o tenant durante o cálculo
+        if _geracao.get(tenant_id, 0) == geracao:
+            previsoes = _cache.setdefault(tenant_id, OrderedDict())
+            previsoes[chave] = (agora, resultado)
+            previsoes.move_to_end(chave)
+            _cache.move_to_end(tenant_id)
+            while len(previsoes) > MAX_PREVISOES_POR_TENANT:
+                previsoes.popitem(last=False)
+            while len(_cache) > MAX_TENANTS:
+                _cache.popitem(last=False)
+    return resultado
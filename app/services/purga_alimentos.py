@@ -0,0 +1,93 @@
+"""Remoção física dos produtos excluídos (soft delete).
+
+DELETE /alimentos só marca o produto (ativo=False, deleted_at): o histórico
+continua consultável pelo período de retenção e a linha serve de tombstone
+para o delta sync. Depois da retenção, este job apaga em lotes pequenos as
+movimentações e os lotes do produto e, por fim, a própria linha; cada lote
+roda na sua transação para não segurar locks nem gerar transações longas.
+"""
+from __future__ import annotations
+from datetime import timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, engine
+from app.models import Alimento, MovimentacaoEstoque, ProdutoLote
+from app.services.history_cleanup import RETENTION_DAYS
+from app.services.versao_dados import incrementar_versoes
+
+# Produtos excluídos são mantidos (histórico + tombstone) pelo mesmo período do histórico
+RETENCAO_DIAS = RETENTION_DAYS
+# Produtos purgados por rodada e linhas filhas apagadas por transação
+ALIMENTOS_POR_LOTE = 100
+LINHAS_POR_LOTE = 1000
+# Garante uma única execução do job mesmo com vários workers
+ADVISORY_LOCK_ID = 734002
+
+
+def _apagar_em_lotes(db: Session, modelo, alimento_ids: List[int], linhas_por_lote: int) -> int:
+    """Apaga as linhas filhas dos produtos, `linhas_por_lote` por transação."""
+    total = 0
+    while True:
+        ids = select(modelo.id).where(
+            modelo.alimento_id.in_(alimento_ids)
+        ).limit(linhas_por_lote).scalar_subquery()
+        removidas = db.execute(delete(modelo).where(modelo.id.in_(ids))).rowcount or 0
+        db.commit()
+        total += removidas
+        if removidas < linhas_por_lote:
+            return total
+
+
+def purgar_alimentos_excluidos(
+    retencao_dias: Optional[int] = None,
+    alimentos_por_lote: int = ALIMENTOS_POR_LOTE,
+    linhas_por_lote: int = LINHAS_POR_LOTE,
+) -> int:
+    """Apaga fisicamente os produtos excluídos há mais que a retenção.
+
+    Retorna o total de produtos removidos, ou -1 se outro worker já está
+    executando o job.
+    """
+    # deleted_at é timestamptz: o corte é calculado no próprio banco
+    corte = func.now() - timedelta(days=retencao_dias or RETENCAO_DIAS)
+
+    # O lock é de sessão: fica numa conexão dedicada durante todo o job
+    with engine.connect() as lock_conn:
+        adquirido = lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID}
+        ).scalar()
+        lock_conn.commit()
+        if not adquirido:
+            return -1
+
+        db = SessionLocal()
+        try:
+            total = 0
+            while True:
+                # Servido pelo índice parcial ix_alimentos_excluidos
+                linhas = db.execute(
+                    select(Alimento.id, Alimento.tenant_id).where(
+                        Alimento.deleted_at < corte
+                    ).order_by(Alimento.deleted_at).limit(alimentos_por_lote)
+                ).all()
+                if not linhas:
+                    return total
+                alimento_ids = [linha.id for linha in linhas]
+
+                # Movimentações antes dos lotes: o FK lote_id tem ON DELETE CASCADE e
+                # apagar o lote primeiro levaria as movimentações numa transação só
+                _apagar_em_lotes(db, MovimentacaoEstoque, alimento_ids, linhas_por_lote)
+                _apagar_em_lotes(db, ProdutoLote, alimento_ids, linhas_por_lote)
+
+                # Restantes (consumo diário, alertas) saem pelo ON DELETE CASCADE
+                db.execute(delete(Alimento).where(Alimento.id.in_(alimento_ids)))
+                incrementar_versoes(db, sorted({linha.tenant_id for linha in linhas}))
+                db.commit()
+                total += len(alimento_ids)
+        finally:
+            db.close()
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+            lock_conn.commit()
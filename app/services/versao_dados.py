@@ -0,0 +1,133 @@
+"""Versão dos dados de estoque por tenant (ETag das listagens).
+
+`tenants.versao_dados` é incrementada na mesma transação de toda escrita em
+alimentos, movimentações e lotes, e o novo valor segue pelo LISTEN/NOTIFY.
+Cada worker mantém as versões em memória: a validação do ETag é uma consulta
+O(1) a um dict, sem ir ao banco. Enquanto o listener está desconectado (ou
+recarregando as versões) não há versão confiável e os ETags são desligados.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Tenant
+from app.services.eventos import broker, notificar_versao
+
+logger = logging.getLogger(__name__)
+
+_versoes: Dict[int, int] = {}
+_pronto = False
+_geracao = 0
+_lock = threading.Lock()
+
+
+# ==================== ESCRITA ====================
+def incrementar_versao(db: Session, tenant_id: int) -> int:
+    """Incrementa a versão do tenant na transação atual e a publica após o commit.
+
+    Depois do commit, chamar `registrar_versao` com o valor retornado para que o
+    próprio worker não dependa da chegada do NOTIFY.
+    """
+    versao = db.execute(
+        update(Tenant).where(Tenant.id == tenant_id).values(
+            versao_dados=Tenant.versao_dados + 1,
+            updated_at=Tenant.updated_at  # não é uma alteração do cadastro
+        ).returning(Tenant.versao_dados)
+    ).scalar_one()
+    notificar_versao(db, tenant_id, versao)
+    return versao
+
+
+def incrementar_versoes(db: Session, tenant_ids: Iterable[int]) -> None:
+    """Versão em lote para jobs (reconstrução do calendário, limpeza do histórico)."""
+    tenant_ids = list(tenant_ids)
+    if not tenant_ids:
+        return
+    linhas = db.execute(
+        update(Tenant).where(Tenant.id.in_(tenant_ids)).values(
+            versao_dados=Tenant.versao_dados + 1,
+            updated_at=Tenant.updated_at
+        ).returning(Tenant.id, Tenant.versao_dados)
+    ).all()
+    for tenant_id, versao in linhas:
+        notificar_versao(db, tenant_id, versao)
+
+
+def incrementar_versoes_cliente(db: Session, cliente_id: int) -> None:
+    """Versão de todos os restaurantes do cliente (sem commit).
+
+    Para escritas fora do estoque que aparecem nas listagens: o nome do
+    usuário em /movimentacoes. Todos os restaurantes do cliente, porque as
+    movimentações antigas continuam nos restaurantes dos quais o usuário
+    já foi desvinculado.
+    """
+    linhas = db.execute(
+        update(Tenant).where(Tenant.cliente_id == cliente_id).values(
+            versao_dados=Tenant.versao_dados + 1,
+            updated_at=Tenant.updated_at
+        ).returning(Tenant.id, Tenant.versao_dados)
+    ).all()
+    for tenant_id, versao in linhas:
+        notificar_versao(db, tenant_id, versao)
+
+
+def registrar_versao(tenant_id: int, versao: int) -> None:
+    with _lock:
+        if versao > _versoes.get(tenant_id, 0):
+            _versoes[tenant_id] = versao
+
+
+# ==================== LEITURA ====================
+def versao_atual(tenant_id: int) -> Optional[int]:
+    """Versão em memória do tenant, ou None se não houver versão confiável."""
+    if not (_pronto and broker.conectado):
+        return None
+    return _versoes.get(tenant_id, 0)
+
+
+def _carregar_todas(geracao: int) -> None:
+    db = SessionLocal()
+    try:
+        linhas = db.execute(select(Tenant.id, Tenant.versao_dados)).all()
+    finally:
+        db.close()
+
+    global _pronto
+    with _lock:
+        if geracao != _geracao:
+            return
+        for tenant_id, versao in linhas:
+            if versao > _versoes.get(tenant_id, 0):
+                _versoes[tenant_id] = versao
+        _pronto = True
+    logger.info("Versões de dados carregadas: %s tenants", len(linhas))
+
+
+def _ao_evento(evento: dict) -> None:
+    global _pronto, _geracao
+    tipo = evento.get("tipo")
+    if tipo == "versao":
+        registrar_versao(evento["tenant_id"], evento["versao"])
+    elif tipo == "conectado":
+        # LISTEN ativo antes da carga: o que mudar durante ela chega por evento
+        with _lock:
+            _pronto = False
+            _geracao += 1
+            _versoes.clear()
+            geracao = _geracao
+        tarefa = asyncio.get_running_loop().run_in_executor(None, _carregar_todas, geracao)
+        tarefa.add_done_callback(_log_falha_carga)
+
+
+def _log_falha_carga(tarefa) -> None:
+    if not tarefa.cancelled() and tarefa.exception() is not None:
+        logger.error("❌ Falha ao carregar versões de dados: %s", tarefa.exception())
+
+
+broker.ouvir(_ao_evento)
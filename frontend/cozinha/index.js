@@ -759,9 +759,7 @@ document.getElementById('form-entrada')?.addEventListener('submit', async (e) =>
         // Se for entrada por embalagem e retornou pacotes, imprime automaticamente
             if (result.pacotes && Array.isArray(result.pacotes) && result.pacotes.length > 0) {
                 console.log('🔵 Imprimindo etiquetas para', result.pacotes.length, 'pacotes');
-                result.pacotes.forEach((mov, i) => {
-                    setTimeout(() => imprimirEtiqueta(mov.movimentacao_id), i * 300);
-                });
+                imprimirEtiquetas(result.pacotes.map(mov => mov.movimentacao_id));
             } else if (result.qr_code_gerado && result.movimentacao_id) {
                 console.log('🔵 Imprimindo etiqueta única');
                 setTimeout(() => imprimirEtiqueta(result.movimentacao_id), 0);
@@ -813,6 +811,40 @@ function imprimirEtiqueta(movimentacaoId, quantidadeCustom) {
     });
 }
 
+// Todas as etiquetas de uma entrada por embalagens em um único PDF (uma página por pacote)
+function imprimirEtiquetas(movimentacaoIds) {
+    showNotification('Gerando etiquetas...', 'success');
+    fetch(`/api/tenant/${tenantId}/etiquetas`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Authorization': 'Bearer ' + token
+        },
+        body: JSON.stringify({ movimentacao_ids: movimentacaoIds })
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error('Erro ao gerar etiquetas');
+        }
+        return response.blob();
+    })
+    .then(blob => {
+        // Cria URL temporária e faz download
+        const url = window.URL.createObjectURL(blob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = `etiquetas_${movimentacaoIds[0]}_${movimentacaoIds.length}.pdf`;
+        document.body.appendChild(a);
+        a.click();
+        window.URL.revokeObjectURL(url);
+        document.body.removeChild(a);
+        showNotification('Etiquetas baixadas com sucesso!', 'success');
+    })
+    .catch(err => {
+        showNotification('Erro ao baixar etiquetas: ' + err.message, 'error');
+    });
+}
+
 // 4. EDITAR PRODUTO
 function carregarProdutoEdicao() {
     const select = document.getElementById('editar-select');
@@ -1081,16 +1113,11 @@ async function verificarEstoqueBaixo() {
     
     try {
         console.log('🔍 Verificando estoque baixo...');
-        const response = await fetch(`/api/tenant/${tenantId}/alimentos`, {
+        // O servidor já retorna apenas os produtos abaixo do mínimo
+        const response = await fetch(`/api/tenant/${tenantId}/alimentos/estoque-baixo`, {
             headers: { 'Authorization': 'Bearer ' + token }
         });
-        const produtos = await response.json();
-        
-        const produtosBaixos = produtos.filter(p => 
-            p.quantidade_minima > 0 && 
-            p.quantidade_estoque <= p.quantidade_minima &&
-            p.ativo
-        );
+        const produtosBaixos = await response.json();
         
         console.log(`✅ Encontrados ${produtosBaixos.length} produtos com estoque baixo:`, produtosBaixos);
         
@@ -1175,18 +1202,121 @@ async function verificarTodosAlertas() {
     await verificarProdutosVencendo();
 }
 
-// Inicia verificação automática a cada 60 minutos (3600000ms)
+// ==================== EVENTOS EM TEMPO REAL (SSE) ====================
+// O servidor envia mudanças de estoque e alertas de validade assim que
+// acontecem. Usa fetch + stream (e não EventSource) para poder enviar o
+// header Authorization.
+let eventosAbort = null;
+let eventosTentativas = 0;
 let alertInterval;
+let ultimoDiaVerificado = null;
+
+function mostrarAlertaEstoqueBaixo(p) {
+    const mensagem = `
+        <div style="text-align:left;">
+            <strong style="font-size:16px;">⚠️ ALERTA DE ESTOQUE BAIXO</strong>
+            <div style="margin-top:10px;padding:5px;background:rgba(255,255,255,0.1);border-radius:4px;">
+                <strong>${p.nome}</strong>: ${Number(p.quantidade_estoque).toFixed(1)} ${p.unidade_medida || ''} 
+                <small>(mín: ${p.quantidade_minima})</small>
+            </div>
+        </div>
+    `;
+    showNotification(mensagem, 'warning', 10000);
+}
+
+function mostrarAlertaValidade(lote) {
+    const urgenciaIcon = lote.urgencia === 'critico' ? '🔴' : lote.urgencia === 'alto' ? '🟠' : '🟡';
+    const diasTexto = lote.dias_restantes === 0 ? 'HOJE' :
+                     lote.dias_restantes === 1 ? 'AMANHÃ' :
+                     `${lote.dias_restantes} dias`;
+    const mensagem = `
+        <div style="text-align:left;">
+            <strong style="font-size:16px;">📅 PRODUTO PRÓXIMO DO VENCIMENTO</strong>
+            <div style="margin-top:10px;padding:8px;background:rgba(255,255,255,0.1);border-radius:4px;">
+                <strong>${lote.alimento_nome}</strong> ${urgenciaIcon} ${diasTexto}
+                <br><small>Lote: ${lote.lote_numero} | Qtd: ${lote.quantidade_disponivel} ${lote.unidade_medida || ''}</small>
+            </div>
+        </div>
+    `;
+    showNotification(mensagem, 'error', 12000);
+}
+
+function tratarEvento(tipo, dados) {
+    if (tipo === 'estoque') {
+        if (dados.estoque_baixo) mostrarAlertaEstoqueBaixo(dados);
+    } else if (tipo === 'validade') {
+        mostrarAlertaValidade(dados);
+    } else if (tipo === 'resync') {
+        // Eventos foram perdidos: refaz a verificação completa uma vez
+        verificarTodosAlertas();
+    }
+}
+
+async function conectarEventos() {
+    if (!tenantId) return;
+    eventosAbort = new AbortController();
+    
+    try {
+        const response = await fetch(`/api/tenant/${tenantId}/eventos`, {
+            headers: { 'Authorization': 'Bearer ' + token, 'Accept': 'text/event-stream' },
+            signal: eventosAbort.signal
+        });
+        if (!response.ok || !response.body) throw new Error(`HTTP ${response.status}`);
+        
+        console.log('📡 Conectado ao stream de eventos');
+        eventosTentativas = 0;
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            let fim;
+            while ((fim = buffer.indexOf('\n\n')) !== -1) {
+                const bloco = buffer.slice(0, fim);
+                buffer = buffer.slice(fim + 2);
+                
+                let tipo = 'message';
+                let data = '';
+                for (const linha of bloco.split('\n')) {
+                    if (linha.startsWith('event:')) tipo = linha.slice(6).trim();
+                    else if (linha.startsWith('data:')) data += linha.slice(5).trim();
+                }
+                if (data) tratarEvento(tipo, JSON.parse(data));
+            }
+        }
+    } catch (err) {
+        if (err.name === 'AbortError') return;
+        console.error('❌ Stream de eventos caiu:', err);
+    }
+    
+    // Reconecta com backoff (máx. 60s)
+    if (eventosAbort && !eventosAbort.signal.aborted) {
+        eventosTentativas++;
+        setTimeout(conectarEventos, Math.min(1000 * 2 ** eventosTentativas, 60000));
+    }
+}
+
 function iniciarAlertas() {
-    if (alertInterval) clearInterval(alertInterval);
+    pararAlertas();
     
-    // Verifica imediatamente ao carregar
+    // Verificação completa uma vez ao carregar; depois tudo chega por evento
     setTimeout(() => verificarTodosAlertas(), 3000); // Aguarda 3s após login
+    ultimoDiaVerificado = new Date().toDateString();
+    conectarEventos();
     
-    // Depois verifica a cada 60 minutos
+    // Lotes entram na janela de vencimento com a virada do dia: refaz a
+    // verificação só quando a data muda (nenhuma requisição no resto do tempo)
     alertInterval = setInterval(() => {
-        verificarTodosAlertas();
-    }, 3600000); // 60 minutos
+        const hoje = new Date().toDateString();
+        if (hoje !== ultimoDiaVerificado) {
+            ultimoDiaVerificado = hoje;
+            verificarProdutosVencendo();
+        }
+    }, 600000); // 10 minutos
 }
 
 // Para os alertas quando trocar de restaurante ou fazer logout
@@ -1195,6 +1325,10 @@ function pararAlertas() {
         clearInterval(alertInterval);
         alertInterval = null;
     }
+    if (eventosAbort) {
+        eventosAbort.abort();
+        eventosAbort = null;
+    }
 }
 
 // Trocar restaurante
@@ -0,0 +1,100 @@
+"""
+Benchmark de concorrência: Session síncrona vs. AsyncSession (asyncpg).
+
+Dispara N requisições simultâneas de uma consulta de leitura em três modelos:
+  - async+sync : `async def` com Session síncrona (bloqueia o event loop - modelo antigo)
+  - threadpool : `def` com Session síncrona no thread pool do Starlette (40 threads)
+  - asyncpg    : `async def` com AsyncSession
+
+Requer DATABASE_URL (.env) apontando para um PostgreSQL acessível.
+Uso: python scripts/benchmark_async_db.py [--requisicoes 2000] [--concorrencia 200] [--query-ms 5]
+"""
+import sys
+import os
+import argparse
+import asyncio
+import statistics
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anyio import to_thread
+from sqlalchemy import text
+
+from app.database import SessionLocal, AsyncSessionLocal, async_engine, engine
+
+
+def _consulta(query_ms: int):
+    # pg_sleep simula o tempo de uma leitura real no servidor
+    return text(f"SELECT pg_sleep({query_ms / 1000.0}), 1")
+
+
+def _sync(query_ms: int):
+    db = SessionLocal()
+    try:
+        db.execute(_consulta(query_ms)).all()
+    finally:
+        db.close()
+
+
+async def req_async_sync(query_ms: int):
+    _sync(query_ms)
+
+
+async def req_threadpool(query_ms: int):
+    await to_thread.run_sync(_sync, query_ms)
+
+
+async def req_asyncpg(query_ms: int):
+    async with AsyncSessionLocal() as db:
+        (await db.execute(_consulta(query_ms))).all()
+
+
+async def executar(req, requisicoes: int, concorrencia: int, query_ms: int):
+    semaforo = asyncio.Semaphore(concorrencia)
+    latencias = []
+
+    async def uma():
+        async with semaforo:
+            inicio = time.perf_counter()
+            await req(query_ms)
+            latencias.append(time.perf_counter() - inicio)
+
+    # Aquecimento do pool
+    await asyncio.gather(*(req(query_ms) for _ in range(10)))
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uma() for _ in range(requisicoes)))
+    total = time.perf_counter() - inicio
+
+    latencias.sort()
+    q = statistics.quantiles(latencias, n=100)
+    return requisicoes / total, q[49] * 1000, q[94] * 1000, q[98] * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=200)
+    parser.add_argument("--query-ms", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"{args.requisicoes} requisições, concorrência {args.concorrencia}, consulta de {args.query_ms} ms")
+    print("=" * 70)
+    print(f"{'modelo':<12} {'req/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10}")
+
+    for nome, req in (
+        ("async+sync", req_async_sync),
+        ("threadpool", req_threadpool),
+        ("asyncpg", req_asyncpg),
+    ):
+        rps, p50, p95, p99 = await executar(req, args.requisicoes, args.concorrencia, args.query_ms)
+        print(f"{nome:<12} {rps:>10.0f} {p50:>10.1f} {p95:>10.1f} {p99:>10.1f}")
+
+    await async_engine.dispose()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
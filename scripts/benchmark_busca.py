@@ -0,0 +1,115 @@
+"""
+Benchmark da busca de produtos: ILIKE '%termo%' vs. trigram (pg_trgm + unaccent).
+
+Cria uma tabela temporária com 50.000 produtos de um tenant (e índices iguais aos
+da migração 012) e mede as mesmas consultas de /alimentos com e sem índice.
+Requer DATABASE_URL (.env) e a migração 012 aplicada (extensões e immutable_unaccent).
+Uso: python scripts/benchmark_busca.py
+"""
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.database import engine
+
+N_PRODUTOS = 50_000
+REPETICOES = 20
+LIMITE = 10
+
+BASES = [
+    "Feijão", "Arroz", "Açúcar", "Pão", "Maçã", "Limão", "Frango", "Café", "Óleo",
+    "Macarrão", "Queijo", "Presunto", "Tomate", "Cebola", "Alho", "Batata", "Farinha",
+    "Manteiga", "Leite", "Requeijão", "Mamão", "Melão", "Abóbora", "Brócolis", "Pimentão",
+]
+CATEGORIAS = ["Grãos", "Laticínios", "Carnes", "Hortifrúti", "Padaria", "Bebidas", "Congelados"]
+FORNECEDORES = ["Atacadão", "São João Alimentos", "Distribuidora Ceará", "Hortifruti Paraná"]
+
+CRIAR = """
+CREATE TEMP TABLE bench_alimentos AS
+SELECT
+    g AS id,
+    1 AS tenant_id,
+    (:bases)[1 + (g % :n_bases)] || ' ' || (ARRAY['tipo 1','extra','premium','orgânico','fatiado','integral'])[1 + (g % 6)]
+        || ' ' || g AS nome,
+    (:categorias)[1 + (g % :n_categorias)] AS categoria,
+    (:fornecedores)[1 + (g % :n_fornecedores)] AS fornecedor,
+    true AS ativo
+FROM generate_series(1, :n) AS g
+"""
+
+INDICES = """
+CREATE INDEX ON bench_alimentos (tenant_id);
+CREATE INDEX ON bench_alimentos USING gin (immutable_unaccent(lower(nome)) gin_trgm_ops);
+CREATE INDEX ON bench_alimentos USING gin (immutable_unaccent(lower(categoria)) gin_trgm_ops);
+CREATE INDEX ON bench_alimentos USING gin (immutable_unaccent(lower(fornecedor)) gin_trgm_ops);
+ANALYZE bench_alimentos;
+"""
+
+NORM = "immutable_unaccent(lower({}))"
+
+CONSULTAS = {
+    "ILIKE (atual)": (
+        "SELECT id, nome FROM bench_alimentos "
+        "WHERE tenant_id = 1 AND ativo AND nome ILIKE '%' || :q || '%' LIMIT :limite"
+    ),
+    "trigram contem": (
+        f"SELECT id, nome FROM bench_alimentos "
+        f"WHERE tenant_id = 1 AND ativo AND {NORM.format('nome')} LIKE '%' || {NORM.format(':q')} || '%' "
+        f"LIMIT :limite"
+    ),
+    "trigram relevancia": (
+        f"SELECT id, nome FROM bench_alimentos "
+        f"WHERE tenant_id = 1 AND ativo AND ("
+        f"  {NORM.format('nome')} LIKE '%' || {NORM.format(':q')} || '%'"
+        f"  OR {NORM.format(':q')} <% {NORM.format('nome')}"
+        f"  OR {NORM.format('categoria')} LIKE '%' || {NORM.format(':q')} || '%'"
+        f"  OR {NORM.format('fornecedor')} LIKE '%' || {NORM.format(':q')} || '%')"
+        f" ORDER BY CASE WHEN {NORM.format('nome')} LIKE {NORM.format(':q')} || '%' THEN 0 ELSE 1 END,"
+        f"  word_similarity({NORM.format(':q')}, {NORM.format('nome')}) DESC, nome "
+        f"LIMIT :limite"
+    ),
+}
+
+# Digitação progressiva (autocompletar) + termo sem acento + erro de digitação
+TERMOS = ["fei", "feij", "feijao", "requeijao", "macarao", "organico 4999"]
+
+
+def medir(conn, sql, q):
+    conn.execute(text(sql), {"q": q, "limite": LIMITE}).all()
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        linhas = conn.execute(text(sql), {"q": q, "limite": LIMITE}).all()
+    return (time.perf_counter() - inicio) / REPETICOES * 1000, len(linhas)
+
+
+def main():
+    with engine.connect() as conn:
+        conn.execute(text(CRIAR), {
+            "bases": BASES, "n_bases": len(BASES),
+            "categorias": CATEGORIAS, "n_categorias": len(CATEGORIAS),
+            "fornecedores": FORNECEDORES, "n_fornecedores": len(FORNECEDORES),
+            "n": N_PRODUTOS,
+        })
+        for comando in INDICES.strip().split(";"):
+            if comando.strip():
+                conn.execute(text(comando))
+
+        print("=" * 78)
+        print(f"Busca em {N_PRODUTOS} produtos de um tenant (limit {LIMITE}, média de {REPETICOES} execuções)")
+        print("=" * 78)
+        print(f"{'termo':<16}" + "".join(f"{nome:>21}" for nome in CONSULTAS))
+        for termo in TERMOS:
+            colunas = []
+            for sql in CONSULTAS.values():
+                ms, n = medir(conn, sql, termo)
+                colunas.append(f"{ms:>9.2f} ms ({n:>2} res)")
+            print(f"{termo:<16}" + "".join(f"{c:>21}" for c in colunas))
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
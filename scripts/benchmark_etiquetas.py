@@ -0,0 +1,106 @@
+"""
+Benchmark da renderização de etiquetas: thread da requisição vs. pool de processos.
+
+Renderiza N etiquetas distintas (sem cache) a partir de várias threads, como
+um threadpool de API recebendo uma rajada de impressões, com 0 (na própria
+thread), 1, 4 e 8 processos. Em paralelo, uma thread "sonda" executa uma
+tarefa leve a cada 5 ms e mede o atraso: é o que os outros endpoints sentem
+enquanto as etiquetas disputam o GIL.
+Não usa o banco. Uso: python scripts/benchmark_etiquetas.py [--etiquetas 400] [--threads 16]
+"""
+import sys
+import os
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.etiquetas import DadosEtiqueta, PoolRenderizacao
+
+INTERVALO_SONDA = 0.005
+
+
+def gerar_etiquetas(n: int):
+    hoje = date.today()
+    return [
+        DadosEtiqueta(
+            restaurante_nome="Restaurante Benchmark",
+            cnpj="12.345.678/0001-90",
+            responsavel_nome="Responsável Técnico",
+            produto_nome=f"Produto {i}",
+            categoria="Congelados",
+            unidade_medida="kg",
+            lote_numero=f"A{i:06d}",
+            quantidade=1.5 + i % 10,
+            data_producao=hoje,
+            data_validade=hoje + timedelta(days=30),
+            qr_code=f"00000000-0000-4000-8000-{i:012d}",
+        )
+        for i in range(n)
+    ]
+
+
+def sonda(parar: threading.Event, atrasos: list):
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        time.sleep(INTERVALO_SONDA)
+        atrasos.append(time.perf_counter() - inicio - INTERVALO_SONDA)
+
+
+def executar(processos: int, etiquetas, threads: int):
+    pool = PoolRenderizacao(processos=processos, fila_max=len(etiquetas))
+    pool.iniciar()
+    try:
+        # Aquecimento: sobe os processos e importa reportlab/qrcode neles
+        with ThreadPoolExecutor(max(processos, 1)) as aquecimento:
+            list(aquecimento.map(lambda d: pool.renderizar([d]), etiquetas[:max(processos, 1)]))
+
+        latencias = []
+        atrasos = []
+        parar = threading.Event()
+        thread_sonda = threading.Thread(target=sonda, args=(parar, atrasos))
+        thread_sonda.start()
+
+        def uma(dados):
+            inicio = time.perf_counter()
+            pool.renderizar([dados])
+            latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            list(executor.map(uma, etiquetas))
+        total = time.perf_counter() - inicio
+
+        parar.set()
+        thread_sonda.join()
+    finally:
+        pool.parar()
+
+    q = statistics.quantiles(latencias, n=100)
+    sonda_p95 = statistics.quantiles(atrasos, n=100)[94] if len(atrasos) > 1 else 0.0
+    return len(etiquetas) / total, q[49] * 1000, q[94] * 1000, sonda_p95 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--etiquetas", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    etiquetas = gerar_etiquetas(args.etiquetas)
+    print("=" * 74)
+    print(f"{args.etiquetas} etiquetas, {args.threads} threads de requisição, CPUs: {os.cpu_count()}")
+    print("=" * 74)
+    print(f"{'processos':<12} {'etiq/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'sonda p95 (ms)':>16}")
+    for processos in (0, 1, 4, 8):
+        rps, p50, p95, sonda_p95 = executar(processos, etiquetas, args.threads)
+        nome = "na thread" if processos == 0 else str(processos)
+        print(f"{nome:<12} {rps:>10.0f} {p50:>10.1f} {p95:>10.1f} {sonda_p95:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark dos formatos de etiqueta: PDF vs. ZPL vs. ESC/POS.
+
+Renderiza N etiquetas distintas em cada formato e tamanho, na própria
+thread (sem pool e sem cache), uma etiqueta por arquivo e todas num
+arquivo só, e mostra bytes por etiqueta e tempo de renderização por etiqueta.
+Não usa o banco. Uso: python scripts/benchmark_formatos_etiqueta.py [--etiquetas 200]
+"""
+import sys
+import os
+import argparse
+import statistics
+import time
+from dataclasses import replace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.etiquetas import FORMATOS, TAMANHOS
+from scripts.benchmark_etiquetas import gerar_etiquetas
+
+
+def medir(formato: str, etiquetas):
+    renderizar = FORMATOS[formato].renderizar
+    renderizar(etiquetas[:1])  # aquecimento (imports, fontes)
+
+    tempos = []
+    tamanhos = []
+    for dados in etiquetas:
+        inicio = time.perf_counter()
+        conteudo = renderizar([dados])
+        tempos.append(time.perf_counter() - inicio)
+        tamanhos.append(len(conteudo))
+
+    inicio = time.perf_counter()
+    lote = renderizar(etiquetas)
+    tempo_lote = time.perf_counter() - inicio
+
+    return (
+        statistics.mean(tamanhos),
+        statistics.median(tempos) * 1000,
+        len(lote) / len(etiquetas),
+        tempo_lote / len(etiquetas) * 1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--etiquetas", type=int, default=200)
+    args = parser.parse_args()
+
+    etiquetas = gerar_etiquetas(args.etiquetas)
+    print("=" * 78)
+    print(f"{args.etiquetas} etiquetas por formato (renderização na thread, sem cache)")
+    print("=" * 78)
+    print(f"{'formato':<10} {'tamanho':<8} {'bytes/etiq':>12} {'ms/etiq':>10} {'bytes/etiq (lote)':>20} {'ms/etiq (lote)':>16}")
+    for formato in FORMATOS:
+        for tamanho in TAMANHOS:
+            bytes_etiq, tempo, bytes_lote, tempo_lote = medir(
+                formato, [replace(dados, tamanho=tamanho) for dados in etiquetas]
+            )
+            print(f"{formato:<10} {tamanho:<8} {bytes_etiq:>12.0f} {tempo:>10.3f} {bytes_lote:>20.0f} {tempo_lote:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
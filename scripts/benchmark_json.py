@@ -0,0 +1,75 @@
+"""
+Benchmark de serialização das listagens: Pydantic + json (stdlib) vs. orjson direto.
+
+Simula o payload de /movimentacoes com 1k e 10k linhas, sem banco de dados.
+Uso: python scripts/benchmark_json.py
+"""
+import json
+import timeit
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import orjson
+from pydantic import BaseModel, TypeAdapter
+from fastapi.encoders import jsonable_encoder
+
+
+class MovimentacaoResponse(BaseModel):
+    id: int
+    alimento_id: int
+    alimento_nome: str
+    tipo: str
+    quantidade: float
+    quantidade_anterior: float
+    quantidade_nova: float
+    usuario_nome: str
+    observacao: Optional[str] = None
+    data_hora: datetime
+
+
+def gerar_linhas(n):
+    agora = datetime.utcnow()
+    return [
+        {
+            "id": i,
+            "alimento_id": i % 500,
+            "alimento_nome": f"Produto {i % 500}",
+            "tipo": "saida",
+            "quantidade": 1.5,
+            "quantidade_anterior": 10.0,
+            "quantidade_nova": 8.5,
+            "usuario_nome": "Cozinha",
+            "observacao": None,
+            "data_hora": agora - timedelta(minutes=i),
+        }
+        for i in range(n)
+    ]
+
+
+def caminho_pydantic(linhas, adapter):
+    """Caminho antigo: valida com response_model e serializa com json stdlib."""
+    validado = adapter.validate_python(linhas)
+    return json.dumps(jsonable_encoder(validado)).encode()
+
+
+def caminho_orjson(linhas):
+    """Caminho novo: linhas prontas direto para o orjson."""
+    return orjson.dumps(linhas)
+
+
+def main():
+    adapter = TypeAdapter(List[MovimentacaoResponse])
+    print("=" * 60)
+    print(f"{'linhas':>8} | {'pydantic+json (ms)':>20} | {'orjson (ms)':>12} | {'ganho':>6}")
+    print("-" * 60)
+    for n in (1_000, 10_000):
+        linhas = gerar_linhas(n)
+        repeticoes = 20 if n <= 1_000 else 5
+        t_antigo = min(timeit.repeat(lambda: caminho_pydantic(linhas, adapter), number=1, repeat=repeticoes))
+        t_novo = min(timeit.repeat(lambda: caminho_orjson(linhas), number=1, repeat=repeticoes))
+        print(f"{n:>8} | {t_antigo * 1000:>20.2f} | {t_novo * 1000:>12.2f} | {t_antigo / t_novo:>5.1f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
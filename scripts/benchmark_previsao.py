@@ -0,0 +1,70 @@
+"""
+Benchmark da previsão de ruptura: NumPy vetorizado vs. loop Python por produto.
+
+Usa uma matriz sintética de 5.000 produtos x 365 dias, sem banco de dados.
+Uso: python scripts/benchmark_previsao.py
+"""
+import sys
+import os
+import statistics
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.previsao import calcular_previsao, JANELA_CURTA, LEAD_TIME_DIAS, Z_SEGURANCA
+
+N_PRODUTOS = 5_000
+N_DIAS = 365
+HORIZONTE = 7
+
+
+def previsao_loop(consumo, estoque, minimo, horizonte):
+    """Mesma conta, produto a produto (referência)."""
+    n_dias = len(consumo[0])
+    t = list(range(n_dias))
+    t_media = sum(t) / n_dias
+    var_t = sum((x - t_media) ** 2 for x in t)
+    cobertura = LEAD_TIME_DIAS + horizonte
+    resultado = []
+    for linha, est, mini in zip(consumo, estoque, minimo):
+        media = sum(linha) / n_dias
+        recente = sum(linha[-JANELA_CURTA:]) / JANELA_CURTA
+        desvio = statistics.pstdev(linha)
+        tendencia = sum((x - t_media) * (y - media) for x, y in zip(t, linha)) / var_t
+        demanda = max(recente + tendencia * (JANELA_CURTA / 2), 0.0)
+        dias = est / demanda if demanda > 0 else float("inf")
+        necessidade = demanda * cobertura + Z_SEGURANCA * desvio * cobertura ** 0.5 + mini
+        resultado.append((dias, max(necessidade - est, 0.0)))
+    return resultado
+
+
+def main():
+    rng = np.random.default_rng(42)
+    consumo = rng.poisson(3.0, size=(N_PRODUTOS, N_DIAS)).astype(np.float64)
+    estoque = rng.uniform(0, 200, N_PRODUTOS)
+    minimo = rng.uniform(0, 20, N_PRODUTOS)
+
+    print("=" * 60)
+    print(f"Previsão: {N_PRODUTOS} produtos x {N_DIAS} dias")
+    print("=" * 60)
+
+    tempos = []
+    for _ in range(5):
+        inicio = time.perf_counter()
+        calcular_previsao(consumo, estoque, minimo, HORIZONTE)
+        tempos.append(time.perf_counter() - inicio)
+    t_numpy = min(tempos)
+    print(f"NumPy vetorizado : {t_numpy * 1000:8.1f} ms")
+
+    consumo_lista = consumo.tolist()
+    inicio = time.perf_counter()
+    previsao_loop(consumo_lista, estoque.tolist(), minimo.tolist(), HORIZONTE)
+    t_loop = time.perf_counter() - inicio
+    print(f"Loop por produto : {t_loop * 1000:8.1f} ms")
+    print(f"Ganho            : {t_loop / t_numpy:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()